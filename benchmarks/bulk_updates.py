@@ -0,0 +1,45 @@
+"""Latency of the per-player BotAccessor updates against the test database.
+
+Usage: python -m benchmarks.bulk_updates
+"""
+import asyncio
+
+from benchmarks.common import BENCHMARK_CHAT_ID, clear_database, connect_database, measure, report, seed_game
+from bot.worker.accessor import BotAccessor
+
+PLAYERS_QTY = (2, 20, 200)
+
+
+async def main():
+    database = await connect_database()
+    accessor = BotAccessor(database=database)
+
+    try:
+        for players_qty in PLAYERS_QTY:
+            await seed_game(database=database, players_qty=players_qty)
+            game = await accessor.get_game_dataclass(chat_id=BENCHMARK_CHAT_ID)
+            player_first, player_second = game.players[:2]
+
+            report(
+                f"reset_to_default_accounts_parameters ({players_qty})",
+                await measure(lambda: accessor.reset_to_default_accounts_parameters(game=game)),
+            )
+            report(
+                f"increment_users_total_games ({players_qty})",
+                await measure(lambda: accessor.increment_users_total_games(game=game)),
+            )
+            report(
+                f"set_photo_num_for_selected_players ({players_qty})",
+                await measure(
+                    lambda: accessor.set_photo_num_for_selected_players(
+                        chat_id=BENCHMARK_CHAT_ID, player_first=player_first, player_second=player_second
+                    )
+                ),
+            )
+            await clear_database(database=database)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Updates/sec through the multi-process mode: forwarder -> unix socket -> shard processes decoding updates.
+
+No database or Telegram is needed. Usage: python -m benchmarks.cluster_throughput
+"""
+import asyncio
+from asyncio import Queue, to_thread
+from multiprocessing import get_context
+from time import perf_counter
+
+from benchmarks.updates_corpus import get_updates_corpus
+from bot.cluster.forwarder import UpdateForwarder
+from bot.cluster.receiver import UpdateReceiver
+from bot.http_session import TgBotApiSession
+
+SOCKET_PATH = "/tmp/photochallenge_bot_benchmark.sock"
+PROCESSES_QTY = (1, 2, 4)
+BATCH_SIZE = 100
+
+
+def run_consumer(shard_index: int):
+    asyncio.run(consume(shard_index=shard_index))
+
+
+async def consume(shard_index: int):
+    queue = Queue()
+    receiver = UpdateReceiver(socket_path=SOCKET_PATH, shard_index=shard_index, queue=queue)
+    receiver.start()
+    await receiver.closed.wait()
+
+
+async def measure_throughput(processes_qty: int, corpus: list) -> float:
+    forwarder = UpdateForwarder(
+        token="", http_session=TgBotApiSession(), socket_path=SOCKET_PATH, shards_qty=processes_qty
+    )
+    await forwarder.listen()
+
+    context = get_context("spawn")
+    processes = [context.Process(target=run_consumer, args=(index,)) for index in range(processes_qty)]
+    for process in processes:
+        process.start()
+    await forwarder.shards_connected.wait()
+
+    started_at = perf_counter()
+    for index in range(0, len(corpus), BATCH_SIZE):
+        await forwarder.forward(raw_updates=corpus[index : index + BATCH_SIZE])
+    await forwarder.stop()
+    for process in processes:
+        await to_thread(process.join)
+
+    return len(corpus) / (perf_counter() - started_at)
+
+
+async def main():
+    corpus = get_updates_corpus(updates_qty=50000)
+    for processes_qty in PROCESSES_QTY:
+        throughput = await measure_throughput(processes_qty=processes_qty, corpus=corpus)
+        print(f"{processes_qty} shard process(es): {throughput:10.0f} updates/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+from statistics import median
+from time import perf_counter
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+
+from bot.models import AccountModel, GameModel, UserModel
+from bot.worker.fsm import GAMEPLAY_STATE
+from config.config import setup_config_tests
+from database.database import Database
+
+BENCHMARK_CHAT_ID = -100500
+
+
+async def connect_database() -> Database:
+    database = Database(config=setup_config_tests().tg_bot.database)
+    await database.connect()
+    return database
+
+
+async def seed_game(database: Database, players_qty: int, chat_id: int = BENCHMARK_CHAT_ID) -> None:
+    async with database.session.begin() as session:
+        session.add(GameModel(chat_id=chat_id, bot_state=GAMEPLAY_STATE, current_round=1))
+        session.add_all(
+            [
+                UserModel(id=user_id, username=f"user_{user_id}", profile_photo_id=f"file_id_{user_id}")
+                for user_id in range(1, players_qty + 1)
+            ]
+        )
+        await session.flush()
+        session.add_all([AccountModel(user_id=user_id, game_id=chat_id) for user_id in range(1, players_qty + 1)])
+
+
+async def clear_database(database: Database) -> None:
+    async with database.session.begin() as session:
+        for table in database.db.metadata.tables:
+            await session.execute(text(f"TRUNCATE {table} CASCADE"))
+
+
+async def measure(call: Callable[[], Awaitable], repeats: int = 50) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        started_at = perf_counter()
+        await call()
+        timings.append(perf_counter() - started_at)
+    return timings
+
+
+def report(title: str, timings: List[float]) -> None:
+    print(f"{title:<50} median {median(timings) * 1000:8.3f} ms, max {max(timings) * 1000:8.3f} ms")
@@ -0,0 +1,52 @@
+"""Per-update game loading latency: the former three-query ORM path against the single joined query.
+
+Usage: python -m benchmarks.game_loading
+"""
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from benchmarks.common import BENCHMARK_CHAT_ID, clear_database, connect_database, measure, report, seed_game
+from bot.models import AccountModel, GameModel
+from bot.worker.accessor import BotAccessor
+from bot.worker.cache import GameCache
+from database.database import Database
+
+PLAYERS_QTY = (2, 20, 200)
+
+
+async def get_game_dataclass_orm(database: Database, chat_id: int):
+    statement_game = select(GameModel).where(GameModel.chat_id == chat_id).options(selectinload(GameModel.players))
+    game_models_list = await database.execute_statement_scalars(statement=statement_game)
+
+    statement_account = select(AccountModel).where(AccountModel.game_id == chat_id)
+    account_models_list = await database.execute_statement_scalars(statement=statement_account)
+    accounts = [account_model.dataclass for account_model in account_models_list]
+
+    return game_models_list[0].transform_to_dataclass(accounts=accounts) if game_models_list else None
+
+
+async def main():
+    database = await connect_database()
+    accessor = BotAccessor(database=database, cache=GameCache(max_size=0))  # every load goes to the database
+
+    try:
+        for players_qty in PLAYERS_QTY:
+            await seed_game(database=database, players_qty=players_qty)
+
+            report(
+                f"orm, 3 queries ({players_qty} players)",
+                await measure(lambda: get_game_dataclass_orm(database=database, chat_id=BENCHMARK_CHAT_ID)),
+            )
+            report(
+                f"get_game_dataclass ({players_qty} players)",
+                await measure(lambda: accessor.get_game_dataclass(chat_id=BENCHMARK_CHAT_ID)),
+            )
+            await clear_database(database=database)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
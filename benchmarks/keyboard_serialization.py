@@ -0,0 +1,52 @@
+"""Per-send reply_markup serialisation cost: schema dump on every send against the keyboard registry.
+
+Usage: python -m benchmarks.keyboard_serialization
+"""
+import asyncio
+import json
+
+from benchmarks.common import measure, report
+from bot.keyboard.keyboards import REGISTRATION_KEYBOARD
+from bot.sender.dataclasses import InlineKeyboardButton, InlineKeyboardMarkup, inline_keyboard_markup_schema
+from bot.sender.keyboard_registry import KeyboardRegistry
+
+SENDS_QTY = 1000
+
+
+def build_dynamic_keyboard() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=f"player {index}", callback_data=f"player_{index}")] for index in range(5)
+        ]
+    )
+
+
+async def serialize_every_send(keyboard: InlineKeyboardMarkup) -> None:
+    for _ in range(SENDS_QTY):
+        json.dumps(inline_keyboard_markup_schema.dump(keyboard))
+
+
+async def serialize_with_registry(registry: KeyboardRegistry, keyboard: InlineKeyboardMarkup) -> None:
+    for _ in range(SENDS_QTY):
+        registry.get_json(keyboard=keyboard)
+
+
+async def main():
+    registry = KeyboardRegistry()
+    static_keyboard = REGISTRATION_KEYBOARD  # registered in bot.keyboard.keyboards
+    dynamic_keyboard = build_dynamic_keyboard()
+
+    report(f"schema dump, static ({SENDS_QTY} sends)", await measure(lambda: serialize_every_send(static_keyboard)))
+    report(
+        f"registry, static ({SENDS_QTY} sends)",
+        await measure(lambda: serialize_with_registry(registry=registry, keyboard=static_keyboard)),
+    )
+    report(f"schema dump, dynamic ({SENDS_QTY} sends)", await measure(lambda: serialize_every_send(dynamic_keyboard)))
+    report(
+        f"registry lru, dynamic ({SENDS_QTY} sends)",
+        await measure(lambda: serialize_with_registry(registry=registry, keyboard=build_dynamic_keyboard())),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
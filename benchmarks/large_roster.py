@@ -0,0 +1,90 @@
+"""Cost of a voting round on a large roster: list scans against the indexes of the Game dataclass.
+
+Usage: python -m benchmarks.large_roster
+"""
+import asyncio
+from typing import List
+
+from benchmarks.common import BENCHMARK_CHAT_ID, measure, report
+from bot.models import Account, Game, User
+from bot.worker.accessor import BotAccessor
+from bot.worker.fsm import START_ROUND_STATE
+from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
+
+ROSTER_SIZES = (10, 100, 1000)
+
+
+def build_game(players_qty: int) -> Game:
+    user_ids = range(1, players_qty + 1)
+    return Game(
+        chat_id=BENCHMARK_CHAT_ID,
+        bot_state=START_ROUND_STATE,
+        current_round=1,
+        players=[
+            User(
+                id=user_id,
+                username=f"user_{user_id}",
+                profile_photo_id=f"file_id_{user_id}",
+                wins=0,
+                total_games=0,
+                efficiency=0,
+            )
+            for user_id in user_ids
+        ],
+        accounts=[
+            Account(user_id=user_id, game_id=BENCHMARK_CHAT_ID, vote=False, scores=0, photo_num="no")
+            for user_id in user_ids
+        ],
+    )
+
+
+def get_players_ids_scan(players: List[User]) -> List[int]:
+    return [player.id for player in players]
+
+
+async def vote_with_scans(game: Game) -> None:
+    # the lookups before the indexes: every call filters the lists
+    for account in game.accounts[:2]:
+        account.photo_num = FIRST_PHOTO if account.user_id == 1 else SECOND_PHOTO
+
+    for voter in game.players:
+        if voter.id not in get_players_ids_scan(players=game.players):
+            continue
+        account = tuple(filter(lambda account: account.user_id == voter.id, game.accounts))[0]
+        if account.vote:
+            continue
+        account.vote = True
+        for photo_account in game.accounts:
+            if photo_account.photo_num == FIRST_PHOTO:
+                photo_account.scores += 1
+        len(tuple(filter(lambda account: account.vote, game.accounts))) == len(game.accounts)
+
+    for account in game.accounts:
+        account.vote, account.scores, account.photo_num = False, 0, "no"
+
+
+async def vote_with_indexes(game: Game) -> None:
+    game.set_photo_num(user_id=1, photo_num=FIRST_PHOTO)
+    game.set_photo_num(user_id=2, photo_num=SECOND_PHOTO)
+
+    for voter in game.players:
+        if not BotAccessor.is_player(game=game, user_id=voter.id):
+            continue
+        if not BotAccessor.can_player_vote(game=game, chat_id=game.chat_id, user_id=voter.id):
+            continue
+        game.set_vote(user_id=voter.id)
+        game.photo_accounts[FIRST_PHOTO].scores += 1
+        BotAccessor.are_all_players_vote(game=game)
+
+    game.reset_accounts()
+
+
+async def main():
+    for players_qty in ROSTER_SIZES:
+        game = build_game(players_qty=players_qty)
+        report(f"list scans ({players_qty} voters)", await measure(lambda: vote_with_scans(game=game), repeats=5))
+        report(f"indexes ({players_qty} voters)", await measure(lambda: vote_with_indexes(game=game), repeats=5))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
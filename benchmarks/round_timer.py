@@ -0,0 +1,51 @@
+"""100k pending round deadlines on the single timer task: scheduling cost, stale timers and firing lateness.
+
+Usage: python -m benchmarks.round_timer
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from random import random
+from time import perf_counter
+
+from benchmarks.common import report
+from bot.timer import RoundTimer
+
+TIMERS_QTY = 100000
+DEADLINES_SPREAD = 2.0  # seconds
+
+
+async def main():
+    timer = RoundTimer()
+    fired = asyncio.Event()
+    fired_qty = 0
+
+    async def on_expire(chat_id: int, current_round: int) -> None:
+        nonlocal fired_qty
+        fired_qty += 1
+        if fired_qty == TIMERS_QTY // 2:
+            fired.set()
+
+    timer.start(on_expire=on_expire)
+    now = datetime.now(tz=timezone.utc)
+    started_at = perf_counter()
+    for chat_id in range(TIMERS_QTY):
+        deadline = now + timedelta(seconds=1 + random() * DEADLINES_SPREAD)
+        timer.schedule(chat_id=chat_id, current_round=1, deadline=deadline)
+    report(f"schedule ({TIMERS_QTY} timers)", [perf_counter() - started_at])
+
+    started_at = perf_counter()
+    for chat_id in range(0, TIMERS_QTY, 2):  # the rounds closed by votes before their deadline
+        timer.cancel(chat_id=chat_id)
+    report(f"cancel ({TIMERS_QTY // 2} timers)", [perf_counter() - started_at])
+
+    await fired.wait()
+    await timer.stop()
+    statistics = timer.statistics
+    print(
+        f"fired {statistics.fired}, cancelled {statistics.cancelled}, "
+        f"max lateness {statistics.max_lateness * 1000:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
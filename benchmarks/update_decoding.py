@@ -0,0 +1,63 @@
+"""Updates/sec of update decoding: a new schema per update, cached schemas and the direct decoder.
+
+No database or Telegram is needed. Usage: python -m benchmarks.update_decoding
+"""
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from benchmarks.updates_corpus import get_updates_corpus
+from bot.poller.dataclasses import BasicUpdate, UpdateObjCallback, UpdateObjMessage, UpdateObjMyChatMember
+from bot.poller.decoder import decode_update
+
+REPEATS = 5
+
+CACHED_SCHEMAS = {
+    "message": UpdateObjMessage.Schema(),
+    "callback_query": UpdateObjCallback.Schema(),
+    "my_chat_member": UpdateObjMyChatMember.Schema(),
+}
+
+
+def decode_with_new_schema(raw_update: dict) -> Optional[BasicUpdate]:
+    # the former TgBotApiPoller.get_update_in_dataclass
+    match tuple(raw_update.keys()):
+        case _, "message":
+            return UpdateObjMessage.Schema().load(raw_update)
+        case _, "callback_query":
+            return UpdateObjCallback.Schema().load(raw_update)
+        case _, "my_chat_member":
+            return UpdateObjMyChatMember.Schema().load(raw_update)
+
+
+def decode_with_cached_schema(raw_update: dict) -> Optional[BasicUpdate]:
+    for update_type, schema in CACHED_SCHEMAS.items():
+        if update_type in raw_update:
+            return schema.load(raw_update)
+
+
+def measure_throughput(decode: Callable[[dict], Optional[BasicUpdate]], corpus: List[dict]) -> float:
+    best_time = float("inf")
+    for _ in range(REPEATS):
+        started_at = perf_counter()
+        for raw_update in corpus:
+            decode(raw_update)
+        best_time = min(best_time, perf_counter() - started_at)
+    return len(corpus) / best_time
+
+
+def main():
+    corpus = get_updates_corpus(updates_qty=10000)
+    assert [decode_update(raw_update) for raw_update in corpus] == [
+        decode_with_new_schema(raw_update) for raw_update in corpus
+    ]
+
+    for title, decode in (
+        ("new schema per update", decode_with_new_schema),
+        ("cached schemas", decode_with_cached_schema),
+        ("direct decoder", decode_update),
+    ):
+        print(f"{title:<30} {measure_throughput(decode=decode, corpus=corpus):10.0f} updates/sec")
+
+
+if __name__ == "__main__":
+    main()
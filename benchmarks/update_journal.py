@@ -0,0 +1,60 @@
+"""Update journal write throughput per getUpdates batch size and replay time after a crash.
+
+No database or Telegram is needed. Usage: python -m benchmarks.update_journal
+"""
+import asyncio
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from benchmarks.updates_corpus import get_updates_corpus
+from bot.poller.update_journal import UpdateJournal
+
+BATCH_SIZES = (1, 10, 100)
+UPDATES_QTY = 20000
+
+
+async def measure_writes(path: str, corpus: list, batch_size: int) -> UpdateJournal:
+    update_journal = UpdateJournal(path=path)
+    await update_journal.open()
+
+    started_at = perf_counter()
+    for index in range(0, len(corpus), batch_size):
+        batch = corpus[index : index + batch_size]
+        await update_journal.append(raw_updates=batch, offset=batch[-1]["update_id"] + 1)
+    throughput = len(corpus) / (perf_counter() - started_at)
+
+    statistics = update_journal.statistics
+    print(
+        f"batch {batch_size:>4}: {throughput:10.0f} updates/sec, "
+        f"{statistics.commits} commits, {statistics.commit_time / statistics.commits * 1000:.3f} ms per commit"
+    )
+    return update_journal
+
+
+async def measure_replay(path: str) -> None:
+    started_at = perf_counter()
+    update_journal = UpdateJournal(path=path)
+    raw_updates = await update_journal.open()
+    replay_time = perf_counter() - started_at
+
+    print(
+        f"replay of {len(raw_updates)} updates ({os.path.getsize(path) / 2**20:.1f} MiB): {replay_time * 1000:.1f} ms, "
+        f"offset {update_journal.offset}"
+    )
+    await update_journal.close()
+
+
+async def main():
+    corpus = get_updates_corpus(updates_qty=UPDATES_QTY)
+    for batch_size in BATCH_SIZES:
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "updates.journal")
+            update_journal = await measure_writes(path=path, corpus=corpus, batch_size=batch_size)
+            if batch_size == BATCH_SIZES[-1]:
+                await measure_replay(path=path)  # nothing is acknowledged, as after a crash
+            await update_journal.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
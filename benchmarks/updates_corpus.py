@@ -0,0 +1,76 @@
+from random import Random
+from typing import List
+
+from bot.keyboard.keyboards import FIRST_PHOTO_CALLBACK, SECOND_PHOTO_CALLBACK, USER_REGISTER_CALLBACK
+
+BOT_ID = 1000
+
+
+def get_message_update(update_id: int, chat_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": {"id": user_id, "first_name": "first_name", "last_name": "last_name", "username": "username"},
+            "chat": {"id": chat_id, "title": "Photo_Bot_Test", "type": "group"},
+            "date": 1678500000,
+            "text": text,
+        },
+    }
+
+
+def get_callback_update(update_id: int, chat_id: int, user_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "first_name": "first_name", "last_name": "last_name", "username": "username"},
+            "message": {
+                "message_id": update_id,
+                "from": {"id": BOT_ID, "first_name": "PhotochallengeBot", "username": "kts_photochallenge_bot"},
+                "chat": {"id": chat_id, "title": "Photo_Bot_Test", "type": "group"},
+                "date": 1678500000,
+                "text": "text",
+            },
+            "chat_instance": "1",
+            "data": data,
+        },
+    }
+
+
+def get_status_update(update_id: int, chat_id: int, status: str) -> dict:
+    return {
+        "update_id": update_id,
+        "my_chat_member": {
+            "chat": {"id": chat_id, "title": "Photo_Bot_Test", "type": "group"},
+            "from": {"id": 1, "first_name": "first_name", "last_name": "last_name", "username": "username"},
+            "date": 1678500000,
+            "old_chat_member": {"user": {"id": BOT_ID, "first_name": "PhotochallengeBot"}, "status": "left"},
+            "new_chat_member": {"user": {"id": BOT_ID, "first_name": "PhotochallengeBot"}, "status": status},
+        },
+    }
+
+
+def get_updates_corpus(updates_qty: int = 10000, chats_qty: int = 200, seed: int = 0) -> List[dict]:
+    # mostly chat chatter, then votes and registrations, as in a busy group
+    random = Random(seed)
+    corpus = []
+    for update_id in range(1, updates_qty + 1):
+        chat_id = -random.randint(1, chats_qty)
+        user_id = random.randint(1, 10000)
+        kind = random.random()
+
+        if kind < 0.6:
+            corpus.append(get_message_update(update_id=update_id, chat_id=chat_id, user_id=user_id, text="hello"))
+        elif kind < 0.65:
+            corpus.append(get_message_update(update_id=update_id, chat_id=chat_id, user_id=user_id, text="/start"))
+        elif kind < 0.9:
+            data = random.choice((FIRST_PHOTO_CALLBACK, SECOND_PHOTO_CALLBACK))
+            corpus.append(get_callback_update(update_id=update_id, chat_id=chat_id, user_id=user_id, data=data))
+        elif kind < 0.99:
+            data = USER_REGISTER_CALLBACK
+            corpus.append(get_callback_update(update_id=update_id, chat_id=chat_id, user_id=user_id, data=data))
+        else:
+            corpus.append(get_status_update(update_id=update_id, chat_id=chat_id, status="member"))
+
+    return corpus
@@ -0,0 +1,109 @@
+import asyncio
+import os
+from asyncio import Task, create_task, current_task, gather, get_running_loop, to_thread
+from multiprocessing import Process, get_context
+from signal import SIG_IGN, SIGINT, signal
+from typing import List, Optional
+
+from bot.cluster.forwarder import UpdateForwarder
+from bot.cluster.receiver import UpdateReceiver
+from bot.general import TgBot
+from bot.http_session import TgBotApiSession
+from bot.sharding import get_shard_index
+from config.config import Config
+
+
+class TgBotShard(TgBot):
+    # worker process: handles the chats of its shard with own database pool, game cache and sender
+    def __init__(self, config: Config, shard_index: int):
+        self.shard_index = shard_index
+        super().__init__(config=config)
+        self.shards_qty = config.tg_bot.processes_qty
+        self.poller = UpdateReceiver(
+            socket_path=config.tg_bot.socket_path,
+            shard_index=shard_index,
+            queue=self.update_queue,
+            update_journal=self.update_journal,
+        )
+
+    async def start_bot(self):
+        await gather(self.http_session.open(), self.database.connect())
+        await gather(
+            self.worker.accessor.warm_up_cache(is_own_chat=self.is_own_chat),
+            self.open_outbox(),
+            self.open_update_journal(),
+            self.recover_round_timers(is_own_chat=self.is_own_chat),
+        )
+        self.poller.start()
+        self.worker.start()
+        self.round_timer.start(on_expire=self.worker.put_round_timeout)
+        self.sender.start()
+
+    def get_global_rate_limit(self, config: Config) -> float:
+        # the limit is for the whole bot, and every shard process sends with its own scheduler
+        return config.tg_bot.global_rate_limit / config.tg_bot.processes_qty
+
+    def get_journal_path(self, name: str) -> str:
+        return os.path.join(self.journal_dir, f"{name}_{self.shard_index}.journal")
+
+    def is_own_chat(self, chat_id: int) -> bool:
+        return get_shard_index(key=chat_id, shards_qty=self.shards_qty) == self.shard_index
+
+
+def run_shard_process(config: Config, shard_index: int):
+    signal(SIGINT, SIG_IGN)  # the shard stops when the forwarder closes the connection
+    asyncio.run(serve_shard(config=config, shard_index=shard_index))
+
+
+async def serve_shard(config: Config, shard_index: int):
+    tg_bot = TgBotShard(config=config, shard_index=shard_index)
+    await tg_bot.start_bot()
+    await tg_bot.poller.closed.wait()
+    await tg_bot.stop_bot()
+
+
+class TgBotCluster:
+    # main process: polls Telegram and forwards raw updates to the shard processes by chat_id
+    def __init__(self, config: Config):
+        self.config = config
+        self.http_session = TgBotApiSession(
+            connections_limit=config.tg_bot.http_connections_limit,
+            keepalive_timeout=config.tg_bot.http_keepalive_timeout,
+            dns_cache_ttl=config.tg_bot.http_dns_cache_ttl,
+        )
+        self.forwarder = UpdateForwarder(
+            token=config.tg_bot.token,
+            http_session=self.http_session,
+            socket_path=config.tg_bot.socket_path,
+            shards_qty=config.tg_bot.processes_qty,
+        )
+        self._processes: List[Process] = list()
+        self._watch_task: Optional[Task] = None
+
+    async def start_bot(self):
+        await self.http_session.open()
+        await gather(self.forwarder.listen(), self.forwarder.tg_client.set_main_menu())
+
+        context = get_context("spawn")
+        self._processes = [
+            context.Process(target=run_shard_process, args=(self.config, shard_index))
+            for shard_index in range(self.config.tg_bot.processes_qty)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self.forwarder.start()
+        self._watch_task = create_task(self.stop_on_shard_loss())
+
+    async def stop_on_shard_loss(self):
+        # a lost shard would leave its chats unhandled, the cluster is restarted as a whole instead
+        await self.forwarder.shard_lost.wait()
+        await self.stop_bot()
+        get_running_loop().stop()  # run_bot returns
+
+    async def stop_bot(self):
+        if self._watch_task is not None and self._watch_task is not current_task():
+            self._watch_task.cancel()
+        await self.forwarder.stop()
+        await gather(*[to_thread(process.join) for process in self._processes])
+        await self.http_session.close()
@@ -0,0 +1,132 @@
+from asyncio import (
+    CancelledError,
+    Event,
+    StreamReader,
+    StreamWriter,
+    Task,
+    TimeoutError,
+    create_task,
+    gather,
+    sleep,
+    start_unix_server,
+)
+from asyncio.base_events import Server
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import ClientError
+
+from bot.cluster.transport import read_frame, write_frame
+from bot.http_session import TgBotApiSession
+from bot.poller.prefilter import RawUpdateFilter
+from bot.poller.tg_bot_api import ALLOWED_UPDATES, TgBotApiPoller
+from bot.sharding import get_shard_index
+
+
+class UpdateForwarder:
+    def __init__(
+        self,
+        token: str,
+        http_session: TgBotApiSession,
+        socket_path: str,
+        shards_qty: int,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.tg_client: TgBotApiPoller = TgBotApiPoller(token=token, http_session=http_session)
+        self.socket_path = socket_path
+        self.shards_qty = shards_qty
+        self.prefilter = RawUpdateFilter()
+        self.is_running: bool = False
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.shards_connected = Event()
+        self.shard_lost = Event()
+        self._readers: Dict[int, StreamReader] = dict()
+        self._writers: Dict[int, StreamWriter] = dict()
+        self._server: Optional[Server] = None
+        self._task: Optional[Task] = None
+
+    async def listen(self):
+        Path(self.socket_path).unlink(missing_ok=True)
+        self._server = await start_unix_server(self._handle_connection, path=self.socket_path)
+
+    async def _handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        greeting = await read_frame(reader)  # {"shard_index": ...}
+        self._readers[greeting["shard_index"]] = reader
+        self._writers[greeting["shard_index"]] = writer
+
+        if len(self._writers) == self.shards_qty:
+            self.shards_connected.set()
+
+    async def _poll(self):
+        await self.shards_connected.wait()
+
+        offset = 0
+        backoff = self.backoff_base
+        while self.is_running:
+            try:
+                raw_updates: List[dict] = await self.tg_client.get_raw_updates(
+                    offset=offset, timeout=30, limit=100, allowed_updates=ALLOWED_UPDATES
+                )
+            except (ClientError, TimeoutError) as error:
+                print(f"getUpdates has failed: {error!r}, retrying in {backoff} s")
+                await sleep(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+                continue
+            backoff = self.backoff_base
+
+            # the shards have journaled the batch before the request with the new offset confirms it to Telegram
+            try:
+                await self.forward(
+                    raw_updates=[raw_update for raw_update in raw_updates if self.prefilter.is_relevant(raw_update)]
+                )
+            except ConnectionError as error:
+                # the batch is not confirmed to Telegram, the restarted cluster receives it again
+                print(f"{error}, stopping the cluster")
+                self.shard_lost.set()
+                return
+            if raw_updates:
+                offset = raw_updates[-1]["update_id"] + 1
+
+    async def forward(self, raw_updates: List[dict]):
+        shards_updates: Dict[int, List[dict]] = dict()
+        for raw_update in raw_updates:
+            chat_id = self.tg_client.get_raw_update_chat_id(raw_update=raw_update)
+            shards_updates.setdefault(get_shard_index(key=chat_id, shards_qty=self.shards_qty), []).append(raw_update)
+
+        await gather(
+            *[
+                self.forward_to_shard(shard_index=shard_index, raw_updates=shard_updates)
+                for shard_index, shard_updates in shards_updates.items()
+            ]
+        )
+
+    async def forward_to_shard(self, shard_index: int, raw_updates: List[dict]):
+        await write_frame(writer=self._writers[shard_index], payload={"raw_updates": raw_updates})
+        if await read_frame(reader=self._readers[shard_index]) is None:  # {"journaled": ...}
+            raise ConnectionError(f"shard {shard_index} has closed the connection")
+
+    def start(self):
+        self.is_running = True
+        self._task = create_task(self._poll())
+
+    async def stop(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                print("task_forward is cancelled")
+
+        for writer in self._writers.values():  # shards process the received updates and exit
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass  # the shard has already gone
+
+        self._server.close()
+        await self._server.wait_closed()
+        Path(self.socket_path).unlink(missing_ok=True)
@@ -0,0 +1,62 @@
+from asyncio import CancelledError, Event, Queue, Task, create_task, open_unix_connection
+from typing import List, Optional
+
+from bot.cluster.transport import read_frame, write_frame
+from bot.poller.tg_bot_api import TgBotApiPoller
+from bot.poller.update_journal import UpdateJournal
+
+
+class UpdateReceiver:
+    # takes the place of Poller in a shard process: updates come from the forwarder instead of Telegram
+    def __init__(
+        self, socket_path: str, shard_index: int, queue: Queue, update_journal: Optional[UpdateJournal] = None
+    ):
+        self.socket_path = socket_path
+        self.shard_index = shard_index
+        self.queue = queue
+        self.update_journal = update_journal
+        self.is_running: bool = False
+        self.closed = Event()
+        self._task: Optional[Task] = None
+
+    async def _receive(self):
+        reader, writer = await open_unix_connection(path=self.socket_path)
+        await write_frame(writer=writer, payload={"shard_index": self.shard_index})
+
+        while self.is_running:
+            frame = await read_frame(reader=reader)  # {"raw_updates": [...]}
+            if frame is None:
+                break
+
+            raw_updates: List[dict] = frame["raw_updates"]
+            if self.update_journal:
+                # a restarted forwarder gets the updates it has not confirmed to Telegram again
+                raw_updates = [
+                    raw_update for raw_update in raw_updates if raw_update["update_id"] >= self.update_journal.offset
+                ]
+                if raw_updates:
+                    await self.update_journal.append(raw_updates=raw_updates, offset=raw_updates[-1]["update_id"] + 1)
+            await write_frame(writer=writer, payload={"journaled": len(raw_updates)})  # the forwarder may confirm them
+
+            for raw_update in raw_updates:
+                update = TgBotApiPoller.get_update_in_dataclass(raw_update=raw_update)
+                if update is None:  # malformed, nobody will handle it
+                    if self.update_journal:
+                        self.update_journal.ack(update_id=raw_update["update_id"])
+                    continue
+                await self.queue.put(update)
+
+        writer.close()
+        self.closed.set()
+
+    def start(self):
+        self.is_running = True
+        self._task = create_task(self._receive())
+
+    async def stop(self):
+        self.is_running = False
+        self._task.cancel()
+        try:
+            await self._task
+        except CancelledError:
+            print("task_receive is cancelled")
@@ -0,0 +1,22 @@
+import json
+from asyncio import IncompleteReadError, StreamReader, StreamWriter
+from struct import Struct
+from typing import Optional
+
+FRAME_HEADER = Struct("!I")  # payload length
+
+
+async def write_frame(writer: StreamWriter, payload: dict) -> None:
+    data = json.dumps(payload).encode()
+    writer.write(FRAME_HEADER.pack(len(data)) + data)
+    await writer.drain()
+
+
+async def read_frame(reader: StreamReader) -> Optional[dict]:
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        data = await reader.readexactly(FRAME_HEADER.unpack(header)[0])
+    except IncompleteReadError:
+        return None  # the other side has closed the connection
+
+    return json.loads(data)
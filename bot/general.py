@@ -1,7 +1,18 @@
+import os
 from asyncio import Queue, gather
+from typing import Callable, Optional
 
+from bot.http_session import TgBotApiSession
 from bot.poller.poller import Poller
+from bot.poller.tg_bot_api import TgBotApiPoller
+from bot.poller.update_journal import UpdateJournal
+from bot.sender.coalescer import MessageCoalescer
+from bot.sender.outbox import Outbox
+from bot.sender.queue import PriorityMessageQueue
+from bot.sender.scheduler import SendScheduler
 from bot.sender.sender import Sender
+from bot.timer import RoundTimer
+from bot.worker.cache import GameCache
 from bot.worker.worker import Worker
 from config.config import Config
 from database.database import Database
@@ -11,32 +22,96 @@ class TgBot:
     def __init__(self, config: Config):
         self.id = config.tg_bot.id
         self.database = Database(config=config.tg_bot.database)
+        self.game_cache = GameCache(max_size=config.tg_bot.cache_size, ttl=config.tg_bot.cache_ttl)
+        self.http_session = TgBotApiSession(
+            connections_limit=config.tg_bot.http_connections_limit,
+            keepalive_timeout=config.tg_bot.http_keepalive_timeout,
+            dns_cache_ttl=config.tg_bot.http_dns_cache_ttl,
+        )
+        self.journal_dir = config.tg_bot.journal_dir
+        self.outbox = Outbox(path=self.get_journal_path(name="outbox"))
+        self.update_journal = UpdateJournal(path=self.get_journal_path(name="updates"))
         self.update_queue = Queue()
-        self.message_queue = Queue()
-        self.poller = Poller(token=config.tg_bot.token, queue=self.update_queue)
-        self.sender = Sender(token=config.tg_bot.token, queue=self.message_queue)
+        self.round_timer = RoundTimer()
+        self.message_queue = PriorityMessageQueue()
+        self.poller = Poller(
+            token=config.tg_bot.token,
+            queue=self.update_queue,
+            http_session=self.http_session,
+            update_journal=self.update_journal,
+        )
+        self.sender = Sender(
+            token=config.tg_bot.token,
+            queue=self.message_queue,
+            http_session=self.http_session,
+            senders_qty=config.tg_bot.senders_qty,
+            scheduler=SendScheduler(
+                global_rate=self.get_global_rate_limit(config=config),
+                group_rate_per_minute=config.tg_bot.group_rate_limit,
+            ),
+            coalescer=MessageCoalescer(merge_window=config.tg_bot.coalesce_window),
+            outbox=self.outbox,
+        )
         self.worker = Worker(
             database=self.database,
+            game_cache=self.game_cache,
             sender=self.sender,
             bot_id=self.id,
             update_queue=self.update_queue,
             message_queue=self.message_queue,
             workers_qty=config.tg_bot.workers_qty,
+            update_journal=self.update_journal,
+            batch_size=config.tg_bot.worker_batch_size,
+            batch_wait=config.tg_bot.worker_batch_wait,
+            round_timer=self.round_timer,
+            round_timeout=config.tg_bot.round_timeout,
         )
 
     async def start_bot(self):
+        await self.http_session.open()
         await gather(
             self.database.connect(),
             self.poller.tg_client.set_main_menu(),
         )
+        await gather(
+            self.worker.accessor.warm_up_cache(),
+            self.open_outbox(),
+            self.open_update_journal(),
+            self.recover_round_timers(),
+        )
         self.poller.start()
         self.worker.start()
+        self.round_timer.start(on_expire=self.worker.put_round_timeout)
         self.sender.start()
 
     async def stop_bot(self):
+        await self.round_timer.stop()
         await gather(
             self.poller.stop(),
             self.worker.stop(),
             self.sender.stop(),
             self.database.disconnect(),
         )
+        await gather(self.outbox.close(), self.update_journal.close(), self.http_session.close())
+
+    async def open_outbox(self):
+        for message in await self.outbox.open():  # not sent before the restart
+            self.message_queue.put_nowait(message)
+        self.message_queue.outbox = self.outbox
+
+    async def open_update_journal(self):
+        for raw_update in await self.update_journal.open():  # not handled before the restart
+            self.update_queue.put_nowait(TgBotApiPoller.get_update_in_dataclass(raw_update))
+
+    async def recover_round_timers(self, is_own_chat: Optional[Callable[[int], bool]] = None):
+        # deadlines passed during the downtime expire right after the start
+        for chat_id, current_round, round_deadline in await self.worker.accessor.get_round_deadlines(
+            is_own_chat=is_own_chat
+        ):
+            self.round_timer.schedule(chat_id=chat_id, current_round=current_round, deadline=round_deadline)
+
+    def get_global_rate_limit(self, config: Config) -> float:
+        return config.tg_bot.global_rate_limit
+
+    def get_journal_path(self, name: str) -> str:
+        return os.path.join(self.journal_dir, f"{name}.journal")
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from aiohttp import ClientSession, TCPConnector, TraceConfig
+
+
+@dataclass
+class HttpStatistics:
+    requests: int
+    connections_created: int
+    connections_reused: int
+
+
+class TgBotApiSession:
+    # one keep-alive session for all Telegram Bot API calls of the process
+    def __init__(self, connections_limit: int = 100, keepalive_timeout: float = 60.0, dns_cache_ttl: int = 300):
+        self.connections_limit = connections_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.requests: int = 0
+        self.connections_created: int = 0
+        self.connections_reused: int = 0
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def client_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:  # opened lazily inside the running event loop
+            connector = TCPConnector(
+                limit=self.connections_limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = ClientSession(connector=connector, trace_configs=[self.get_trace_config()])
+        return self._session
+
+    async def open(self) -> None:
+        _ = self.client_session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def get_trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        return trace_config
+
+    async def _on_request_start(self, *_: list) -> None:
+        self.requests += 1
+
+    async def _on_connection_create_end(self, *_: list) -> None:
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, *_: list) -> None:
+        self.connections_reused += 1
+
+    @property
+    def statistics(self) -> HttpStatistics:
+        return HttpStatistics(
+            requests=self.requests,
+            connections_created=self.connections_created,
+            connections_reused=self.connections_reused,
+        )
@@ -0,0 +1,201 @@
+import json
+import os
+from asyncio import CancelledError, Event, Future, Task, create_task, get_running_loop, to_thread
+from collections import OrderedDict
+from dataclasses import dataclass
+from struct import Struct
+from struct import error as StructError
+from time import perf_counter
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+RECORD_HEADER = Struct("!I")  # payload length
+
+
+@dataclass
+class JournalStatistics:
+    pending: int  # entries not acknowledged yet
+    records: int
+    commits: int  # fsync calls, one per batch of records
+    commit_time: float
+    compactions: int
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.records / self.commits if self.commits else 0.0
+
+
+class Journal:
+    # append-only file of entries and their acknowledgements, records of concurrent appends share one fsync
+    def __init__(self, path: str, compact_threshold: int = 10000):
+        self.path = path
+        self.compact_threshold = compact_threshold  # acknowledged entries in the file before it is rewritten
+        self.pending: OrderedDict[str, dict] = OrderedDict()  # key -> entry
+        self.state: dict = dict()  # small values kept next to the entries, e.g. a position in a stream
+        self.records: int = 0
+        self.commits: int = 0
+        self.commit_time: float = 0.0
+        self.compactions: int = 0
+        self._acked: int = 0
+        self._file: Optional[BinaryIO] = None
+        self._buffer: List[bytes] = list()
+        self._waiters: List[Future] = list()
+        self._has_records = Event()
+        self._task: Optional[Task] = None
+
+    async def open(self) -> None:
+        await to_thread(self._open)
+        self._task = create_task(self._commit())
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        valid_size = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                for valid_size, record in self.read_records(data=file.read()):
+                    if "ack" in record:
+                        self.pending.pop(record["ack"], None)
+                        self._acked += 1
+                    elif "state" in record:
+                        self.state.update(record["state"])
+                    else:
+                        self.pending[record["key"]] = record["entry"]
+
+        self._file = open(self.path, "ab")
+        self._file.truncate(valid_size)  # a record torn by a crash is dropped
+
+    @staticmethod
+    def read_records(data: bytes) -> Iterator[Tuple[int, dict]]:
+        # (offset after the record, record) for every complete record
+        offset = 0
+        while True:
+            try:
+                (length,) = RECORD_HEADER.unpack_from(data, offset)
+            except StructError:
+                return
+
+            end = offset + RECORD_HEADER.size + length
+            if end > len(data):
+                return
+            try:
+                record = json.loads(data[offset + RECORD_HEADER.size : end])
+            except ValueError:
+                return
+
+            offset = end
+            yield offset, record
+
+    async def append(self, key: str, entry: dict) -> None:
+        await self.append_many(entries={key: entry})
+
+    async def append_many(self, entries: Dict[str, dict]) -> None:
+        # returns when the entries are on disk
+        for key, entry in entries.items():
+            self.pending[key] = entry
+            self._write_record(record={"key": key, "entry": entry})
+        await self._wait_commit()
+
+    def update_state(self, **values) -> None:
+        # committed with the next batch of entries
+        self.state.update(values)
+        self._write_record(record={"state": values})
+
+    def ack(self, key: str) -> None:
+        # not waited for: a lost acknowledgement only repeats the entry on replay
+        if self.pending.pop(key, None) is None:
+            return
+        self._write_record(record={"ack": key})
+        self._acked += 1
+
+    async def flush(self) -> None:
+        # waits for the commit in progress as well
+        self._has_records.set()
+        await self._wait_commit()
+
+    def _write_record(self, record: dict) -> None:
+        data = json.dumps(record).encode()
+        self._buffer.append(RECORD_HEADER.pack(len(data)) + data)
+        self._has_records.set()
+
+    async def _wait_commit(self) -> None:
+        waiter = get_running_loop().create_future()
+        self._waiters.append(waiter)
+        await waiter
+
+    async def _commit(self):
+        while True:
+            await self._has_records.wait()
+            self._has_records.clear()
+            buffer, self._buffer = self._buffer, list()
+            waiters, self._waiters = self._waiters, list()
+
+            started_at = perf_counter()
+            try:
+                await to_thread(self._write, b"".join(buffer))
+            except OSError as error:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(error)
+                continue
+
+            self.records += len(buffer)
+            self.commits += 1
+            self.commit_time += perf_counter() - started_at
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+            if self._acked >= self.compact_threshold:
+                try:
+                    await to_thread(self._compact, dict(self.pending), dict(self.state))
+                except OSError as error:
+                    print(f"journal {self.path} is not compacted: {error}")
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _compact(self, pending: Dict[str, dict], state: dict) -> None:
+        # the file is rewritten with the state and the pending entries only
+        compacted_path = f"{self.path}.compact"
+        records = [{"state": state}] if state else list()
+        records.extend({"key": key, "entry": entry} for key, entry in pending.items())
+        with open(compacted_path, "wb") as file:
+            for record in records:
+                data = json.dumps(record).encode()
+                file.write(RECORD_HEADER.pack(len(data)) + data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self._file.close()
+        os.replace(compacted_path, self.path)
+        self._file = open(self.path, "ab")
+        self._acked = 0
+        self.compactions += 1
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except CancelledError:
+            print("task_commit is cancelled")
+        self._task = None
+
+        await to_thread(self._compact, dict(self.pending), dict(self.state))
+        self._file.close()
+        self._file = None
+
+    @property
+    def statistics(self) -> JournalStatistics:
+        return JournalStatistics(
+            pending=len(self.pending),
+            records=self.records,
+            commits=self.commits,
+            commit_time=self.commit_time,
+            compactions=self.compactions,
+        )
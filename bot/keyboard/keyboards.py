@@ -1,5 +1,6 @@
 from bot.keyboard.lexicon_ru import LEXICON_RU
 from bot.sender.dataclasses import InlineKeyboardButton, InlineKeyboardMarkup
+from bot.sender.keyboard_registry import keyboard_registry
 
 START_REGISTRATION_CALLBACK = "start_registration_button"
 STATISTICS_CALLBACK = "statistics_button"
@@ -11,6 +12,9 @@ SECOND_PHOTO_CALLBACK = "second_photo_button"
 FINISH_ROUND_CALLBACK = "finish_round_button"
 NEXT_ROUND_CALLBACK = "next_round_button"
 EXIT_CALLBACK = "exit_button"
+PLAY_BRACKET_CALLBACK = "play_bracket_button"
+BRACKET_VOTE_CALLBACK = "bracket_vote_button"  # the callback data carries the candidate: bracket_vote_button:<user_id>
+CALLBACK_DATA_SEPARATOR = ":"
 
 START_REGISTRATION_BUTTON = InlineKeyboardButton(
     text=LEXICON_RU["start_registration_button"],
@@ -30,6 +34,7 @@ SECOND_PHOTO_BUTTON = InlineKeyboardButton(text=LEXICON_RU["second_photo_button"
 FINISH_ROUND_BUTTON = InlineKeyboardButton(text=LEXICON_RU["finish_round_button"], callback_data="finish_round_button")
 NEXT_ROUND_BUTTON = InlineKeyboardButton(text=LEXICON_RU["next_round_button"], callback_data="next_round_button")
 EXIT_BUTTON = InlineKeyboardButton(text=LEXICON_RU["exit_button"], callback_data="exit_button")
+PLAY_BRACKET_BUTTON = InlineKeyboardButton(text=LEXICON_RU["play_bracket_button"], callback_data="play_bracket_button")
 
 BEGINNING_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[START_REGISTRATION_BUTTON], [STATISTICS_BUTTON]])
 REGISTRATION_KEYBOARD = InlineKeyboardMarkup(
@@ -39,9 +44,36 @@ REGISTRATION_KEYBOARD = InlineKeyboardMarkup(
         [EXIT_BUTTON],
     ]
 )
-GAMEPLAY_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[PLAY_ROUND_BUTTON], [EXIT_BUTTON]])
+GAMEPLAY_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[PLAY_ROUND_BUTTON], [PLAY_BRACKET_BUTTON], [EXIT_BUTTON]])
 FIRST_PHOTO_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[FIRST_PHOTO_BUTTON]])
 SECOND_PHOTO_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[SECOND_PHOTO_BUTTON]])
 FINISH_ROUND_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[FINISH_ROUND_BUTTON]])
 NEXT_ROUND_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[NEXT_ROUND_BUTTON], [EXIT_BUTTON]])
 FINISH_GAME_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[[EXIT_BUTTON]])
+
+
+def build_bracket_vote_keyboard(user_id: int) -> InlineKeyboardMarkup:
+    callback_data = f"{BRACKET_VOTE_CALLBACK}{CALLBACK_DATA_SEPARATOR}{user_id}"
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text=LEXICON_RU["bracket_vote_button"], callback_data=callback_data)]]
+    )
+
+
+def get_callback_name(callback_data: str) -> str:
+    return callback_data.partition(CALLBACK_DATA_SEPARATOR)[0]
+
+
+def get_callback_argument(callback_data: str) -> str:
+    return callback_data.partition(CALLBACK_DATA_SEPARATOR)[2]
+
+
+keyboard_registry.register(
+    BEGINNING_KEYBOARD,
+    REGISTRATION_KEYBOARD,
+    GAMEPLAY_KEYBOARD,
+    FIRST_PHOTO_KEYBOARD,
+    SECOND_PHOTO_KEYBOARD,
+    FINISH_ROUND_KEYBOARD,
+    NEXT_ROUND_KEYBOARD,
+    FINISH_GAME_KEYBOARD,
+)
@@ -33,6 +33,13 @@ LEXICON_RU: dict[str, str] = {
     "finish_round_button": "Завершить раунд ⛔",
     "next_round_button": "Следующий раунд ⏩",
     "exit_button": "Выйти из игры 🚪",
+    "play_bracket_button": "Турнирный раунд: все пары сразу 🏟",
+    "bracket_vote_button": "Голосую 👍",
+    "bracket_round": "Турнирный раунд запущен! ⚔️\n\nМатчей в раунде: {matches_num}. "
+    "Голосуем в каждом матче - по одному голосу на матч!",
+    "bracket_match": "Матч {match_num}: @{username}",
+    "bracket_bye": "@{username} проходит в следующий раунд без соперника 🍀",
+    "bracket_results": "Турнирный раунд завершен! ✅\n\nВ следующий раунд проходят: {winners}",
     "help": "<b>Правила игры:</b>\n\nВаш текущий аватар должен победить среди аватаров других игроков! 💪\n\n"
     "Игра проводится в несколько раундов - в зависимости от количества участников. "
     "Количество игроков обязательно должно быть четным. Для участия в конкурсе необходимо "
@@ -41,6 +48,8 @@ LEXICON_RU: dict[str, str] = {
     "понравившийся аватар. Голосовать могут только <i>зарегистрированные</i> участники. "
     "По итогам каждого раунда определяется победитель, который продолжает участие в конкурсе. "
     "Проигравший участник выбывает. В случае ничьи оба игрока продолжают свое участие. "
+    "В <i>турнирном раунде</i> все участники сразу разбиваются на пары, матчи идут одновременно, "
+    "а ничья в матче решается жребием. "
     "Игра продолжается до тех пор, пока не останется один победитель - всей игры!\n\n"
     "<b>Удачи в конкурсе! 😉</b>",
     "user_register_answer": "Игрок @{username} зарегистрирован!",
@@ -1,24 +1,26 @@
 import decimal
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
-from sqlalchemy import BIGINT, Boolean, Column, ForeignKey, Integer, Numeric, String
+from sqlalchemy import BIGINT, Boolean, Column, DateTime, ForeignKey, Integer, Numeric, String
 from sqlalchemy.orm import relationship
 
 from bot.worker.fsm import BEGINNING_STATE
+from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
 from database.sqlalchemy_base import db
 
 
-@dataclass
+@dataclass(slots=True)
 class Account:
     user_id: int
     game_id: int
     vote: bool
     scores: int
     photo_num: str
+    match_num: int = 0  # bracket match of the current round, 0 if the player has none
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     id: int
     username: str
@@ -37,6 +39,99 @@ class Game:
     current_round: int
     players: List[Optional[User]]
     accounts: List[Optional[Account]]
+    # indexes over the lists, kept in sync by the methods below
+    players_by_id: Dict[int, User] = field(init=False, repr=False, compare=False)
+    accounts_by_user_id: Dict[int, Account] = field(init=False, repr=False, compare=False)
+    photo_accounts: Dict[str, Account] = field(init=False, repr=False, compare=False)  # photo_num -> round player
+    match_accounts: Dict[int, List[Account]] = field(init=False, repr=False, compare=False)  # bracket match -> pair
+    voted_num: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.reindex()
+
+    def reindex(self) -> None:
+        self.players_by_id = {player.id: player for player in self.players}
+        self.accounts_by_user_id = {account.user_id: account for account in self.accounts}
+        self.photo_accounts = {
+            account.photo_num: account for account in self.accounts if account.photo_num in (FIRST_PHOTO, SECOND_PHOTO)
+        }
+        self.match_accounts = dict()
+        for account in self.accounts:
+            if account.match_num:
+                self.match_accounts.setdefault(account.match_num, []).append(account)
+        self.voted_num = sum(account.vote for account in self.accounts)
+
+    def add_player(self, user: User, account: Account) -> None:
+        self.players.append(user)
+        self.accounts.append(account)
+        self.players_by_id[user.id] = user
+        self.accounts_by_user_id[account.user_id] = account
+        if account.photo_num in (FIRST_PHOTO, SECOND_PHOTO):
+            self.photo_accounts[account.photo_num] = account
+        if account.match_num:
+            self.match_accounts.setdefault(account.match_num, []).append(account)
+        self.voted_num += account.vote
+
+    def remove_player(self, user_id: int) -> None:
+        self.players = [player for player in self.players if player.id != user_id]
+        self.accounts = [account for account in self.accounts if account.user_id != user_id]
+        self.players_by_id.pop(user_id, None)
+        account = self.accounts_by_user_id.pop(user_id, None)
+        if account is None:
+            return
+        if self.photo_accounts.get(account.photo_num) is account:
+            del self.photo_accounts[account.photo_num]
+        if account.match_num:
+            self.remove_match_account(account=account)
+        self.voted_num -= account.vote
+
+    def clear_players(self) -> None:
+        self.players, self.accounts = [], []
+        self.reindex()
+
+    def set_photo_num(self, user_id: int, photo_num: str) -> None:
+        account = self.accounts_by_user_id.get(user_id)
+        if account is None:
+            return
+        if self.photo_accounts.get(account.photo_num) is account:
+            del self.photo_accounts[account.photo_num]
+        account.photo_num = photo_num
+        if photo_num in (FIRST_PHOTO, SECOND_PHOTO):
+            self.photo_accounts[photo_num] = account
+
+    def set_match_num(self, user_id: int, match_num: int) -> None:
+        account = self.accounts_by_user_id.get(user_id)
+        if account is None:
+            return
+        if account.match_num:
+            self.remove_match_account(account=account)
+        account.match_num = match_num
+        if match_num:
+            self.match_accounts.setdefault(match_num, []).append(account)
+
+    def remove_match_account(self, account: Account) -> None:
+        match_accounts = self.match_accounts[account.match_num]
+        match_accounts.remove(account)
+        if not match_accounts:  # the keys are the matches of the round
+            del self.match_accounts[account.match_num]
+
+    def set_vote(self, user_id: int) -> None:
+        account = self.accounts_by_user_id.get(user_id)
+        if account and not account.vote:
+            account.vote = True
+            self.voted_num += 1
+
+    def reset_accounts(self) -> None:
+        for account in self.accounts:
+            account.vote, account.scores, account.photo_num, account.match_num = False, 0, "no", 0
+        self.photo_accounts, self.match_accounts, self.voted_num = {}, {}, 0
+
+
+@dataclass
+class GameState:  # the game without players and accounts
+    chat_id: int
+    bot_state: str
+    current_round: int
 
 
 class AccountModel(db):
@@ -47,6 +142,7 @@ class AccountModel(db):
     vote = Column(Boolean, default=False, nullable=False)
     scores = Column(Integer, default=0, nullable=False)
     photo_num = Column(String, default="no", nullable=False)
+    match_num = Column(Integer, default=0, nullable=False)  # bracket match of the current round
 
     def __repr__(self):
         return f"AccountModel(user_id={self.user_id}, game_id={self.game_id})"
@@ -59,6 +155,7 @@ class AccountModel(db):
             vote=self.vote,
             scores=self.scores,
             photo_num=self.photo_num,
+            match_num=self.match_num,
         )
 
 
@@ -99,6 +196,8 @@ class GameModel(db):
     chat_id = Column(BIGINT, primary_key=True, unique=True, autoincrement=False)
     bot_state = Column(String, default=BEGINNING_STATE, nullable=False)
     current_round = Column(Integer, default=1, nullable=False)
+    votes_num = Column(Integer, default=0, nullable=False)  # votes of the current round
+    round_deadline = Column(DateTime(timezone=True))  # when the current round is closed automatically
 
     players = relationship("UserModel", secondary="accounts", back_populates="games")
 
@@ -115,6 +214,17 @@ class GameModel(db):
         )
 
 
+class VoteModel(db):
+    __tablename__ = "votes"  # votes of the current bracket round, one per voter and match
+
+    game_id = Column(ForeignKey("games.chat_id"), primary_key=True)
+    voter_id = Column(ForeignKey("users.id"), primary_key=True)
+    match_num = Column(Integer, primary_key=True)
+
+    def __repr__(self):
+        return f"VoteModel(game_id={self.game_id}, voter_id={self.voter_id}, match_num={self.match_num})"
+
+
 class AdminModel(db):
     __tablename__ = "admins"
 
@@ -90,3 +90,27 @@ class BotCommand:
 
 
 bot_command_schema = class_schema(BotCommand)()
+
+
+@dataclass
+class PollerStatistics:
+    batches: int  # getUpdates responses
+    updates: int
+    max_batch_size: int
+    total_poll_gap: float  # time between a response and the next request
+    max_poll_gap: float
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.updates / self.batches if self.batches else 0.0
+
+    @property
+    def average_poll_gap(self) -> float:
+        polls = self.batches - 1  # the first request has no gap
+        return self.total_poll_gap / polls if polls > 0 else 0.0
+
+
+@dataclass
+class PrefilterStatistics:
+    passed: int
+    dropped: int  # raw updates without a handler, never decoded
@@ -0,0 +1,92 @@
+from typing import Callable, Dict, Optional
+
+from bot.poller.dataclasses import (
+    BasicUpdate,
+    CallbackQuery,
+    Chat,
+    Message,
+    MessageFrom,
+    MyChatMember,
+    NewChatMember,
+    UpdateObjCallback,
+    UpdateObjMessage,
+    UpdateObjMyChatMember,
+)
+
+# builds the same dataclasses as their schemas, without marshmallow validation: Telegram sends well-typed json
+
+
+def decode_user(raw_user: dict) -> MessageFrom:
+    return MessageFrom(
+        id=raw_user["id"],
+        first_name=raw_user["first_name"],
+        last_name=raw_user.get("last_name"),
+        username=raw_user.get("username"),
+    )
+
+
+def decode_chat(raw_chat: dict) -> Chat:
+    return Chat(
+        id=raw_chat["id"],
+        type=raw_chat["type"],
+        title=raw_chat.get("title"),
+        username=raw_chat.get("username"),
+        first_name=raw_chat.get("first_name"),
+        last_name=raw_chat.get("last_name"),
+    )
+
+
+def decode_message(raw_message: dict) -> Message:
+    return Message(
+        message_id=raw_message["message_id"],
+        from_=decode_user(raw_message["from"]),
+        chat=decode_chat(raw_message["chat"]),
+        text=raw_message.get("text"),
+    )
+
+
+def decode_message_update(raw_update: dict) -> UpdateObjMessage:
+    return UpdateObjMessage(update_id=raw_update["update_id"], message=decode_message(raw_update["message"]))
+
+
+def decode_callback_update(raw_update: dict) -> UpdateObjCallback:
+    raw_callback_query = raw_update["callback_query"]
+    callback_query = CallbackQuery(
+        id=raw_callback_query["id"],
+        from_=decode_user(raw_callback_query["from"]),
+        message=decode_message(raw_callback_query["message"]),
+        data=raw_callback_query["data"],
+    )
+    return UpdateObjCallback(update_id=raw_update["update_id"], callback_query=callback_query)
+
+
+def decode_my_chat_member_update(raw_update: dict) -> UpdateObjMyChatMember:
+    raw_my_chat_member = raw_update["my_chat_member"]
+    raw_new_chat_member = raw_my_chat_member["new_chat_member"]
+    my_chat_member = MyChatMember(
+        chat=decode_chat(raw_my_chat_member["chat"]),
+        from_=decode_user(raw_my_chat_member["from"]),
+        new_chat_member=NewChatMember(
+            user=decode_user(raw_new_chat_member["user"]),
+            status=raw_new_chat_member["status"],
+        ),
+    )
+    return UpdateObjMyChatMember(update_id=raw_update["update_id"], my_chat_member=my_chat_member)
+
+
+UPDATE_DECODERS: Dict[str, Callable[[dict], BasicUpdate]] = {
+    "message": decode_message_update,
+    "callback_query": decode_callback_update,
+    "my_chat_member": decode_my_chat_member_update,
+}
+
+
+def decode_update(raw_update: dict) -> Optional[BasicUpdate]:
+    # None for the update types the bot doesn't handle and for updates without the required fields
+    for update_type, decoder in UPDATE_DECODERS.items():
+        if update_type in raw_update:
+            try:
+                return decoder(raw_update)
+            except (KeyError, TypeError):
+                return None
+    return None
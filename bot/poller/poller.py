@@ -1,34 +1,98 @@
-from asyncio import CancelledError, Queue, Task, create_task
+from asyncio import CancelledError, Queue, Task, create_task, sleep
+from time import perf_counter
 from typing import List, Optional
 
-from bot.poller.dataclasses import BasicUpdate
-from bot.poller.tg_bot_api import TgBotApiPoller
+from bot.http_session import TgBotApiSession
+from bot.poller.dataclasses import BasicUpdate, PollerStatistics
+from bot.poller.prefilter import RawUpdateFilter
+from bot.poller.tg_bot_api import ALLOWED_UPDATES, TgBotApiPoller
+from bot.poller.update_journal import UpdateJournal
 
 
 class Poller:
-    def __init__(self, token: str, queue: Queue):
-        self.tg_client: TgBotApiPoller = TgBotApiPoller(token=token)
+    def __init__(
+        self,
+        token: str,
+        queue: Queue,
+        http_session: TgBotApiSession,
+        update_journal: Optional[UpdateJournal] = None,
+        limit: int = 100,
+    ):
+        self.tg_client: TgBotApiPoller = TgBotApiPoller(token=token, http_session=http_session)
         self.queue = queue
+        self.update_journal = update_journal
+        self.prefilter = RawUpdateFilter()
+        self.limit = limit  # updates per getUpdates, 1-100
         self.is_running: bool = False
+        self.batches: int = 0
+        self.updates: int = 0
+        self.max_batch_size: int = 0
+        self.total_poll_gap: float = 0.0
+        self.max_poll_gap: float = 0.0
+        self._received_at: Optional[float] = None
         self._task: Optional[Task] = None
+        self._fetch_task: Optional[Task] = None
 
     async def _poll(self):
-        offset = 0
+        offset = self.update_journal.offset if self.update_journal else 0
+        self._fetch_task = create_task(self._fetch(offset=offset))
         while self.is_running:
-            updates: List[Optional[BasicUpdate]] = await self.tg_client.get_updates(offset=offset, timeout=30)
+            raw_updates = await self._fetch_task
+            if raw_updates:
+                offset = raw_updates[-1]["update_id"] + 1
+                raw_updates = [raw_update for raw_update in raw_updates if self.prefilter.is_relevant(raw_update)]
+                if self.update_journal:  # on disk before the request with the new offset confirms them to Telegram
+                    await self.update_journal.append(raw_updates=raw_updates, offset=offset)
 
-            for update in updates:
-                offset = update.update_id + 1
+            # the next long poll is in flight while this batch is decoded and queued
+            self._fetch_task = create_task(self._fetch(offset=offset))
+            await sleep(0)
+
+            for raw_update in raw_updates:
+                update: Optional[BasicUpdate] = self.tg_client.get_update_in_dataclass(raw_update)
+                if update is None:  # malformed, nobody will handle it
+                    if self.update_journal:
+                        self.update_journal.ack(update_id=raw_update["update_id"])
+                    continue
                 await self.queue.put(update)
 
+    async def _fetch(self, offset: int) -> List[dict]:
+        if self._received_at is not None:
+            poll_gap = perf_counter() - self._received_at
+            self.total_poll_gap += poll_gap
+            self.max_poll_gap = max(self.max_poll_gap, poll_gap)
+
+        raw_updates = await self.tg_client.get_raw_updates(
+            offset=offset, timeout=30, limit=self.limit, allowed_updates=ALLOWED_UPDATES
+        )
+        self._received_at = perf_counter()
+
+        self.batches += 1
+        self.updates += len(raw_updates)
+        self.max_batch_size = max(self.max_batch_size, len(raw_updates))
+        return raw_updates
+
+    @property
+    def statistics(self) -> PollerStatistics:
+        return PollerStatistics(
+            batches=self.batches,
+            updates=self.updates,
+            max_batch_size=self.max_batch_size,
+            total_poll_gap=self.total_poll_gap,
+            max_poll_gap=self.max_poll_gap,
+        )
+
     def start(self):
         self.is_running = True
         self._task = create_task(self._poll())
 
     async def stop(self):
         self.is_running = False
-        self._task.cancel()
-        try:
-            await self._task
-        except CancelledError:
-            print("task_poll is cancelled")
+        for task in (self._task, self._fetch_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except CancelledError:
+                print("task_poll is cancelled")
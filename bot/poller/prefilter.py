@@ -0,0 +1,70 @@
+from bot.keyboard.keyboards import (
+    BRACKET_VOTE_CALLBACK,
+    EXIT_CALLBACK,
+    FINISH_REGISTRATION_CALLBACK,
+    FINISH_ROUND_CALLBACK,
+    FIRST_PHOTO_CALLBACK,
+    NEXT_ROUND_CALLBACK,
+    PLAY_BRACKET_CALLBACK,
+    PLAY_ROUND_CALLBACK,
+    SECOND_PHOTO_CALLBACK,
+    START_REGISTRATION_CALLBACK,
+    STATISTICS_CALLBACK,
+    USER_REGISTER_CALLBACK,
+    get_callback_name,
+)
+from bot.keyboard.menu import HELP_COMMAND, START_COMMAND
+from bot.poller.dataclasses import PrefilterStatistics
+from bot.worker.status import STATUS_LEFT, STATUS_MEMBER
+
+# the same checks as in FilterUpdate.filter_incoming_update, so a dropped update would have had no handler
+COMMANDS = (START_COMMAND.command, HELP_COMMAND.command)
+CALLBACKS = frozenset(
+    (
+        START_REGISTRATION_CALLBACK,
+        STATISTICS_CALLBACK,
+        USER_REGISTER_CALLBACK,
+        FINISH_REGISTRATION_CALLBACK,
+        PLAY_ROUND_CALLBACK,
+        FIRST_PHOTO_CALLBACK,
+        SECOND_PHOTO_CALLBACK,
+        FINISH_ROUND_CALLBACK,
+        NEXT_ROUND_CALLBACK,
+        EXIT_CALLBACK,
+        PLAY_BRACKET_CALLBACK,
+        BRACKET_VOTE_CALLBACK,
+    )
+)
+STATUSES = frozenset((STATUS_MEMBER, STATUS_LEFT))
+
+
+class RawUpdateFilter:
+    def __init__(self):
+        self.passed: int = 0
+        self.dropped: int = 0
+
+    def is_relevant(self, raw_update: dict) -> bool:
+        is_relevant = self.has_handler(raw_update=raw_update)
+        if is_relevant:
+            self.passed += 1
+        else:
+            self.dropped += 1
+        return is_relevant
+
+    @staticmethod
+    def has_handler(raw_update: dict) -> bool:
+        if "message" in raw_update:
+            text = raw_update["message"].get("text")
+            return text is not None and any(command in text for command in COMMANDS)
+
+        if "callback_query" in raw_update:
+            return get_callback_name(callback_data=raw_update["callback_query"].get("data") or "") in CALLBACKS
+
+        if "my_chat_member" in raw_update:
+            return raw_update["my_chat_member"].get("new_chat_member", {}).get("status") in STATUSES
+
+        return False
+
+    @property
+    def statistics(self) -> PrefilterStatistics:
+        return PrefilterStatistics(passed=self.passed, dropped=self.dropped)
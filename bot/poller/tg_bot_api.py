@@ -1,21 +1,18 @@
 import json
 from typing import List, Optional
 
-from aiohttp import ClientSession
-
+from bot.http_session import TgBotApiSession
 from bot.keyboard.menu import HELP_COMMAND, START_COMMAND
-from bot.poller.dataclasses import (
-    BasicUpdate,
-    UpdateObjCallback,
-    UpdateObjMessage,
-    UpdateObjMyChatMember,
-    bot_command_schema,
-)
+from bot.poller.dataclasses import BasicUpdate, bot_command_schema
+from bot.poller.decoder import decode_update
+
+ALLOWED_UPDATES = ["message", "callback_query", "my_chat_member"]  # the updates the worker handles
 
 
 class TgBotApiPoller:
-    def __init__(self, token: str = ""):
+    def __init__(self, token: str = "", http_session: Optional[TgBotApiSession] = None):
         self._token = token
+        self.http_session = http_session if http_session is not None else TgBotApiSession()
 
     def get_request_url(self, method: str) -> str:
         return f"https://api.telegram.org/bot{self._token}/{method}"
@@ -26,11 +23,20 @@ class TgBotApiPoller:
         commands_json = json.dumps([bot_command_schema.dump(command) for command in commands])
         params = {"commands": commands_json}
 
-        async with ClientSession() as session:
-            async with session.post(url=request_url, params=params) as response:
-                return await response.json()
+        async with self.http_session.client_session.post(url=request_url, params=params) as response:
+            return await response.json()
 
     async def get_updates(self, offset: int = None, timeout: int = 30) -> List[Optional[BasicUpdate]]:
+        raw_updates = await self.get_raw_updates(offset=offset, timeout=timeout)
+        return [self.get_update_in_dataclass(raw_update) for raw_update in raw_updates]
+
+    async def get_raw_updates(
+        self,
+        offset: int = None,
+        timeout: int = 30,
+        limit: Optional[int] = None,
+        allowed_updates: Optional[List[str]] = None,
+    ) -> List[dict]:
         request_url = self.get_request_url(method="getUpdates")
         params = dict()
 
@@ -38,18 +44,26 @@ class TgBotApiPoller:
             params["offset"] = offset
         if timeout:
             params["timeout"] = timeout
+        if limit:
+            params["limit"] = limit
+        if allowed_updates is not None:
+            params["allowed_updates"] = json.dumps(allowed_updates)
 
-        async with ClientSession() as session:
-            async with session.get(url=request_url, params=params) as response:
-                raw_response = await response.json()
-                return [self.get_update_in_dataclass(raw_update) for raw_update in raw_response.get("result", [])]
+        async with self.http_session.client_session.get(url=request_url, params=params) as response:
+            raw_response = await response.json()
+            return raw_response.get("result", [])
 
     @staticmethod
-    def get_update_in_dataclass(raw_update: dict) -> BasicUpdate:
-        match tuple(raw_update.keys()):
-            case _, "message":
-                return UpdateObjMessage.Schema().load(raw_update)
-            case _, "callback_query":
-                return UpdateObjCallback.Schema().load(raw_update)
-            case _, "my_chat_member":
-                return UpdateObjMyChatMember.Schema().load(raw_update)
+    def get_update_in_dataclass(raw_update: dict) -> Optional[BasicUpdate]:
+        return decode_update(raw_update=raw_update)
+
+    @staticmethod
+    def get_raw_update_chat_id(raw_update: dict) -> Optional[int]:
+        if "my_chat_member" in raw_update:
+            return raw_update["my_chat_member"]["chat"]["id"]
+
+        if "callback_query" in raw_update:
+            return raw_update["callback_query"]["message"]["chat"]["id"]
+
+        if "message" in raw_update:
+            return raw_update["message"]["chat"]["id"]
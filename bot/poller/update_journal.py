@@ -0,0 +1,32 @@
+from typing import List
+
+from bot.journal import Journal, JournalStatistics
+
+
+class UpdateJournal:
+    # updates are on disk before the next getUpdates confirms them to Telegram and acknowledged once handled
+    def __init__(self, path: str):
+        self.journal = Journal(path=path)
+
+    async def open(self) -> List[dict]:
+        # raw updates which were not handled before the restart
+        await self.journal.open()
+        return list(self.journal.pending.values())
+
+    @property
+    def offset(self) -> int:
+        return self.journal.state.get("offset", 0)
+
+    async def append(self, raw_updates: List[dict], offset: int) -> None:
+        self.journal.update_state(offset=offset)
+        await self.journal.append_many(entries={str(raw_update["update_id"]): raw_update for raw_update in raw_updates})
+
+    def ack(self, update_id: int) -> None:
+        self.journal.ack(key=str(update_id))
+
+    async def close(self) -> None:
+        await self.journal.close()
+
+    @property
+    def statistics(self) -> JournalStatistics:
+        return self.journal.statistics
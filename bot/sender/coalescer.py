@@ -0,0 +1,67 @@
+from time import monotonic
+from typing import Iterable, Tuple
+
+from bot.sender.dataclasses import BasicMessage, CoalescerStatistics, EditMessageTextObj, SendMessageObj
+
+MESSAGE_TEXT_LIMIT = 4096  # Telegram limit for one message
+MERGED_TEXT_SEPARATOR = "\n\n"
+
+
+class MessageCoalescer:
+    def __init__(self, merge_window: float = 0.5, max_text_length: int = MESSAGE_TEXT_LIMIT):
+        self.merge_window = merge_window  # seconds between texts which may be merged
+        self.max_text_length = max_text_length
+        self.collapsed_edits: int = 0
+        self.merged_messages: int = 0
+
+    def coalesce(self, message: BasicMessage, pending: Iterable[Tuple[float, BasicMessage]]) -> bool:
+        # pending are (put_at, message) not sent yet, the latest first; True if the message is absorbed by one of them
+        if isinstance(message, EditMessageTextObj):
+            return self.collapse_edit(message=message, pending=pending)
+        if isinstance(message, SendMessageObj) and message.keyboard is None:
+            return self.merge_message(message=message, pending=pending)
+        return False
+
+    def collapse_edit(self, message: EditMessageTextObj, pending: Iterable[Tuple[float, BasicMessage]]) -> bool:
+        for _, pending_message in pending:
+            if (
+                isinstance(pending_message, EditMessageTextObj)
+                and pending_message.chat_id == message.chat_id
+                and pending_message.message_id == message.message_id
+            ):
+                # every edit replaces the whole message, so only the latest one matters
+                pending_message.text = message.text
+                pending_message.parse_mode = message.parse_mode
+                pending_message.keyboard = message.keyboard
+                pending_message.outbox_keys.extend(message.outbox_keys)
+                self.collapsed_edits += 1
+                return True
+        return False
+
+    def merge_message(self, message: SendMessageObj, pending: Iterable[Tuple[float, BasicMessage]]) -> bool:
+        for put_at, pending_message in pending:
+            if pending_message.chat_id != message.chat_id:
+                continue
+
+            # only the latest message of the chat may be extended, otherwise the chat order is broken
+            if (
+                type(pending_message) is not SendMessageObj
+                or pending_message.keyboard is not None
+                or pending_message.parse_mode != message.parse_mode
+                or monotonic() - put_at > self.merge_window
+            ):
+                return False
+
+            text = pending_message.text + MERGED_TEXT_SEPARATOR + message.text
+            if len(text) > self.max_text_length:
+                return False
+
+            pending_message.text = text
+            pending_message.outbox_keys.extend(message.outbox_keys)
+            self.merged_messages += 1
+            return True
+        return False
+
+    @property
+    def statistics(self) -> CoalescerStatistics:
+        return CoalescerStatistics(collapsed_edits=self.collapsed_edits, merged_messages=self.merged_messages)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import ClassVar, List, Optional, Type
 
 from marshmallow import EXCLUDE, Schema
@@ -17,6 +17,7 @@ class InlineKeyboardButton:
 @dataclass
 class InlineKeyboardMarkup:
     inline_keyboard: List[List[InlineKeyboardButton]]
+    reply_markup: ClassVar[Optional[str]] = None  # json, set on the instance by KeyboardRegistry.register
 
 
 inline_keyboard_markup_schema = class_schema(InlineKeyboardMarkup)()
@@ -25,6 +26,8 @@ inline_keyboard_markup_schema = class_schema(InlineKeyboardMarkup)()
 @dataclass
 class BasicMessage:
     chat_id: int = 0
+    outbox_keys: List[str] = field(default_factory=list, repr=False, compare=False)  # journal entries to acknowledge
+    attempts: int = field(default=0, repr=False, compare=False)  # failed sends, for the retry backoff
 
 
 @dataclass
@@ -52,6 +55,7 @@ class EditMessageTextObj(BasicMessage):
 @dataclass
 class SendPhotoObj(BasicMessage):
     photo: str = ""
+    caption: Optional[str] = None
     keyboard: Optional[InlineKeyboardMarkup] = None
 
 
@@ -83,3 +87,35 @@ class GetUserProfilePhotosResponse(BasicResponse):
 @marshmallow_dataclass
 class SendMessageResponse(BasicResponse):
     result: Message
+
+
+get_user_profile_photos_response_schema = GetUserProfilePhotosResponse.Schema()
+send_message_response_schema = SendMessageResponse.Schema()
+
+
+@dataclass
+class SchedulerStatistics:
+    throttled: int  # sends which have waited for a token
+    wait_time: float
+    rate_limited: int  # 429 responses
+    retried: int  # 5xx responses and network errors
+    dropped: int
+
+
+@dataclass
+class PriorityClassStatistics:
+    name: str
+    depth: int
+    processed: int
+    total_latency: float  # time spent in the queue
+    max_latency: float
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.processed if self.processed else 0.0
+
+
+@dataclass
+class CoalescerStatistics:
+    collapsed_edits: int  # edits replaced by a later edit of the same message
+    merged_messages: int  # texts appended to the previous message of the chat
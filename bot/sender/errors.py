@@ -0,0 +1,15 @@
+class TgBotApiError(Exception):
+    def __init__(self, error_code: int, description: str = ""):
+        super().__init__(f"{error_code}: {description}")
+        self.error_code = error_code
+        self.description = description
+
+
+class TooManyRequestsError(TgBotApiError):
+    def __init__(self, retry_after: float, description: str = ""):
+        super().__init__(error_code=429, description=description)
+        self.retry_after = retry_after
+
+
+class ServerError(TgBotApiError):
+    pass
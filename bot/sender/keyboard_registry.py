@@ -0,0 +1,42 @@
+import json
+from collections import OrderedDict
+from typing import Tuple
+
+from bot.sender.dataclasses import InlineKeyboardMarkup, inline_keyboard_markup_schema
+
+KeyboardKey = Tuple[Tuple[Tuple[str, str], ...], ...]
+
+
+class KeyboardRegistry:
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size  # of dynamically built keyboards
+        self._dynamic: OrderedDict[KeyboardKey, str] = OrderedDict()  # least recently used first
+
+    def register(self, *keyboards: InlineKeyboardMarkup) -> None:
+        # static keyboards are serialised once and carry their json
+        for keyboard in keyboards:
+            keyboard.reply_markup = self.serialize(keyboard=keyboard)
+
+    def get_json(self, keyboard: InlineKeyboardMarkup) -> str:
+        if keyboard.reply_markup is not None:
+            return keyboard.reply_markup
+
+        key = self.get_key(keyboard=keyboard)
+        reply_markup = self._dynamic.get(key)
+        if reply_markup is None:
+            reply_markup = self._dynamic[key] = self.serialize(keyboard=keyboard)
+            if len(self._dynamic) > self.max_size:
+                self._dynamic.popitem(last=False)
+        self._dynamic.move_to_end(key)
+        return reply_markup
+
+    @staticmethod
+    def get_key(keyboard: InlineKeyboardMarkup) -> KeyboardKey:
+        return tuple(tuple((button.text, button.callback_data) for button in row) for row in keyboard.inline_keyboard)
+
+    @staticmethod
+    def serialize(keyboard: InlineKeyboardMarkup) -> str:
+        return json.dumps(inline_keyboard_markup_schema.dump(keyboard))
+
+
+keyboard_registry = KeyboardRegistry()
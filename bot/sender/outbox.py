@@ -0,0 +1,78 @@
+from dataclasses import asdict
+from typing import List
+from uuid import uuid4
+
+from bot.journal import Journal, JournalStatistics
+from bot.sender.dataclasses import (
+    AnswerCallbackQueryObj,
+    BasicMessage,
+    EditMessageTextObj,
+    SendMessageObj,
+    SendPhotoObj,
+    inline_keyboard_markup_schema,
+)
+
+MESSAGE_TYPES = {
+    message_type.__name__: message_type for message_type in (SendMessageObj, EditMessageTextObj, SendPhotoObj)
+}
+
+
+class Outbox:
+    # messages are journaled before they are queued and acknowledged once they are sent or rejected;
+    # delivery is at least once: a message sent right before a crash is not acknowledged yet and is sent again;
+    # the worker journals the messages of an update after its transaction commits, so a crash between the commit
+    # and the journal write loses them, while the state change is saved
+    def __init__(self, path: str):
+        self.journal = Journal(path=path)
+
+    async def open(self) -> List[BasicMessage]:
+        # the messages which were not sent before the restart
+        await self.journal.open()
+        messages = list()
+        for key, entry in self.journal.pending.items():
+            message = self.deserialize_message(entry=entry)
+            message.outbox_keys.append(key)
+            messages.append(message)
+        return messages
+
+    async def append(self, message: BasicMessage) -> None:
+        await self.append_many(messages=[message])
+
+    async def append_many(self, messages: List[BasicMessage]) -> None:
+        # one commit for all the messages
+        entries = dict()
+        for message in messages:
+            if isinstance(message, AnswerCallbackQueryObj):  # callback queries expire long before any restart
+                continue
+
+            key = uuid4().hex  # journal key of the message, Telegram has no way to deduplicate a repeated send
+            message.outbox_keys.append(key)
+            entries[key] = self.serialize_message(message=message)
+
+        if entries:
+            await self.journal.append_many(entries=entries)
+
+    def ack(self, message: BasicMessage) -> None:
+        for key in message.outbox_keys:
+            self.journal.ack(key=key)
+
+    async def close(self) -> None:
+        await self.journal.close()
+
+    @staticmethod
+    def serialize_message(message: BasicMessage) -> dict:
+        fields = asdict(message)
+        del fields["outbox_keys"]
+        del fields["attempts"]
+        return {"type": message.__class__.__name__, "fields": fields}
+
+    @staticmethod
+    def deserialize_message(entry: dict) -> BasicMessage:
+        fields = dict(entry["fields"])  # the journal keeps the serialised entry
+        if fields.get("keyboard") is not None:
+            fields["keyboard"] = inline_keyboard_markup_schema.load(fields["keyboard"])
+        return MESSAGE_TYPES[entry["type"]](**fields)
+
+    @property
+    def statistics(self) -> JournalStatistics:
+        return self.journal.statistics
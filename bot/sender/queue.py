@@ -0,0 +1,116 @@
+from asyncio import Queue
+from collections import deque
+from time import monotonic
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple
+
+from bot.sender.coalescer import MessageCoalescer
+from bot.sender.dataclasses import AnswerCallbackQueryObj, BasicMessage, EditMessageTextObj, PriorityClassStatistics
+from bot.sender.outbox import Outbox
+
+CALLBACK_ANSWER_PRIORITY = 0
+EDIT_PRIORITY = 1
+NEW_MESSAGE_PRIORITY = 2  # messages and photos
+
+PRIORITY_NAMES = {
+    CALLBACK_ANSWER_PRIORITY: "callback_answer",
+    EDIT_PRIORITY: "edit",
+    NEW_MESSAGE_PRIORITY: "new_message",
+}
+
+
+def get_message(item: Any) -> BasicMessage:
+    return item
+
+
+def get_message_priority(message: BasicMessage) -> int:
+    if isinstance(message, AnswerCallbackQueryObj):
+        return CALLBACK_ANSWER_PRIORITY
+    if isinstance(message, EditMessageTextObj):
+        return EDIT_PRIORITY
+    return NEW_MESSAGE_PRIORITY
+
+
+class PriorityMessageQueue(Queue):
+    # FIFO inside a priority class; an item gains one priority class per aging_interval seconds of waiting,
+    # so low-priority messages keep moving while the queue is flooded with callback answers
+    def __init__(
+        self,
+        get_message: Callable[[Any], BasicMessage] = get_message,
+        aging_interval: float = 1.0,
+        coalescer: Optional[MessageCoalescer] = None,
+        outbox: Optional[Outbox] = None,
+    ):
+        self.get_message = get_message  # items may wrap the messages
+        self.aging_interval = aging_interval
+        self.coalescer = coalescer
+        self.outbox = outbox
+        self._processed: List[int] = [0] * len(PRIORITY_NAMES)
+        self._total_latency: List[float] = [0.0] * len(PRIORITY_NAMES)
+        self._max_latency: List[float] = [0.0] * len(PRIORITY_NAMES)
+        super().__init__()
+
+    def _init(self, maxsize: int) -> None:
+        self._classes: List[Deque[Tuple[float, Any]]] = [deque() for _ in PRIORITY_NAMES]
+
+    def qsize(self) -> int:
+        return sum(len(items) for items in self._classes)
+
+    def empty(self) -> bool:
+        return not any(self._classes)
+
+    async def put(self, item: Any) -> None:
+        if self.outbox:
+            await self.outbox.append(message=self.get_message(item))
+        await super().put(item)
+
+    async def put_many(self, items: List[Any]) -> None:
+        # the items are journaled with one commit, then queued in order
+        if self.outbox:
+            await self.outbox.append_many(messages=[self.get_message(item) for item in items])
+        for item in items:
+            self.put_nowait(item)
+
+    def put_nowait(self, item: Any) -> None:
+        if self.coalescer:
+            message = self.get_message(item)
+            pending = self.get_pending_messages(priority=get_message_priority(message=message))
+            if self.coalescer.coalesce(message=message, pending=pending):
+                return  # absorbed by a pending message, so it is not a queue task
+        super().put_nowait(item)
+
+    def requeue_nowait(self, item: Any) -> None:
+        super().put_nowait(item)  # taken from the queue before, so it is not coalesced again
+
+    def get_pending_messages(self, priority: int) -> Iterator[Tuple[float, BasicMessage]]:
+        for put_at, item in reversed(self._classes[priority]):
+            yield put_at, self.get_message(item)
+
+    def _put(self, item: Any) -> None:
+        self._classes[get_message_priority(message=self.get_message(item))].append((monotonic(), item))
+
+    def _get(self) -> Any:
+        now = monotonic()
+        priority = min(
+            (index for index, items in enumerate(self._classes) if items),
+            key=lambda index: index - (now - self._classes[index][0][0]) / self.aging_interval,
+        )
+        put_at, item = self._classes[priority].popleft()
+
+        latency = now - put_at
+        self._processed[priority] += 1
+        self._total_latency[priority] += latency
+        self._max_latency[priority] = max(self._max_latency[priority], latency)
+        return item
+
+    @property
+    def statistics(self) -> List[PriorityClassStatistics]:
+        return [
+            PriorityClassStatistics(
+                name=name,
+                depth=len(self._classes[priority]),
+                processed=self._processed[priority],
+                total_latency=self._total_latency[priority],
+                max_latency=self._max_latency[priority],
+            )
+            for priority, name in PRIORITY_NAMES.items()
+        ]
@@ -0,0 +1,137 @@
+from asyncio import sleep
+from collections import OrderedDict
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import ClientError
+
+from bot.sender.dataclasses import BasicMessage, SchedulerStatistics
+from bot.sender.errors import ServerError, TgBotApiError, TooManyRequestsError
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until: float = 0.0  # set by Telegram retry_after
+        self._updated_at = monotonic()
+
+    def get_delay(self) -> float:
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> float:
+        waited = 0.0
+        while delay := self.get_delay():
+            await sleep(delay)
+            waited += delay
+
+        self.tokens -= 1
+        return waited
+
+    def try_acquire(self) -> float:
+        # takes a token or returns the seconds until there is one, never waits
+        delay = self.get_delay()
+        if not delay:
+            self.tokens -= 1
+        return delay
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+
+
+class SendScheduler:
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        group_rate_per_minute: float = 20.0,
+        max_attempts: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_group_buckets: int = 10000,
+    ):
+        self.global_bucket = TokenBucket(rate=global_rate, capacity=global_rate)
+        self.group_rate_per_minute = group_rate_per_minute
+        self.max_attempts = max_attempts  # for 5xx and network errors, 429 is retried until it's sent
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_group_buckets = max_group_buckets
+        self.throttled: int = 0
+        self.wait_time: float = 0.0
+        self.rate_limited: int = 0
+        self.retried: int = 0
+        self.dropped: int = 0
+        self._group_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+
+    def reserve(self, chat_id: int) -> float:
+        # 0 if the chat may send now, otherwise the seconds to park its message for; the shard does not wait
+        group_bucket = self.get_group_bucket(chat_id=chat_id)
+        delay = group_bucket.try_acquire() if group_bucket else 0.0
+        if delay:
+            self.throttled += 1
+            self.wait_time += delay
+        return delay
+
+    def get_delay(self, chat_id: int) -> float:
+        group_bucket = self.get_group_bucket(chat_id=chat_id)
+        return group_bucket.get_delay() if group_bucket else 0.0
+
+    async def send(self, message: BasicMessage, handler: Callable[..., Awaitable]) -> float:
+        # one attempt: 0 if the message is sent or dropped, otherwise the seconds to park it for before a retry
+        waited = await self.global_bucket.acquire()  # shared by all chats, a fraction of a second per message
+        if waited:
+            self.throttled += 1
+            self.wait_time += waited
+
+        try:
+            await handler(message=message)
+        except TooManyRequestsError as error:
+            self.rate_limited += 1
+            self.get_bucket(chat_id=message.chat_id).block(seconds=error.retry_after)
+            return error.retry_after
+        except (ServerError, ClientError) as error:
+            message.attempts += 1
+            if message.attempts >= self.max_attempts:
+                self.dropped += 1
+                print(f"message to chat {message.chat_id} is dropped after {message.attempts} attempts: {error}")
+                return 0.0
+            self.retried += 1
+            return min(self.backoff_base * 2 ** (message.attempts - 1), self.backoff_max)
+        except TgBotApiError as error:  # the request itself is wrong, retrying won't help
+            self.dropped += 1
+            print(f"message to chat {message.chat_id} is rejected: {error}")
+        return 0.0
+
+    def get_bucket(self, chat_id: int) -> TokenBucket:
+        return self.get_group_bucket(chat_id=chat_id) or self.global_bucket
+
+    def get_group_bucket(self, chat_id: int) -> Optional[TokenBucket]:
+        if chat_id >= 0:  # private chats and callback answers are limited by the global bucket only
+            return None
+
+        bucket = self._group_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate_per_minute / 60
+            bucket = self._group_buckets[chat_id] = TokenBucket(rate=rate, capacity=self.group_rate_per_minute)
+            if len(self._group_buckets) > self.max_group_buckets:
+                self._group_buckets.popitem(last=False)
+        self._group_buckets.move_to_end(chat_id)
+        return bucket
+
+    @property
+    def statistics(self) -> SchedulerStatistics:
+        return SchedulerStatistics(
+            throttled=self.throttled,
+            wait_time=self.wait_time,
+            rate_limited=self.rate_limited,
+            retried=self.retried,
+            dropped=self.dropped,
+        )
@@ -1,36 +1,161 @@
-from asyncio import CancelledError, Queue, Task, create_task
-from typing import Optional
+from asyncio import CancelledError, Queue, Task, TimerHandle, create_task, get_running_loop
+from collections import deque
+from functools import partial
+from time import monotonic, perf_counter
+from traceback import print_exc
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
 
+from bot.http_session import TgBotApiSession
+from bot.sender.coalescer import MessageCoalescer
 from bot.sender.dataclasses import (
     AnswerCallbackQueryObj,
     BasicMessage,
+    CoalescerStatistics,
     EditMessageTextObj,
+    PriorityClassStatistics,
     SendMessageObj,
     SendPhotoObj,
 )
+from bot.sender.outbox import Outbox
+from bot.sender.queue import PriorityMessageQueue
+from bot.sender.scheduler import SendScheduler
 from bot.sender.tg_bot_api import TgBotApiSender
+from bot.sharding import ShardedQueues, ShardStatistics, get_shard_index
 
 
 class Sender:
-    def __init__(self, token: str, queue: Queue):
-        self.tg_client: TgBotApiSender = TgBotApiSender(token=token)
+    def __init__(
+        self,
+        token: str,
+        queue: Queue,
+        http_session: TgBotApiSession,
+        senders_qty: int = 1,
+        scheduler: Optional[SendScheduler] = None,
+        coalescer: Optional[MessageCoalescer] = None,
+        outbox: Optional[Outbox] = None,
+    ):
+        self.tg_client: TgBotApiSender = TgBotApiSender(token=token, http_session=http_session)
         self.queue = queue
+        self.scheduler = scheduler if scheduler is not None else SendScheduler()
+        self.coalescer = coalescer if coalescer is not None else MessageCoalescer()
+        self.outbox = outbox
+        self.senders_qty = senders_qty
+        self.shards: ShardedQueues = ShardedQueues(  # messages of one chat in one shard
+            shards_qty=senders_qty,
+            queue_factory=partial(
+                PriorityMessageQueue, get_message=self.get_shard_item_message, coalescer=self.coalescer
+            ),
+        )
+        self.answers: Queue = Queue()  # callback answers skip the chat shards and their rate limits
+        self.parked: Dict[Hashable, Deque[Tuple[float, BasicMessage]]] = dict()  # throttled chats, (parked_at, message)
         self.is_running: bool = False
-        self._task: Optional[Task] = None
+        self._released: Dict[Hashable, BasicMessage] = dict()  # the parked message which is back in its shard
+        self._release_handles: Dict[Hashable, TimerHandle] = dict()
+        self._tasks: List[Task] = list()
 
     def start(self):
         self.is_running = True
-        self._task = create_task(self._send())
+        self._tasks = [create_task(self._dispatch())]
+        self._tasks.extend([create_task(self._send(shard_index=index)) for index in range(self.senders_qty)])
+        self._tasks.extend([create_task(self._answer()) for _ in range(self.senders_qty)])
 
-    async def _send(self):
+    async def _dispatch(self):
         while self.is_running:
             message = await self.queue.get()
+            key = self.get_message_key(message=message)
+            if isinstance(message, AnswerCallbackQueryObj):
+                self.answers.put_nowait(message)
+            elif key in self.parked:  # behind the messages of its chat which wait for the rate limit
+                self.park(key=key, message=message)
+            else:
+                await self.shards.put(key=key, item=message)
+            self.queue.task_done()
+
+    async def _send(self, shard_index: int):
+        while self.is_running:
+            enqueued_at, message = await self.shards.get(shard_index=shard_index)
+            key = self.get_message_key(message=message)
+
+            is_done = True
+            try:
+                is_done = await self.send_or_park(key=key, message=message)
+            except Exception as error:  # not handled by the scheduler, the shard goes on with the next message
+                print(f"message to chat {message.chat_id} is not sent: {error!r}")
+                print_exc()
+            finally:
+                if is_done:
+                    if self.outbox:  # sent, rejected or failed, it is not repeated after a restart
+                        self.outbox.ack(message=message)
+                    self.release_next(key=key)
+                self.shards.task_done(shard_index=shard_index, enqueued_at=enqueued_at)
+
+    async def _answer(self):
+        # the spinner on the button stops only with the answer, so it is not throttled or retried
+        while self.is_running:
+            message = await self.answers.get()
+            try:
+                await self.tg_client.answer_callback_query(message=message)
+            except Exception as error:
+                print(f"callback query {message.callback_query_id} is not answered: {error!r}")
+            finally:
+                self.answers.task_done()
+
+    async def send_or_park(self, key: Hashable, message: BasicMessage) -> bool:
+        # False if the message is parked, the shard goes on with other chats meanwhile
+        if key in self.parked and self._released.get(key) is not message:
+            self.park(key=key, message=message)
+            return False
+        self._released.pop(key, None)
+
+        delay = self.scheduler.reserve(chat_id=message.chat_id)
+        if not delay:
             handler = self.select_message_handler(message=message)
+            delay = await self.scheduler.send(message=message, handler=handler) if handler else 0.0
+        if delay:
+            self.parked.setdefault(key, deque()).appendleft((monotonic(), message))
+            self.schedule_release(key=key, delay=delay)
+            return False
+        return True
 
-            if handler:
-                await handler(message=message)
+    def park(self, key: Hashable, message: BasicMessage) -> None:
+        parked = self.parked.setdefault(key, deque())
+        if not self.coalescer.coalesce(message=message, pending=reversed(parked)):
+            parked.append((monotonic(), message))
 
-            self.queue.task_done()
+    def schedule_release(self, key: Hashable, delay: float) -> None:
+        handle = self._release_handles.pop(key, None)
+        if handle:
+            handle.cancel()
+        self._release_handles[key] = get_running_loop().call_later(delay, self.release, key)
+
+    def release(self, key: Hashable) -> None:
+        # the first parked message of the chat goes back to its shard when the chat may send again
+        del self._release_handles[key]
+        _, message = self.parked[key].popleft()
+        self._released[key] = message
+        shard_index = get_shard_index(key=key, shards_qty=self.senders_qty)
+        self.shards.queues[shard_index].requeue_nowait((perf_counter(), message))
+
+    def release_next(self, key: Hashable) -> None:
+        parked = self.parked.get(key)
+        if parked is None:
+            return
+        if not parked:
+            del self.parked[key]
+            return
+        _, message = parked[0]
+        self.schedule_release(key=key, delay=self.scheduler.get_delay(chat_id=message.chat_id))
+
+    @staticmethod
+    def get_message_key(message: Optional[BasicMessage]) -> Hashable:
+        if isinstance(message, AnswerCallbackQueryObj):  # answers are not ordered with chat messages
+            return message.callback_query_id
+        return message.chat_id
+
+    @staticmethod
+    def get_shard_item_message(item: Tuple[float, BasicMessage]) -> BasicMessage:
+        _, message = item  # (enqueued_at, message)
+        return message
 
     def select_message_handler(self, message: Optional[BasicMessage]):
         message_to_handler = {
@@ -41,11 +166,42 @@ class Sender:
         }
         return message_to_handler.get(message.__class__)
 
+    @property
+    def shards_statistics(self) -> List[ShardStatistics]:
+        return self.shards.statistics
+
+    @property
+    def priority_statistics(self) -> List[PriorityClassStatistics]:
+        # queueing in the sender shards, where the messages wait for sending
+        shards_statistics = [queue.statistics for queue in self.shards.queues]
+        return [
+            PriorityClassStatistics(
+                name=classes[0].name,
+                depth=sum(statistics.depth for statistics in classes),
+                processed=sum(statistics.processed for statistics in classes),
+                total_latency=sum(statistics.total_latency for statistics in classes),
+                max_latency=max(statistics.max_latency for statistics in classes),
+            )
+            for classes in zip(*shards_statistics)
+        ]
+
+    @property
+    def coalescer_statistics(self) -> CoalescerStatistics:
+        return self.coalescer.statistics
+
     async def stop(self):
         await self.queue.join()
+        await self.answers.join()
+        await self.shards.join()
         self.is_running = False
-        self._task.cancel()
-        try:
-            await self._task
-        except CancelledError:
-            print("task_send is cancelled")
+
+        for handle in self._release_handles.values():  # parked messages stay in the outbox until the restart
+            handle.cancel()
+        self._release_handles.clear()
+
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except CancelledError:
+                print("task_send is cancelled")
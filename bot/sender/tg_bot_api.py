@@ -1,24 +1,28 @@
-import json
-from typing import List, Optional, Type
+from typing import List, Optional
 
-from aiohttp import ClientSession
+from aiohttp import ClientResponse
+from marshmallow import Schema
 
+from bot.http_session import TgBotApiSession
 from bot.sender.dataclasses import (
     AnswerCallbackQueryObj,
     EditMessageTextObj,
-    GetUserProfilePhotosResponse,
     InlineKeyboardMarkup,
     PhotoSize,
     SendMessageObj,
     SendMessageResponse,
     SendPhotoObj,
-    inline_keyboard_markup_schema,
+    get_user_profile_photos_response_schema,
+    send_message_response_schema,
 )
+from bot.sender.errors import ServerError, TgBotApiError, TooManyRequestsError
+from bot.sender.keyboard_registry import keyboard_registry
 
 
 class TgBotApiSender:
-    def __init__(self, token: str = ""):
+    def __init__(self, token: str = "", http_session: Optional[TgBotApiSession] = None):
         self._token = token
+        self.http_session = http_session if http_session is not None else TgBotApiSession()
 
     def get_request_url(self, method: str) -> str:
         return f"https://api.telegram.org/bot{self._token}/{method}"
@@ -27,13 +31,12 @@ class TgBotApiSender:
         request_url = self.get_request_url(method="getUserProfilePhotos")
         params = {"user_id": user_id, "offset": offset}
 
-        async with ClientSession() as session:
-            async with session.get(url=request_url, params=params) as response:
-                raw_response = await response.json()
-                obj_response = GetUserProfilePhotosResponse.Schema().load(raw_response)
-                return obj_response.result.photos
+        async with self.http_session.client_session.get(url=request_url, params=params) as response:
+            raw_response = await response.json()
+            obj_response = get_user_profile_photos_response_schema.load(raw_response)
+            return obj_response.result.photos
 
-    async def send_message(self, message: SendMessageObj) -> SendMessageResponse:
+    async def send_message(self, message: SendMessageObj, parse_response: bool = False) -> SendMessageResponse | dict:
         request_url = self.get_request_url(method="sendMessage")
         params = {
             "chat_id": message.chat_id,
@@ -42,7 +45,7 @@ class TgBotApiSender:
         }
 
         return await self.handle_post_request(
-            marshmallow_dataclass=SendMessageResponse,
+            response_schema=send_message_response_schema if parse_response else None,
             request_url=request_url,
             params=params,
             keyboard=message.keyboard,
@@ -56,12 +59,13 @@ class TgBotApiSender:
             "show_alert": message.show_alert,
         }
 
-        async with ClientSession() as session:
-            async with session.post(url=request_url, params=params) as response:
-                raw_response = await response.json()
-                return raw_response
+        async with self.http_session.client_session.post(url=request_url, params=params) as response:
+            raw_response = await self.get_checked_response(response=response)
+            return raw_response
 
-    async def edit_message_text(self, message: EditMessageTextObj) -> SendMessageResponse:
+    async def edit_message_text(
+        self, message: EditMessageTextObj, parse_response: bool = False
+    ) -> SendMessageResponse | dict:
         request_url = self.get_request_url(method="editMessageText")
         params = {
             "chat_id": message.chat_id,
@@ -71,18 +75,20 @@ class TgBotApiSender:
         }
 
         return await self.handle_post_request(
-            marshmallow_dataclass=SendMessageResponse,
+            response_schema=send_message_response_schema if parse_response else None,
             request_url=request_url,
             params=params,
             keyboard=message.keyboard,
         )
 
-    async def send_photo(self, message: SendPhotoObj) -> SendMessageResponse:
+    async def send_photo(self, message: SendPhotoObj, parse_response: bool = False) -> SendMessageResponse | dict:
         request_url = self.get_request_url(method="sendPhoto")
         params = {"chat_id": message.chat_id, "photo": message.photo}
+        if message.caption:
+            params["caption"] = message.caption
 
         return await self.handle_post_request(
-            marshmallow_dataclass=SendMessageResponse,
+            response_schema=send_message_response_schema if parse_response else None,
             request_url=request_url,
             params=params,
             keyboard=message.keyboard,
@@ -90,21 +96,37 @@ class TgBotApiSender:
 
     async def handle_post_request(
         self,
-        marshmallow_dataclass: Type[SendMessageResponse],
         request_url: str,
         params: dict,
         keyboard: Optional[InlineKeyboardMarkup] = None,
-    ) -> SendMessageResponse:
+        response_schema: Optional[Schema] = None,
+    ) -> SendMessageResponse | dict:
         if keyboard:
             params["reply_markup"] = self.convert_inline_keyboard_to_json(keyboard=keyboard)
 
-        async with ClientSession() as session:
-            async with session.post(url=request_url, params=params) as response:
-                raw_response = await response.json()
-                return marshmallow_dataclass.Schema().load(raw_response)
+        async with self.http_session.client_session.post(url=request_url, params=params) as response:
+            raw_response = await self.get_checked_response(response=response)
+            if response_schema is None:  # the senders need only the checked status
+                return raw_response
+            return response_schema.load(raw_response)
+
+    @staticmethod
+    async def get_checked_response(response: ClientResponse) -> dict:
+        if response.status >= 500:
+            raise ServerError(error_code=response.status, description=response.reason)
+
+        raw_response = await response.json()
+        if not raw_response.get("ok"):
+            error_code = raw_response.get("error_code", response.status)
+            description = raw_response.get("description", "")
+
+            if error_code == 429:
+                retry_after = raw_response.get("parameters", {}).get("retry_after", 1)
+                raise TooManyRequestsError(retry_after=retry_after, description=description)
+            raise TgBotApiError(error_code=error_code, description=description)
+
+        return raw_response
 
     @staticmethod
-    def convert_inline_keyboard_to_json(keyboard: InlineKeyboardMarkup) -> json:
-        keyboard_dict = inline_keyboard_markup_schema.dump(keyboard)
-        keyboard_json = json.dumps(keyboard_dict)
-        return keyboard_json
+    def convert_inline_keyboard_to_json(keyboard: InlineKeyboardMarkup) -> str:
+        return keyboard_registry.get_json(keyboard=keyboard)
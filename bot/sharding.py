@@ -0,0 +1,62 @@
+from asyncio import Queue, gather
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Hashable, List, Tuple
+
+
+def get_shard_index(key: Hashable, shards_qty: int) -> int:
+    return hash(key) % shards_qty  # hash of int doesn't depend on the process, so shards agree across processes
+
+
+@dataclass
+class ShardStatistics:
+    index: int
+    depth: int
+    processed: int
+    total_latency: float
+    max_latency: float
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.processed if self.processed else 0.0
+
+
+class ShardedQueues:
+    # items with the same key always go to the same shard, so each shard keeps their FIFO order
+    def __init__(self, shards_qty: int, queue_factory: Callable[[], Queue] = Queue):
+        self.queues: List[Queue] = [queue_factory() for _ in range(shards_qty)]
+        self._processed: List[int] = [0] * shards_qty
+        self._total_latency: List[float] = [0.0] * shards_qty
+        self._max_latency: List[float] = [0.0] * shards_qty
+
+    async def put(self, key: Hashable, item: Any) -> None:
+        await self.queues[get_shard_index(key=key, shards_qty=len(self.queues))].put((perf_counter(), item))
+
+    async def get(self, shard_index: int) -> Tuple[float, Any]:
+        return await self.queues[shard_index].get()  # (enqueued_at, item)
+
+    def get_nowait(self, shard_index: int) -> Tuple[float, Any]:
+        return self.queues[shard_index].get_nowait()
+
+    def task_done(self, shard_index: int, enqueued_at: float) -> None:
+        latency = perf_counter() - enqueued_at
+        self._processed[shard_index] += 1
+        self._total_latency[shard_index] += latency
+        self._max_latency[shard_index] = max(self._max_latency[shard_index], latency)
+        self.queues[shard_index].task_done()
+
+    async def join(self) -> None:
+        await gather(*[queue.join() for queue in self.queues])
+
+    @property
+    def statistics(self) -> List[ShardStatistics]:
+        return [
+            ShardStatistics(
+                index=index,
+                depth=queue.qsize(),
+                processed=self._processed[index],
+                total_latency=self._total_latency[index],
+                max_latency=self._max_latency[index],
+            )
+            for index, queue in enumerate(self.queues)
+        ]
@@ -0,0 +1,104 @@
+import heapq
+from asyncio import CancelledError, Event, Task, TimeoutError, create_task, wait_for
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import count
+from time import monotonic
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class TimerStatistics:
+    pending: int
+    fired: int
+    cancelled: int  # superseded or cancelled entries dropped from the heap
+    max_lateness: float  # seconds between a deadline and its callback
+
+
+class RoundTimer:
+    # one task and one heap for the deadlines of all chats, the latest timer of a chat replaces the previous one
+    def __init__(self):
+        self.on_expire: Optional[Callable[[int, int], Awaitable]] = None  # (chat_id, current_round)
+        self.fired: int = 0
+        self.cancelled: int = 0
+        self.max_lateness: float = 0.0
+        self._heap: List[Tuple[float, int, int, int]] = list()  # (monotonic deadline, seq, chat_id, current_round)
+        self._timers: Dict[int, int] = dict()  # chat_id -> seq of its pending timer
+        self._seq = count()
+        self._changed = Event()
+        self._task: Optional[Task] = None
+
+    def start(self, on_expire: Callable[[int, int], Awaitable]) -> None:
+        self.on_expire = on_expire
+        self._task = create_task(self._run())
+
+    def schedule(self, chat_id: int, current_round: int, deadline: datetime) -> None:
+        at = monotonic() + (deadline - datetime.now(tz=timezone.utc)).total_seconds()
+        seq = next(self._seq)
+        if chat_id in self._timers:
+            self.cancelled += 1
+        self._timers[chat_id] = seq
+        heapq.heappush(self._heap, (at, seq, chat_id, current_round))
+
+        if self._heap[0][1] == seq:  # the task sleeps until an earlier deadline otherwise
+            self._changed.set()
+        self._compact()
+
+    def cancel(self, chat_id: int) -> None:
+        # the heap entry is dropped when it comes up
+        if self._timers.pop(chat_id, None) is not None:
+            self.cancelled += 1
+            self._compact()
+
+    def _compact(self) -> None:
+        if len(self._heap) > 2 * len(self._timers) + 1024:
+            self._heap = [entry for entry in self._heap if self._timers.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    async def _run(self):
+        while True:
+            if not self._heap:
+                await self._changed.wait()
+                self._changed.clear()
+                continue
+
+            delay = self._heap[0][0] - monotonic()
+            if delay > 0:
+                try:
+                    await wait_for(self._changed.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                self._changed.clear()
+                continue
+
+            at, seq, chat_id, current_round = heapq.heappop(self._heap)
+            if self._timers.get(chat_id) != seq:
+                continue
+
+            del self._timers[chat_id]
+            self.fired += 1
+            self.max_lateness = max(self.max_lateness, monotonic() - at)
+            await self.on_expire(chat_id, current_round)
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except CancelledError:
+            print("task_timer is cancelled")
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    @property
+    def statistics(self) -> TimerStatistics:
+        return TimerStatistics(
+            pending=len(self._timers),
+            fired=self.fired,
+            cancelled=self.cancelled,
+            max_lateness=self.max_lateness,
+        )
@@ -1,18 +1,38 @@
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime
+from random import sample
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import delete, desc, insert, select, update
+from sqlalchemy import Numeric, case, cast, delete, desc, exists, func, insert, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_upsert
-from sqlalchemy.orm import selectinload
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
 
-from bot.models import Account, AccountModel, Game, GameModel, User, UserModel
-from bot.worker.fsm import BEGINNING_STATE
+from bot.models import Account, AccountModel, Game, GameModel, GameState, User, UserModel, VoteModel
+from bot.worker.cache import GameCache
+from bot.worker.fsm import BEGINNING_STATE, BRACKET_ROUND_STATE, DELETED_STATE, START_ROUND_STATE
+from bot.worker.projection import PROJECTION_FULL, PROJECTION_STATE
 from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
 from database.database import Database
+from database.unit_of_work import UnitOfWork
 
 
 class BotAccessor:
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, cache: Optional[GameCache] = None):
         self.database = database
+        self.cache = cache if cache is not None else GameCache()
+        self.prefetch_queries: int = 0
+        self.projection_queries: Dict[str, int] = {PROJECTION_STATE: 0, PROJECTION_FULL: 0}
+
+    @asynccontextmanager
+    async def transaction(self, chat_id: Optional[int] = None) -> AsyncIterator[UnitOfWork]:
+        # all accessor calls inside the context share one connection and are committed together
+        try:
+            async with self.database.transaction() as unit_of_work:
+                yield unit_of_work
+        except BaseException:
+            self.cache.invalidate(chat_id=chat_id)  # write-through changes are rolled back in DB only
+            raise
 
     async def create_user_model_if_not_exists(
         self,
@@ -21,7 +41,7 @@ class BotAccessor:
         first_name: str,
         last_name: str,
         profile_photo_id: str,
-    ) -> None:
+    ) -> User:
         statement = pg_upsert(UserModel).values(
             id=user_id,
             username=username,
@@ -38,24 +58,37 @@ class BotAccessor:
                 profile_photo_id=profile_photo_id,
             ),
         )
-        await self.database.execute_statement(statement=do_update_statement)
+        returning_statement = do_update_statement.returning(UserModel).execution_options(populate_existing=True)
+        user_models_list = await self.database.execute_statement_scalars(statement=returning_statement)
+
+        return user_models_list[0].dataclass
 
     async def create_game_model(self, chat_id: int) -> None:
         statement = insert(GameModel).values(chat_id=chat_id, bot_state=BEGINNING_STATE)
         await self.database.execute_statement(statement=statement)
 
-    async def register_player(self, chat_id: int, user_id: int) -> None:
-        statement = insert(AccountModel).values(user_id=user_id, game_id=chat_id)
+        self.cache.put(game=Game(chat_id=chat_id, bot_state=BEGINNING_STATE, current_round=1, players=[], accounts=[]))
+
+    async def register_player(self, chat_id: int, user: User) -> None:
+        statement = insert(AccountModel).values(user_id=user.id, game_id=chat_id)
         await self.database.execute_statement(statement=statement)
 
-    async def set_photo_num_for_selected_players(self, chat_id: int, player_first: User, player_second: User) -> None:
-        for photo_num, player in zip((FIRST_PHOTO, SECOND_PHOTO), (player_first, player_second)):
-            statement = (
-                update(AccountModel)
-                .where(AccountModel.game_id == chat_id, AccountModel.user_id == player.id)
-                .values(photo_num=photo_num)
+        if game := self.cache.peek(chat_id=chat_id):
+            game.add_player(
+                user=user, account=Account(user_id=user.id, game_id=chat_id, vote=False, scores=0, photo_num="no")
             )
-            await self.database.execute_statement(statement=statement)
+
+    async def set_photo_num_for_selected_players(self, chat_id: int, player_first: User, player_second: User) -> None:
+        statement = (
+            update(AccountModel)
+            .where(AccountModel.game_id == chat_id, AccountModel.user_id.in_((player_first.id, player_second.id)))
+            .values(photo_num=case((AccountModel.user_id == player_first.id, FIRST_PHOTO), else_=SECOND_PHOTO))
+        )
+        await self.database.execute_statement(statement=statement)
+
+        if game := self.cache.peek(chat_id=chat_id):
+            game.set_photo_num(user_id=player_first.id, photo_num=FIRST_PHOTO)
+            game.set_photo_num(user_id=player_second.id, photo_num=SECOND_PHOTO)
 
     async def set_player_voted(self, chat_id: int, user_id: int) -> None:
         statement = (
@@ -65,29 +98,142 @@ class BotAccessor:
         )
         await self.database.execute_statement(statement=statement)
 
-    async def increment_player_score(self, game: Game, photo_num: str) -> None:
-        player_account = tuple(
-            filter(
-                lambda account: account.game_id == game.chat_id and account.photo_num == photo_num,
-                game.accounts,
-            )
-        )[0]
+        if game := self.cache.peek(chat_id=chat_id):
+            game.set_vote(user_id=user_id)
 
+    async def increment_player_score(self, game: Game, photo_num: str) -> None:
         statement = (
             update(AccountModel)
             .where(
                 AccountModel.game_id == game.chat_id,
                 AccountModel.photo_num == photo_num,
             )
-            .values(scores=player_account.scores + 1)
+            .values(scores=AccountModel.scores + 1)
         )
         await self.database.execute_statement(statement=statement)
 
-    async def choose_winner_photo(self, game: Game) -> str:
-        round_players_accounts = sorted(
-            filter(lambda account: account.photo_num != "no", game.accounts),
-            key=lambda account: account.scores,
+        if cached_game := self.cache.peek(chat_id=game.chat_id):
+            if account := cached_game.photo_accounts.get(photo_num):
+                account.scores += 1
+
+    async def vote_for_photo(self, chat_id: int, user_id: int, photo_num: str) -> Optional[int]:
+        # marks the voter, increments the photo scores and counts the round votes in one statement;
+        # "not voted yet" is a condition of the voter row, so a concurrent second vote is rechecked on its lock
+        accounts, games = AccountModel.__table__, GameModel.__table__  # ORM updates can't be nested into CTE
+        voter = (  # the voter may own the photo, two updates of one row in a statement are undefined
+            update(accounts)
+            .where(accounts.c.game_id == chat_id, accounts.c.user_id == user_id, accounts.c.vote.is_(False))
+            .values(
+                vote=True,
+                scores=case((accounts.c.photo_num == photo_num, accounts.c.scores + 1), else_=accounts.c.scores),
+            )
+            .returning(accounts.c.user_id)
+            .cte("voter")
+        )
+        scored = (
+            update(accounts)
+            .where(
+                accounts.c.game_id == chat_id,
+                accounts.c.photo_num == photo_num,
+                accounts.c.user_id != user_id,
+                exists(voter.select()),
+            )
+            .values(scores=accounts.c.scores + 1)
+            .returning(accounts.c.user_id)
+            .cte("scored")
+        )
+        players_num = select(func.count()).select_from(accounts).where(accounts.c.game_id == chat_id)
+        statement = (
+            update(games)
+            .add_cte(scored)
+            .where(games.c.chat_id == chat_id, exists(voter.select()))
+            .values(votes_num=games.c.votes_num + 1)
+            .returning(players_num.scalar_subquery() - games.c.votes_num)
         )
+        remaining_voters = await self.database.execute_statement_scalars(statement=statement)
+        if not remaining_voters:
+            return None  # the vote is not accepted
+
+        if game := self.cache.peek(chat_id=chat_id):
+            game.set_vote(user_id=user_id)
+            if account := game.photo_accounts.get(photo_num):
+                account.scores += 1
+
+        return remaining_voters[0]
+
+    async def start_bracket_matches(self, chat_id: int, matches: List[Tuple[User, User]]) -> None:
+        # the votes of the previous bracket round are dropped, every pair gets its match number (from 1)
+        matches_nums = {player.id: match_num for match_num, pair in enumerate(matches, start=1) for player in pair}
+        await self.database.execute_statement(statement=delete(VoteModel).where(VoteModel.game_id == chat_id))
+        new_match_num = 0  # CASE without WHEN is not valid SQL
+        if matches_nums:
+            new_match_num = case(
+                *[(AccountModel.user_id == user_id, match_num) for user_id, match_num in matches_nums.items()],
+                else_=0,
+            )
+        statement = update(AccountModel).where(AccountModel.game_id == chat_id).values(match_num=new_match_num)
+        await self.database.execute_statement(statement=statement)
+
+        if game := self.cache.peek(chat_id=chat_id):
+            for account in game.accounts:
+                game.set_match_num(user_id=account.user_id, match_num=matches_nums.get(account.user_id, 0))
+
+    async def vote_in_match(self, chat_id: int, user_id: int, candidate_id: int, match_num: int) -> Optional[int]:
+        # one vote per voter and match; returns the votes of the round including this one
+        votes, accounts, games = VoteModel.__table__, AccountModel.__table__, GameModel.__table__
+        voter = (
+            pg_upsert(votes)
+            .values(game_id=chat_id, voter_id=user_id, match_num=match_num)
+            .on_conflict_do_nothing()
+            .returning(votes.c.voter_id)
+            .cte("voter")
+        )
+        scored = (
+            update(accounts)
+            .where(accounts.c.game_id == chat_id, accounts.c.user_id == candidate_id, exists(voter.select()))
+            .values(scores=accounts.c.scores + 1)
+            .returning(accounts.c.user_id)
+            .cte("scored")
+        )
+        statement = (
+            update(games)
+            .add_cte(scored)
+            .where(games.c.chat_id == chat_id, exists(voter.select()))
+            .values(votes_num=games.c.votes_num + 1)
+            .returning(games.c.votes_num)
+        )
+        round_votes = await self.database.execute_statement_scalars(statement=statement)
+        if not round_votes:
+            return None  # the voter has already voted in this match
+
+        if game := self.cache.peek(chat_id=chat_id):
+            if account := game.accounts_by_user_id.get(candidate_id):
+                account.scores += 1
+
+        return round_votes[0]
+
+    async def count_decided_matches(self, chat_id: int, quorum: int) -> int:
+        # matches of the bracket round with at least quorum votes
+        decided_matches = (
+            select(VoteModel.match_num)
+            .where(VoteModel.game_id == chat_id)
+            .group_by(VoteModel.match_num)
+            .having(func.count() >= quorum)
+            .subquery()
+        )
+        statement = select(func.count()).select_from(decided_matches)
+        return (await self.database.execute_statement_scalars(statement=statement))[0]
+
+    async def remove_players(self, chat_id: int, user_ids: List[int]) -> None:
+        statement = delete(AccountModel).where(AccountModel.game_id == chat_id, AccountModel.user_id.in_(user_ids))
+        await self.database.execute_statement(statement=statement)
+
+        if game := self.cache.peek(chat_id=chat_id):
+            for user_id in user_ids:
+                game.remove_player(user_id=user_id)
+
+    async def choose_winner_photo(self, game: Game) -> str:
+        round_players_accounts = sorted(game.photo_accounts.values(), key=lambda account: account.scores)
         looser, winner = round_players_accounts[0], round_players_accounts[1]
 
         if looser.scores == winner.scores:
@@ -103,28 +249,37 @@ class BotAccessor:
         )
         await self.database.execute_statement(statement=statement)
 
+        if game := self.cache.peek(chat_id=looser.game_id):
+            game.remove_player(user_id=looser.user_id)
+
     async def reset_to_default_accounts_parameters(self, game: Game) -> None:
-        for account in game.accounts:
-            statement = (
-                update(AccountModel)
-                .where(
-                    AccountModel.user_id == account.user_id,
-                    AccountModel.game_id == account.game_id,
-                )
-                .values(vote=False, scores=0, photo_num="no")
-            )
-            await self.database.execute_statement(statement=statement)
+        statement = (
+            update(AccountModel)
+            .where(AccountModel.game_id == game.chat_id)
+            .values(vote=False, scores=0, photo_num="no", match_num=0)
+        )
+        await self.database.execute_statement(statement=statement)
+
+        if cached_game := self.cache.peek(chat_id=game.chat_id):
+            cached_game.reset_accounts()
 
     async def increment_users_total_games(self, game: Game) -> None:
-        for user in game.players:
-            statement = update(UserModel).where(UserModel.id == user.id).values(total_games=user.total_games + 1)
-            await self.database.execute_statement(statement=statement)
+        players_ids = select(AccountModel.user_id).where(AccountModel.game_id == game.chat_id)
+        statement = update(UserModel).where(UserModel.id.in_(players_ids)).values(total_games=UserModel.total_games + 1)
+        await self.database.execute_statement(statement=statement)
+
+        if cached_game := self.cache.peek(chat_id=game.chat_id):
+            for player in cached_game.players:
+                player.total_games += 1
 
     async def increment_user_wins(self, user: User) -> None:
         statement = (
             update(UserModel)
             .where(UserModel.id == user.id)
-            .values(wins=user.wins + 1, efficiency=(user.wins + 1) / user.total_games)
+            .values(
+                wins=UserModel.wins + 1,
+                efficiency=cast(UserModel.wins + 1, Numeric) / UserModel.total_games,
+            )
         )
         await self.database.execute_statement(statement=statement)
 
@@ -132,29 +287,183 @@ class BotAccessor:
         statement = delete(AccountModel).where(AccountModel.game_id == chat_id)
         await self.database.execute_statement(statement=statement)
 
+        if game := self.cache.peek(chat_id=chat_id):
+            game.clear_players()
+
     async def change_current_bot_state(self, chat_id: int, new_bot_state: str) -> None:
         statement = update(GameModel).where(GameModel.chat_id == chat_id).values(bot_state=new_bot_state)
         await self.database.execute_statement(statement=statement)
 
+        if game := self.cache.peek(chat_id=chat_id):
+            game.bot_state = new_bot_state
+
     async def increment_current_round(self, game: Game) -> None:
+        # the deadline of the closed round is dropped, its pending timer becomes stale
         statement = (
-            update(GameModel).where(GameModel.chat_id == game.chat_id).values(current_round=game.current_round + 1)
+            update(GameModel)
+            .where(GameModel.chat_id == game.chat_id)
+            .values(current_round=GameModel.current_round + 1, round_deadline=None)
         )
         await self.database.execute_statement(statement=statement)
 
+        if cached_game := self.cache.peek(chat_id=game.chat_id):
+            cached_game.current_round += 1
+
+    async def reset_votes_num(self, chat_id: int) -> None:
+        statement = update(GameModel).where(GameModel.chat_id == chat_id).values(votes_num=0)
+        await self.database.execute_statement(statement=statement)
+
     async def reset_current_round(self, chat_id: int) -> None:
-        statement = update(GameModel).where(GameModel.chat_id == chat_id).values(current_round=1)
+        statement = update(GameModel).where(GameModel.chat_id == chat_id).values(current_round=1, round_deadline=None)
+        await self.database.execute_statement(statement=statement)
+
+        if game := self.cache.peek(chat_id=chat_id):
+            game.current_round = 1
+
+    async def set_round_deadline(self, chat_id: int, round_deadline: Optional[datetime]) -> None:
+        statement = update(GameModel).where(GameModel.chat_id == chat_id).values(round_deadline=round_deadline)
         await self.database.execute_statement(statement=statement)
 
+    async def get_round_deadlines(
+        self, is_own_chat: Optional[Callable[[int], bool]] = None
+    ) -> List[Tuple[int, int, datetime]]:
+        # (chat_id, current_round, round_deadline) of the rounds in progress, to reschedule them after a restart
+        statement = select(GameModel.chat_id, GameModel.current_round, GameModel.round_deadline).where(
+            GameModel.round_deadline.is_not(None),
+            GameModel.bot_state.in_((START_ROUND_STATE, BRACKET_ROUND_STATE)),
+        )
+        rows = await self.database.execute_statement_rows(statement=statement)
+        return [tuple(row) for row in rows if is_own_chat is None or is_own_chat(row[0])]
+
     async def get_game_dataclass(self, chat_id: int) -> Optional[Game]:
-        statement_game = select(GameModel).where(GameModel.chat_id == chat_id).options(selectinload(GameModel.players))
-        game_models_list = await self.database.execute_statement_scalars(statement=statement_game)
+        if game := self.cache.get(chat_id=chat_id):
+            return game
+
+        statement = self.get_games_rows_statement().where(GameModel.chat_id == chat_id)
+        rows = await self.database.execute_statement_rows(statement=statement)
+        game = self.build_games_dataclasses(rows=rows).get(chat_id)
+        self.projection_queries[PROJECTION_FULL] += 1
+
+        if game:
+            self.cache.put(game=game)
+        return game
+
+    async def get_game_state(self, chat_id: int) -> Optional[Game | GameState]:
+        # the game row only, without the players join; a cached full game serves as well
+        if game := self.cache.get(chat_id=chat_id):
+            return game
+
+        statement = select(GameModel.chat_id, GameModel.bot_state, GameModel.current_round).where(
+            GameModel.chat_id == chat_id
+        )
+        rows = await self.database.execute_statement_rows(statement=statement)
+        self.projection_queries[PROJECTION_STATE] += 1
+
+        if rows:  # not cached: the cache holds full games only
+            chat_id, bot_state, current_round = rows[0]
+            return GameState(chat_id=chat_id, bot_state=bot_state, current_round=current_round)
+
+    async def get_games_dataclasses(self, chat_ids: Iterable[int]) -> Dict[int, Optional[Game]]:
+        # the games of several chats with one query for the cache misses; None for chats without a game
+        games = {chat_id: self.cache.get(chat_id=chat_id) for chat_id in set(chat_ids)}
+        missing_chat_ids = [chat_id for chat_id, game in games.items() if game is None]
+        if not missing_chat_ids:
+            return games
+
+        statement = self.get_games_rows_statement().where(GameModel.chat_id.in_(missing_chat_ids))
+        rows = await self.database.execute_statement_rows(statement=statement)
+        for game in self.build_games_dataclasses(rows=rows).values():
+            games[game.chat_id] = game
+            self.cache.put(game=game)
+        self.prefetch_queries += 1
+        return games
+
+    async def warm_up_cache(self, is_own_chat: Optional[Callable[[int], bool]] = None) -> None:
+        statement = self.get_games_rows_statement().where(GameModel.bot_state != DELETED_STATE)
+        rows = await self.database.execute_statement_rows(statement=statement)
+
+        for game in self.build_games_dataclasses(rows=rows).values():
+            if is_own_chat is None or is_own_chat(game.chat_id):
+                self.cache.put(game=game)
+
+    @staticmethod
+    def get_games_rows_statement() -> Select:
+        # one row per player (or a single row with NULL player columns if there are no players)
+        return (
+            select(
+                GameModel.chat_id,
+                GameModel.bot_state,
+                GameModel.current_round,
+                AccountModel.vote,
+                AccountModel.scores,
+                AccountModel.photo_num,
+                AccountModel.match_num,
+                UserModel.id,
+                UserModel.username,
+                UserModel.profile_photo_id,
+                UserModel.wins,
+                UserModel.total_games,
+                UserModel.efficiency,
+                UserModel.first_name,
+                UserModel.last_name,
+            )
+            .outerjoin(AccountModel, AccountModel.game_id == GameModel.chat_id)
+            .outerjoin(UserModel, UserModel.id == AccountModel.user_id)
+        )
+
+    @staticmethod
+    def build_games_dataclasses(rows: List[Row]) -> Dict[int, Game]:
+        games = dict()
+        for (
+            chat_id,
+            bot_state,
+            current_round,
+            vote,
+            scores,
+            photo_num,
+            match_num,
+            user_id,
+            username,
+            profile_photo_id,
+            wins,
+            total_games,
+            efficiency,
+            first_name,
+            last_name,
+        ) in rows:
+            game = games.get(chat_id)
+            if game is None:
+                game = games[chat_id] = Game(
+                    chat_id=chat_id,
+                    bot_state=bot_state,
+                    current_round=current_round,
+                    players=[],
+                    accounts=[],
+                )
 
-        statement_account = select(AccountModel).where(AccountModel.game_id == chat_id)
-        account_models_list = await self.database.execute_statement_scalars(statement=statement_account)
-        accounts = [account_model.dataclass for account_model in account_models_list]
+            if user_id is not None:
+                game.add_player(
+                    user=User(
+                        id=user_id,
+                        username=username,
+                        profile_photo_id=profile_photo_id,
+                        wins=wins,
+                        total_games=total_games,
+                        efficiency=efficiency,
+                        first_name=first_name,
+                        last_name=last_name,
+                    ),
+                    account=Account(
+                        user_id=user_id,
+                        game_id=chat_id,
+                        vote=vote,
+                        scores=scores,
+                        photo_num=photo_num,
+                        match_num=match_num,
+                    ),
+                )
 
-        return game_models_list[0].transform_to_dataclass(accounts=accounts) if game_models_list else None
+        return games
 
     async def get_all_users(self) -> List[Optional[User]]:
         statement = select(UserModel).order_by(desc(UserModel.efficiency))
@@ -162,21 +471,43 @@ class BotAccessor:
 
         return [user_model.dataclass for user_model in user_models_list]
 
-    def can_player_vote(self, game: Game, chat_id: int, user_id: int) -> bool:
-        if user_id not in self.get_players_ids(players=game.players):
+    @staticmethod
+    def can_player_vote(game: Game, chat_id: int, user_id: int) -> bool:
+        player_account = game.accounts_by_user_id.get(user_id)
+        if player_account is None or player_account.game_id != chat_id:
             return False
-
-        player_account = tuple(
-            filter(
-                lambda account: account.user_id == user_id and account.game_id == chat_id,
-                game.accounts,
-            )
-        )[0]
         return not player_account.vote
 
     @staticmethod
-    def get_players_ids(players: list) -> List[int]:
-        return [player.id for player in players]
+    def is_player(game: Game, user_id: int) -> bool:
+        return user_id in game.players_by_id
+
+    async def is_registered(self, game: Game | GameState, user_id: int) -> bool:
+        if isinstance(game, Game):  # a cached full game has the players
+            return self.is_player(game=game, user_id=user_id)
+
+        statement = select(exists().where(AccountModel.game_id == game.chat_id, AccountModel.user_id == user_id))
+        return (await self.database.execute_statement_scalars(statement=statement))[0]
+
+    @staticmethod
+    def pair_players(players: List[User]) -> Tuple[List[Tuple[User, User]], Optional[User]]:
+        # random pairs of all players and the player left without a pair if their number is odd
+        shuffled_players = sample(players, len(players))
+        matches = list(zip(shuffled_players[0::2], shuffled_players[1::2]))
+        bye_player = shuffled_players[-1] if len(shuffled_players) % 2 else None
+        return matches, bye_player
+
+    @staticmethod
+    def choose_match_winners(game: Game) -> Tuple[List[int], List[int]]:
+        # (winners, losers) ids of the bracket matches, a draw is settled by lot
+        winners, losers = [], []
+        for match_accounts in game.match_accounts.values():
+            if not match_accounts:
+                continue
+            winner = max(sample(match_accounts, len(match_accounts)), key=lambda account: account.scores)
+            winners.append(winner.user_id)
+            losers.extend(account.user_id for account in match_accounts if account is not winner)
+        return winners, losers
 
     @staticmethod
     def can_players_start_game(game: Game) -> bool:
@@ -185,8 +516,15 @@ class BotAccessor:
 
     @staticmethod
     def are_all_players_vote(game: Game) -> bool:
-        who_votes = tuple(filter(lambda account: account.vote, game.accounts))
-        return len(who_votes) == len(game.accounts)
+        return game.voted_num == len(game.accounts)
+
+    @staticmethod
+    def get_matches_num(game: Game) -> int:
+        return sum(1 for match_accounts in game.match_accounts.values() if match_accounts)
+
+    @staticmethod
+    def get_match_quorum(game: Game) -> int:
+        return len(game.accounts) // 2 + 1  # a majority of the voters, all of them in a game of two
 
     @staticmethod
     def get_whole_game_winner(game: Game) -> Optional[User]:
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional, Tuple
+
+from bot.models import Game
+from bot.worker.dataclasses import CacheStatistics
+
+
+class GameCache:
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl  # seconds of chat idleness
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._games: OrderedDict[int, Tuple[float, Game]] = OrderedDict()  # least recently used first
+
+    def get(self, chat_id: int) -> Optional[Game]:
+        game = self.peek(chat_id=chat_id)
+        if game is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._games[chat_id] = (monotonic(), game)
+        self._games.move_to_end(chat_id)
+        return game
+
+    def peek(self, chat_id: int) -> Optional[Game]:
+        # the game for write-through updates, hit/miss counters and LRU order are not touched
+        cached = self._games.get(chat_id)
+        if cached is None:
+            return None
+
+        used_at, game = cached
+        if monotonic() - used_at > self.ttl:
+            del self._games[chat_id]
+            self.evictions += 1
+            return None
+
+        return game
+
+    def put(self, game: Game) -> None:
+        self._games[game.chat_id] = (monotonic(), game)
+        self._games.move_to_end(game.chat_id)
+        self._evict()
+
+    def invalidate(self, chat_id: Optional[int] = None) -> None:
+        if chat_id is None:
+            self._games.clear()
+        else:
+            self._games.pop(chat_id, None)
+
+    def _evict(self) -> None:
+        expired_at = monotonic() - self.ttl
+        while self._games:
+            used_at, _ = next(iter(self._games.values()))
+            if len(self._games) <= self.max_size and used_at >= expired_at:
+                break
+            self._games.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return CacheStatistics(size=len(self._games), hits=self.hits, misses=self.misses, evictions=self.evictions)
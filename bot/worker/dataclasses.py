@@ -0,0 +1,36 @@
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass
+class CacheStatistics:
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+@dataclass
+class RoundTimeout:  # queued to the chat shard by the round timer, handled in order with the chat updates
+    chat_id: int
+    current_round: int
+
+
+@dataclass
+class BatchStatistics:
+    batches: int
+    updates: int
+    max_batch_size: int
+    total_wait: float  # time spent collecting the batches
+    prefetch_queries: int  # bulk game loads
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.updates / self.batches if self.batches else 0.0
+
+
+@dataclass
+class ProjectionStatistics:
+    updates: Dict[str, int]  # projection -> updates routed with it
+    queries: Dict[str, int]  # projection -> single game loads that have reached the database
+    skipped: int  # updates without a handler, dropped before any query
@@ -1,21 +1,33 @@
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 from bot.keyboard.keyboards import (
+    BRACKET_VOTE_CALLBACK,
     EXIT_CALLBACK,
     FINISH_REGISTRATION_CALLBACK,
     FINISH_ROUND_CALLBACK,
     FIRST_PHOTO_CALLBACK,
     NEXT_ROUND_CALLBACK,
+    PLAY_BRACKET_CALLBACK,
     PLAY_ROUND_CALLBACK,
     SECOND_PHOTO_CALLBACK,
     START_REGISTRATION_CALLBACK,
     STATISTICS_CALLBACK,
     USER_REGISTER_CALLBACK,
+    get_callback_name,
 )
 from bot.keyboard.menu import HELP_COMMAND, START_COMMAND
-from bot.models import Game
+from bot.models import Game, GameState
 from bot.poller.dataclasses import BasicUpdate, UpdateObjCallback, UpdateObjMessage, UpdateObjMyChatMember
-from bot.worker.fsm import BEGINNING_STATE, FINISH_ROUND_STATE, GAMEPLAY_STATE, REGISTRATION_STATE, START_ROUND_STATE
+from bot.worker.dataclasses import RoundTimeout
+from bot.worker.fsm import (
+    BEGINNING_STATE,
+    BRACKET_ROUND_STATE,
+    FINISH_ROUND_STATE,
+    GAMEPLAY_STATE,
+    REGISTRATION_STATE,
+    START_ROUND_STATE,
+)
+from bot.worker.projection import PROJECTION_FULL, PROJECTION_NONE, PROJECTION_STATE
 from bot.worker.status import STATUS_LEFT, STATUS_MEMBER
 
 if TYPE_CHECKING:
@@ -41,6 +53,36 @@ class FilterUpdate:
             GAMEPLAY_STATE: self.worker.handle_gameplay_state,
             START_ROUND_STATE: self.worker.handle_start_round_state,
             FINISH_ROUND_STATE: self.worker.handle_finish_round_state,
+            BRACKET_ROUND_STATE: self.worker.handle_start_round_state,
+        }
+
+        self.handlers_to_projections = {
+            self.worker.handle_status_member_update: PROJECTION_STATE,
+            self.worker.handle_status_left_update: PROJECTION_FULL,
+            self.worker.handle_help_update: PROJECTION_NONE,
+            self.worker.handle_beginning_state: PROJECTION_STATE,
+            self.worker.handle_registration_state: PROJECTION_FULL,
+            self.worker.handle_gameplay_state: PROJECTION_STATE,
+            self.worker.handle_start_round_state: PROJECTION_STATE,
+            self.worker.handle_finish_round_state: PROJECTION_STATE,
+            self.worker.handle_start_registration_callback: PROJECTION_FULL,
+            self.worker.handle_statistics_callback: PROJECTION_NONE,
+            self.worker.handle_user_register_callback: PROJECTION_FULL,
+            self.worker.handle_finish_registration_callback: PROJECTION_FULL,
+            self.worker.handle_play_round_callback: PROJECTION_FULL,
+            self.worker.handle_first_photo_callback: PROJECTION_FULL,
+            self.worker.handle_second_photo_callback: PROJECTION_FULL,
+            self.worker.handle_finish_round_callback: PROJECTION_FULL,
+            self.worker.handle_next_round_callback: PROJECTION_FULL,
+            self.worker.handle_exit_callback: PROJECTION_STATE,
+            self.worker.handle_play_bracket_callback: PROJECTION_FULL,
+            self.worker.handle_bracket_vote_callback: PROJECTION_FULL,
+            self.worker.handle_round_timeout: PROJECTION_FULL,
+        }
+
+        # external data a handler needs, fetched before its transaction opens
+        self.handlers_to_preloads = {
+            self.worker.handle_user_register_callback: self.worker.load_user_profile_photos,
         }
 
         self.callbacks_to_handlers = {
@@ -54,10 +96,15 @@ class FilterUpdate:
             FINISH_ROUND_CALLBACK: self.worker.handle_finish_round_callback,
             NEXT_ROUND_CALLBACK: self.worker.handle_next_round_callback,
             EXIT_CALLBACK: self.worker.handle_exit_callback,
+            PLAY_BRACKET_CALLBACK: self.worker.handle_play_bracket_callback,
+            BRACKET_VOTE_CALLBACK: self.worker.handle_bracket_vote_callback,
         }
 
     @staticmethod
-    def get_current_chat_id(update: Optional[BasicUpdate]) -> int:
+    def get_current_chat_id(update: Optional[BasicUpdate | RoundTimeout]) -> int:
+        if isinstance(update, RoundTimeout):
+            return update.chat_id
+
         if isinstance(update, UpdateObjMyChatMember):
             return update.my_chat_member.chat.id
 
@@ -67,17 +114,58 @@ class FilterUpdate:
         if isinstance(update, UpdateObjMessage):
             return update.message.chat.id
 
-    def filter_incoming_update(self, update: Optional[BasicUpdate], game: Optional[Game]) -> classmethod:
+    def get_route_projection(self, update: Optional[BasicUpdate | RoundTimeout]) -> Optional[str]:
+        # what the routing needs from the database, None if no handler can match: known before any query
+        if isinstance(update, RoundTimeout):
+            return self.handlers_to_projections[self.worker.handle_round_timeout]
+
+        if isinstance(update, UpdateObjMyChatMember):
+            handler = self.status_to_handlers.get(update.my_chat_member.new_chat_member.status)
+            return self.handlers_to_projections[handler] if handler else None
+
+        if isinstance(update, UpdateObjCallback):
+            handler = self.get_callback_handler(update=update)
+            return self.handlers_to_projections[handler] if handler else None
+
+        if isinstance(update, UpdateObjMessage):
+            if update.message.text is not None:
+                if START_COMMAND.command in update.message.text:
+                    return PROJECTION_STATE  # the handler depends on the bot state
+
+                if HELP_COMMAND.command in update.message.text:
+                    return self.handlers_to_projections[self.commands_to_handlers[HELP_COMMAND.command]]
+
+    def get_route_preload(self, update: Optional[BasicUpdate | RoundTimeout]) -> Optional[Callable]:
+        if isinstance(update, UpdateObjCallback):  # only callbacks know the handler before the game is loaded
+            handler = self.get_callback_handler(update=update)
+            return self.get_handler_preload(handler=handler) if handler else None
+
+    def get_handler_preload(self, handler: Callable) -> Optional[Callable]:
+        return self.handlers_to_preloads.get(handler)
+
+    def get_callback_handler(self, update: UpdateObjCallback) -> Optional[Callable]:
+        # the callback data may carry an argument after the callback name
+        return self.callbacks_to_handlers.get(get_callback_name(callback_data=update.callback_query.data or ""))
+
+    def get_handler_projection(self, handler: Callable) -> str:
+        return self.handlers_to_projections[handler]
+
+    def filter_incoming_update(
+        self, update: Optional[BasicUpdate | RoundTimeout], game: Optional[Game | GameState]
+    ) -> Optional[Callable]:
+        if isinstance(update, RoundTimeout):
+            return self.worker.handle_round_timeout
+
         if isinstance(update, UpdateObjMyChatMember):
             return self.status_to_handlers.get(update.my_chat_member.new_chat_member.status)
 
         if isinstance(update, UpdateObjCallback):
-            return self.callbacks_to_handlers.get(update.callback_query.data)
+            return self.get_callback_handler(update=update)
 
         if isinstance(update, UpdateObjMessage):
             if update.message.text is not None:
                 if START_COMMAND.command in update.message.text:
-                    return self.states_to_handlers.get(game.bot_state)
+                    return self.states_to_handlers.get(game.bot_state) if game else None
 
                 if HELP_COMMAND.command in update.message.text:
                     return self.commands_to_handlers.get(HELP_COMMAND.command)
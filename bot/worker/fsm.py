@@ -4,3 +4,4 @@ REGISTRATION_STATE = "registration"
 GAMEPLAY_STATE = "gameplay"
 START_ROUND_STATE = "start_round"
 FINISH_ROUND_STATE = "finish_round"
+BRACKET_ROUND_STATE = "bracket_round"
@@ -0,0 +1,5 @@
+PROJECTION_NONE = "none"  # the handler needs only the update
+PROJECTION_STATE = "state"  # chat_id, bot_state and current_round of the game
+PROJECTION_FULL = "full"  # the game with players and accounts
+
+PROJECTIONS = (PROJECTION_NONE, PROJECTION_STATE, PROJECTION_FULL)
@@ -1,6 +1,11 @@
-from asyncio import CancelledError, Queue, Task, create_task, gather, sleep
+from asyncio import CancelledError, Queue, QueueEmpty, Task, TimeoutError, create_task, gather, wait_for
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from functools import partial
 from random import sample
-from typing import List, Optional
+from time import perf_counter
+from traceback import print_exc
+from typing import Callable, Dict, List, Optional, Tuple
 
 from bot.keyboard.keyboards import (
     BEGINNING_KEYBOARD,
@@ -11,22 +16,39 @@ from bot.keyboard.keyboards import (
     NEXT_ROUND_KEYBOARD,
     REGISTRATION_KEYBOARD,
     SECOND_PHOTO_KEYBOARD,
+    build_bracket_vote_keyboard,
+    get_callback_argument,
 )
 from bot.keyboard.lexicon_ru import LEXICON_RU
-from bot.models import Game, User
-from bot.poller.dataclasses import UpdateObjCallback, UpdateObjMessage, UpdateObjMyChatMember
-from bot.sender.dataclasses import AnswerCallbackQueryObj, EditMessageTextObj, SendMessageObj, SendPhotoObj
+from bot.models import Game, GameState, User
+from bot.poller.dataclasses import BasicUpdate, UpdateObjCallback, UpdateObjMessage, UpdateObjMyChatMember
+from bot.poller.update_journal import UpdateJournal
+from bot.sender.dataclasses import (
+    AnswerCallbackQueryObj,
+    BasicMessage,
+    EditMessageTextObj,
+    PhotoSize,
+    SendMessageObj,
+    SendPhotoObj,
+)
+from bot.sender.queue import PriorityMessageQueue
 from bot.sender.sender import Sender
+from bot.sharding import ShardedQueues, ShardStatistics
+from bot.timer import RoundTimer
 from bot.worker.accessor import BotAccessor
+from bot.worker.cache import GameCache
+from bot.worker.dataclasses import BatchStatistics, ProjectionStatistics, RoundTimeout
 from bot.worker.filter import FilterUpdate
 from bot.worker.fsm import (
     BEGINNING_STATE,
+    BRACKET_ROUND_STATE,
     DELETED_STATE,
     FINISH_ROUND_STATE,
     GAMEPLAY_STATE,
     REGISTRATION_STATE,
     START_ROUND_STATE,
 )
+from bot.worker.projection import PROJECTION_FULL, PROJECTION_NONE, PROJECTION_STATE, PROJECTIONS
 from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
 from database.database import Database
 
@@ -35,48 +57,210 @@ class Worker:
     def __init__(
         self,
         database: Database,
+        game_cache: GameCache,
         sender: Sender,
         bot_id: int,
         update_queue: Queue,
-        message_queue: Queue,
+        message_queue: PriorityMessageQueue,
         workers_qty: int,
+        update_journal: Optional[UpdateJournal] = None,
+        batch_size: int = 1,
+        batch_wait: float = 0.005,
+        round_timer: Optional[RoundTimer] = None,
+        round_timeout: float = 0.0,
     ):
-        self.accessor: BotAccessor = BotAccessor(database=database)
+        self.accessor: BotAccessor = BotAccessor(database=database, cache=game_cache)
         self.sender = sender
         self.bot_id = bot_id
         self.filter: FilterUpdate = FilterUpdate(worker=self)
         self.update_queue = update_queue
         self.message_queue = message_queue
         self.workers_qty = workers_qty
+        self.update_journal = update_journal
+        self.batch_size = batch_size  # updates of a shard handled after one bulk game load, 1 disables batching
+        self.batch_wait = batch_wait  # seconds to wait for a batch to fill
+        self.round_timer = round_timer
+        self.round_timeout = round_timeout  # seconds, 0 disables closing rounds by the timer
+        self.batches: int = 0
+        self.batched_updates: int = 0
+        self.max_batch_size: int = 0
+        self.total_batch_wait: float = 0.0
+        self.projection_updates: Dict[str, int] = {projection: 0 for projection in PROJECTIONS}
+        self.skipped_updates: int = 0
+        self.shards: ShardedQueues = ShardedQueues(shards_qty=workers_qty)  # updates of one chat in one shard
         self.is_running: bool = False
         self._tasks: List[Task] = list()
+        # messages of the handler in a transaction, queued after the commit
+        self._pending_messages: ContextVar[Optional[List[BasicMessage]]] = ContextVar("pending_messages", default=None)
+        # in-memory changes of the handler in a transaction, e.g. of the round timer, applied after the commit
+        self._pending_changes: ContextVar[Optional[List[Callable[[], None]]]] = ContextVar(
+            "pending_changes", default=None
+        )
 
     def start(self):
         self.is_running = True
-        self._tasks = [create_task(self._work()) for _ in range(self.workers_qty)]
+        self._tasks = [create_task(self._dispatch())]
+        self._tasks.extend([create_task(self._work(shard_index=index)) for index in range(self.workers_qty)])
 
-    async def _work(self):
+    async def _dispatch(self):
         while self.is_running:
             update = await self.update_queue.get()
             chat_id = self.filter.get_current_chat_id(update=update)
-            game = await self.accessor.get_game_dataclass(chat_id=chat_id)  # Game or None
-            handler = self.filter.filter_incoming_update(update=update, game=game)
+            await self.shards.put(key=chat_id, item=update)
+            self.update_queue.task_done()
 
-            if handler:
-                await handler(update=update, game=game)
+    async def _work(self, shard_index: int):
+        while self.is_running:
+            batch = await self.get_batch(shard_index=shard_index)
+            projections = [self.filter.get_route_projection(update=update) for _, update in batch]
+            games = dict()
+            full_chat_ids = self.get_prefetch_chat_ids(batch=batch, projections=projections)
+            if len(full_chat_ids) > 1:
+                try:
+                    games = await self.accessor.get_games_dataclasses(chat_ids=full_chat_ids)
+                except Exception as error:  # the games are loaded one by one then
+                    print(f"games of shard {shard_index} are not prefetched: {error!r}")
+
+            # one shard has all updates of a chat, so they stay ordered
+            for (enqueued_at, update), projection in zip(batch, projections):
+                self.count_projection(projection=projection)
+                try:
+                    if projection == PROJECTION_NONE:  # no game is needed, nothing to roll back
+                        handler = self.filter.filter_incoming_update(update=update, game=None)
+                        await handler(update=update, game=None)
+                    elif projection is not None:  # None: no handler, the database is not touched
+                        await self.handle_update(update=update, projection=projection, games=games)
+                except Exception as error:  # the transaction is rolled back, the shard goes on with the next update
+                    chat_id = self.filter.get_current_chat_id(update=update)
+                    print(f"update of chat {chat_id} is not handled: {error!r}")
+                    print_exc()
+                finally:
+                    games.pop(self.filter.get_current_chat_id(update=update), None)  # stale after any update
+                    # handled or failed, it is not replayed after a restart; round timeouts are not journaled
+                    if self.update_journal and isinstance(update, BasicUpdate):
+                        self.update_journal.ack(update_id=update.update_id)
+                    self.shards.task_done(shard_index=shard_index, enqueued_at=enqueued_at)
+
+    def get_prefetch_chat_ids(
+        self, batch: List[Tuple[float, BasicUpdate]], projections: List[Optional[str]]
+    ) -> List[int]:
+        # a later update of the chat may follow a change of its game, so only the first update gets a prefetched one
+        first_projections = dict()  # chat_id -> projection of its first update in the batch
+        for (_, update), projection in zip(batch, projections):
+            first_projections.setdefault(self.filter.get_current_chat_id(update=update), projection)
+        return [chat_id for chat_id, projection in first_projections.items() if projection == PROJECTION_FULL]
+
+    async def handle_update(self, update: BasicUpdate, projection: str, games: Dict[int, Optional[Game]]):
+        chat_id = self.filter.get_current_chat_id(update=update)
+        preload = self.filter.get_route_preload(update=update)
+        preloaded = await preload(update=update) if preload else dict()  # no connection is held meanwhile
+
+        messages, changes = list(), list()
+        token = self._pending_messages.set(messages)
+        changes_token = self._pending_changes.set(changes)
+        try:
+            async with self.accessor.transaction(chat_id=chat_id):
+                if chat_id in games:  # prefetched games are fresh for the first update of their chat only
+                    game = games.pop(chat_id)
+                elif projection == PROJECTION_STATE:
+                    game = await self.accessor.get_game_state(chat_id=chat_id)  # Game, GameState or None
+                else:
+                    game = await self.accessor.get_game_dataclass(chat_id=chat_id)  # Game or None
+                handler = self.filter.filter_incoming_update(update=update, game=game)
+
+                if handler:
+                    if isinstance(game, GameState) and self.filter.get_handler_projection(handler) == PROJECTION_FULL:
+                        game = await self.accessor.get_game_dataclass(chat_id=chat_id)  # the state selects this handler
+                    await handler(update=update, game=game, **preloaded)
+        finally:
+            self._pending_messages.reset(token)
+            self._pending_changes.reset(changes_token)
+
+        for change in changes:  # the timers follow the committed round deadlines only
+            change()
+
+        # after the commit, so rolled back changes are not announced; a crash right before this loses the messages
+        if messages:
+            await self.message_queue.put_many(messages)
+
+    def apply_after_commit(self, change: Callable[[], None]) -> None:
+        changes = self._pending_changes.get()
+        if changes is None:  # not in a transaction
+            change()
+        else:
+            changes.append(change)
 
-            self.update_queue.task_done()
+    async def put_message(self, message: BasicMessage) -> None:
+        messages = self._pending_messages.get()
+        if messages is None:  # not in a transaction
+            await self.message_queue.put(message)
+        else:
+            messages.append(message)
+
+    def count_projection(self, projection: Optional[str]) -> None:
+        if projection is None:
+            self.skipped_updates += 1
+        else:
+            self.projection_updates[projection] += 1
+
+    async def get_batch(self, shard_index: int) -> List[Tuple[float, BasicUpdate]]:
+        batch = [await self.shards.get(shard_index=shard_index)]
+        started_at = perf_counter()
+        deadline = started_at + self.batch_wait
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.shards.get_nowait(shard_index=shard_index))
+                continue
+            except QueueEmpty:
+                pass
+
+            timeout = deadline - perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await wait_for(self.shards.get(shard_index=shard_index), timeout=timeout))
+            except TimeoutError:
+                break
+
+        self.batches += 1
+        self.batched_updates += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.total_batch_wait += perf_counter() - started_at
+        return batch
+
+    @property
+    def batch_statistics(self) -> BatchStatistics:
+        return BatchStatistics(
+            batches=self.batches,
+            updates=self.batched_updates,
+            max_batch_size=self.max_batch_size,
+            total_wait=self.total_batch_wait,
+            prefetch_queries=self.accessor.prefetch_queries,
+        )
+
+    @property
+    def projection_statistics(self) -> ProjectionStatistics:
+        return ProjectionStatistics(
+            updates=dict(self.projection_updates),
+            queries=dict(self.accessor.projection_queries),
+            skipped=self.skipped_updates,
+        )
+
+    @property
+    def shards_statistics(self) -> List[ShardStatistics]:
+        return self.shards.statistics
 
     async def handle_status_member_update(self, update: UpdateObjMyChatMember, game: Optional[Game]) -> None:
         if update.my_chat_member.new_chat_member.user.id == self.bot_id:
             chat_id = update.my_chat_member.chat.id
             message = SendMessageObj(chat_id=chat_id, text=LEXICON_RU["member"])
             if not game:
-                await gather(self.accessor.create_game_model(chat_id=chat_id), self.message_queue.put(message))
+                await gather(self.accessor.create_game_model(chat_id=chat_id), self.put_message(message))
             else:
                 await gather(
                     self.accessor.change_current_bot_state(chat_id=chat_id, new_bot_state=BEGINNING_STATE),
-                    self.message_queue.put(message),
+                    self.put_message(message),
                 )
 
     async def handle_status_left_update(self, update: UpdateObjMyChatMember, game: Optional[Game]):
@@ -86,7 +270,7 @@ class Worker:
                 await self.accessor.delete_all_current_players(chat_id=game.chat_id)
 
     async def handle_beginning_state(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(
+        await self.put_message(
             SendMessageObj(
                 chat_id=game.chat_id,
                 text=LEXICON_RU["beginning"],
@@ -95,7 +279,7 @@ class Worker:
         )
 
     async def handle_registration_state(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(
+        await self.put_message(
             SendMessageObj(
                 chat_id=game.chat_id,
                 text=LEXICON_RU["registration"].format(players_num=len(game.accounts)),
@@ -104,7 +288,7 @@ class Worker:
         )
 
     async def handle_gameplay_state(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(
+        await self.put_message(
             SendMessageObj(
                 chat_id=game.chat_id,
                 text=LEXICON_RU["gameplay"],
@@ -113,10 +297,10 @@ class Worker:
         )
 
     async def handle_start_round_state(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["start_round"]))
+        await self.put_message(SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["start_round"]))
 
     async def handle_finish_round_state(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(
+        await self.put_message(
             SendMessageObj(
                 chat_id=game.chat_id,
                 text=LEXICON_RU["next_round"],
@@ -125,12 +309,13 @@ class Worker:
         )
 
     async def handle_help_update(self, update: UpdateObjMessage, game: Optional[Game]):
-        await self.message_queue.put(SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["help"]))
+        chat_id = self.filter.get_current_chat_id(update=update)
+        await self.put_message(SendMessageObj(chat_id=chat_id, text=LEXICON_RU["help"]))
 
     async def handle_start_registration_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         await gather(
             self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=REGISTRATION_STATE),
-            self.message_queue.put(
+            self.put_message(
                 SendMessageObj(
                     chat_id=game.chat_id,
                     text=LEXICON_RU["registration"].format(players_num=len(game.accounts)),
@@ -140,6 +325,7 @@ class Worker:
         )
 
     async def handle_statistics_callback(self, update: UpdateObjCallback, game: Optional[Game]):
+        chat_id = self.filter.get_current_chat_id(update=update)
         users_all_desc = await self.accessor.get_all_users()
 
         if users_all_desc:
@@ -154,69 +340,77 @@ class Worker:
                     for user in users_all_desc
                 ]
             )
-            await self.message_queue.put(
-                SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["statistics"].format(table=table))
-            )
+            await self.put_message(SendMessageObj(chat_id=chat_id, text=LEXICON_RU["statistics"].format(table=table)))
         else:
-            await self.message_queue.put(SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["no statistics"]))
-
-    async def handle_user_register_callback(self, update: UpdateObjCallback, game: Optional[Game]):
-        if game.bot_state == REGISTRATION_STATE:
-            message_id = update.callback_query.message.message_id
-            user_id = update.callback_query.from_.id
-            username = update.callback_query.from_.username
-            first_name = update.callback_query.from_.first_name
-            last_name = update.callback_query.from_.last_name
-
-            profile_photos = await self.sender.tg_client.get_user_profile_photos(user_id=user_id, offset=0)
-
-            if not profile_photos:
-                await self.message_queue.put(
-                    SendMessageObj(
-                        chat_id=game.chat_id,
-                        text=LEXICON_RU["no_user_profile_photo"].format(username=username),
-                    )
+            await self.put_message(SendMessageObj(chat_id=chat_id, text=LEXICON_RU["no statistics"]))
+
+    async def load_user_profile_photos(self, update: UpdateObjCallback) -> dict:
+        # only for a click which can register the user, the game state is cheaper than the Bot API call
+        user_id = update.callback_query.from_.id
+        game = await self.accessor.get_game_state(chat_id=self.filter.get_current_chat_id(update=update))
+        if game is None or game.bot_state != REGISTRATION_STATE:
+            return dict()
+        if await self.accessor.is_registered(game=game, user_id=user_id):
+            return dict()
+        return dict(profile_photos=await self.sender.tg_client.get_user_profile_photos(user_id=user_id, offset=0))
+
+    async def handle_user_register_callback(
+        self, update: UpdateObjCallback, game: Optional[Game], profile_photos: Optional[List[List[PhotoSize]]] = None
+    ):
+        user_id = update.callback_query.from_.id
+        if game is None or game.bot_state != REGISTRATION_STATE or self.accessor.is_player(game=game, user_id=user_id):
+            return
+        if profile_photos is None:  # the registration has started after the click was checked
+            return
+
+        message_id = update.callback_query.message.message_id
+        username = update.callback_query.from_.username
+        first_name = update.callback_query.from_.first_name
+        last_name = update.callback_query.from_.last_name
+
+        if not profile_photos:
+            await self.put_message(
+                SendMessageObj(
+                    chat_id=game.chat_id,
+                    text=LEXICON_RU["no_user_profile_photo"].format(username=username),
                 )
-                return
-
-            profile_photo_id = profile_photos[0][0].file_id
-            await self.accessor.create_user_model_if_not_exists(
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                last_name=last_name,
-                profile_photo_id=profile_photo_id,
             )
+            return
 
-            if user_id not in self.accessor.get_players_ids(players=game.players):
-                await gather(
-                    self.accessor.register_player(chat_id=game.chat_id, user_id=user_id),
-                    self.message_queue.put(
-                        EditMessageTextObj(
-                            chat_id=game.chat_id,
-                            message_id=message_id,
-                            text=LEXICON_RU["registration"].format(players_num=len(game.accounts) + 1),
-                            keyboard=REGISTRATION_KEYBOARD,
-                        )
-                    ),
+        profile_photo_id = profile_photos[0][0].file_id
+        user = await self.accessor.create_user_model_if_not_exists(
+            user_id=user_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            profile_photo_id=profile_photo_id,
+        )
+        await gather(
+            self.accessor.register_player(chat_id=game.chat_id, user=user),
+            self.put_message(
+                EditMessageTextObj(
+                    chat_id=game.chat_id,
+                    message_id=message_id,
+                    text=LEXICON_RU["registration"].format(players_num=len(game.accounts) + 1),
+                    keyboard=REGISTRATION_KEYBOARD,
                 )
+            ),
+        )
 
-                # AnswerCallbackQueryObj(
-                #     callback_query_id=update.callback_query.id,
-                #     text=LEXICON_RU["user_register_answer"].format(username=username),
-                # )
+        # AnswerCallbackQueryObj(
+        #     callback_query_id=update.callback_query.id,
+        #     text=LEXICON_RU["user_register_answer"].format(username=username),
+        # )
 
     async def handle_finish_registration_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         if not self.accessor.can_players_start_game(game=game):
-            await self.message_queue.put(
-                SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["no_finish_registration"])
-            )
+            await self.put_message(SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["no_finish_registration"]))
             return
 
         await self.accessor.increment_users_total_games(game=game)  # who have registered
         await gather(
             self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=GAMEPLAY_STATE),
-            self.message_queue.put(
+            self.put_message(
                 SendMessageObj(
                     chat_id=game.chat_id,
                     text=LEXICON_RU["gameplay"],
@@ -227,11 +421,9 @@ class Worker:
 
     async def handle_play_round_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         message_id = update.callback_query.message.message_id
-        # in case of timer mechanics:
-        # current_round = game.current_round
 
         await gather(
-            self.message_queue.put(
+            self.put_message(
                 EditMessageTextObj(
                     chat_id=game.chat_id,
                     message_id=message_id,
@@ -240,6 +432,7 @@ class Worker:
             ),
             self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=START_ROUND_STATE),
         )
+        await self.accessor.reset_votes_num(chat_id=game.chat_id)
 
         player_first, player_second = sample(game.players, 2)  # User
         await gather(
@@ -247,22 +440,17 @@ class Worker:
                 chat_id=game.chat_id, player_first=player_first, player_second=player_second
             ),
             *[
-                self.message_queue.put(SendPhotoObj(chat_id=game.chat_id, photo=file_id, keyboard=photo_keyboard))
+                self.put_message(SendPhotoObj(chat_id=game.chat_id, photo=file_id, keyboard=photo_keyboard))
                 for file_id, photo_keyboard in zip(
                     (player_first.profile_photo_id, player_second.profile_photo_id),
                     (FIRST_PHOTO_KEYBOARD, SECOND_PHOTO_KEYBOARD),
                 )
             ],
-            self.message_queue.put(
+            self.put_message(
                 SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["finish_round"], keyboard=FINISH_ROUND_KEYBOARD)
             ),
         )
-
-        # in case of timer mechanics:
-        # await sleep(30)
-        # updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)  # Game
-        # if updated_game.current_round == current_round:
-        #     await self.choose_winner(game=updated_game)
+        await self.start_round_timer(game=game)
 
     async def handle_first_photo_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         if game.bot_state == START_ROUND_STATE:
@@ -277,8 +465,14 @@ class Worker:
     async def handle_photo_callback(self, update: UpdateObjCallback, game: Optional[Game], photo_num: str):
         user_id = update.callback_query.from_.id  # who voted
 
-        if not self.accessor.can_player_vote(game=game, chat_id=game.chat_id, user_id=user_id):
-            await self.message_queue.put(
+        remaining_voters = None  # None if the vote is not accepted
+        if self.accessor.can_player_vote(game=game, chat_id=game.chat_id, user_id=user_id):
+            remaining_voters = await self.accessor.vote_for_photo(
+                chat_id=game.chat_id, user_id=user_id, photo_num=photo_num
+            )
+
+        if remaining_voters is None:
+            await self.put_message(
                 AnswerCallbackQueryObj(
                     callback_query_id=update.callback_query.id,
                     text=LEXICON_RU["no_chance_to_vote"],
@@ -286,30 +480,102 @@ class Worker:
             )
             return
 
-        await gather(
-            self.message_queue.put(
-                AnswerCallbackQueryObj(
-                    callback_query_id=update.callback_query.id,
-                    text=LEXICON_RU["success_vote"],
-                )
-            ),
-            self.accessor.set_player_voted(chat_id=game.chat_id, user_id=user_id),  # for player who voted
+        await self.put_message(
+            AnswerCallbackQueryObj(
+                callback_query_id=update.callback_query.id,
+                text=LEXICON_RU["success_vote"],
+            )
         )
-        await self.accessor.increment_player_score(game=game, photo_num=photo_num)  # for player who play in round
 
-        updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)  # Game
-        if self.accessor.are_all_players_vote(game=updated_game):
+        if remaining_voters == 0:
+            updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)  # Game
             await self.choose_winner(game=updated_game)
 
     async def handle_finish_round_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         if game.bot_state == START_ROUND_STATE:
             await self.choose_winner(game=game)
+        elif game.bot_state == BRACKET_ROUND_STATE:
+            await self.choose_match_winners(game=game)
+
+    async def handle_play_bracket_callback(self, update: UpdateObjCallback, game: Optional[Game]):
+        # all players are paired at once, the matches of the round are voted concurrently
+        if game.bot_state != GAMEPLAY_STATE or len(game.players) < 2:
+            return
+
+        message_id = update.callback_query.message.message_id
+        matches, bye_player = self.accessor.pair_players(players=game.players)
+
+        await gather(
+            self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=BRACKET_ROUND_STATE),
+            self.put_message(
+                EditMessageTextObj(
+                    chat_id=game.chat_id,
+                    message_id=message_id,
+                    text=LEXICON_RU["bracket_round"].format(matches_num=len(matches)),
+                )
+            ),
+        )
+        await self.accessor.reset_votes_num(chat_id=game.chat_id)
+        await self.accessor.start_bracket_matches(chat_id=game.chat_id, matches=matches)
+
+        messages = [
+            SendPhotoObj(
+                chat_id=game.chat_id,
+                photo=player.profile_photo_id,
+                caption=LEXICON_RU["bracket_match"].format(match_num=match_num, username=player.username),
+                keyboard=build_bracket_vote_keyboard(user_id=player.id),
+            )
+            for match_num, pair in enumerate(matches, start=1)
+            for player in pair
+        ]
+        if bye_player:
+            messages.append(
+                SendMessageObj(
+                    chat_id=game.chat_id, text=LEXICON_RU["bracket_bye"].format(username=bye_player.username)
+                )
+            )
+        messages.append(
+            SendMessageObj(chat_id=game.chat_id, text=LEXICON_RU["finish_round"], keyboard=FINISH_ROUND_KEYBOARD)
+        )
+        await gather(*[self.put_message(message) for message in messages])
+        await self.start_round_timer(game=game)
+
+    async def handle_bracket_vote_callback(self, update: UpdateObjCallback, game: Optional[Game]):
+        if game.bot_state != BRACKET_ROUND_STATE:
+            return
+
+        user_id = update.callback_query.from_.id  # who voted
+        candidate_id = int(get_callback_argument(callback_data=update.callback_query.data) or 0)
+        candidate_account = game.accounts_by_user_id.get(candidate_id)
+
+        round_votes = None  # None if the vote is not accepted
+        if self.accessor.is_player(game=game, user_id=user_id) and candidate_account and candidate_account.match_num:
+            round_votes = await self.accessor.vote_in_match(
+                chat_id=game.chat_id, user_id=user_id, candidate_id=candidate_id, match_num=candidate_account.match_num
+            )
+
+        await self.put_message(
+            AnswerCallbackQueryObj(
+                callback_query_id=update.callback_query.id,
+                text=LEXICON_RU["no_chance_to_vote" if round_votes is None else "success_vote"],
+            )
+        )
+
+        quorum = self.accessor.get_match_quorum(game=game)
+        matches_num = self.accessor.get_matches_num(game=game)
+        if round_votes is None or round_votes < matches_num * quorum:  # some match lacks votes for sure
+            return
+
+        # every match has its quorum, an absent voter doesn't hold the round until the timer
+        if await self.accessor.count_decided_matches(chat_id=game.chat_id, quorum=quorum) == matches_num:
+            updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)
+            await self.choose_match_winners(game=updated_game)
 
     async def handle_next_round_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         await self.accessor.reset_to_default_accounts_parameters(game=game)
         await gather(
             self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=GAMEPLAY_STATE),
-            self.message_queue.put(
+            self.put_message(
                 SendMessageObj(
                     chat_id=game.chat_id,
                     text=LEXICON_RU["gameplay"],
@@ -320,11 +586,11 @@ class Worker:
 
     async def handle_exit_callback(self, update: UpdateObjCallback, game: Optional[Game]):
         await self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=BEGINNING_STATE)
-        # in case of timer mechanics:
-        # await self.accessor.reset_current_round(chat_id=game.chat_id)
+        await self.accessor.reset_current_round(chat_id=game.chat_id)
+        self.cancel_round_timer(chat_id=game.chat_id)
         await gather(
             self.accessor.delete_all_current_players(chat_id=game.chat_id),
-            self.message_queue.put(
+            self.put_message(
                 SendMessageObj(
                     chat_id=game.chat_id,
                     text=LEXICON_RU["beginning"],
@@ -335,26 +601,83 @@ class Worker:
 
     async def choose_winner(self, game: Optional[Game]):
         await self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=FINISH_ROUND_STATE)
-        # in case of timer mechanics:
-        # await self.accessor.increment_current_round(game=game)
+        await self.accessor.increment_current_round(game=game)
+        self.cancel_round_timer(chat_id=game.chat_id)
         winner_photo_num = await self.accessor.choose_winner_photo(game=game)
 
         updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)  # Game
         game_winner = self.accessor.get_whole_game_winner(game=updated_game)  # User
 
         if game_winner:
-            await self.accessor.change_current_bot_state(chat_id=updated_game.chat_id, new_bot_state=BEGINNING_STATE)
-            await self.accessor.increment_user_wins(user=game_winner)
-            await self.send_game_winner_message(chat_id=updated_game.chat_id, winner=game_winner)
-            await self.accessor.delete_all_current_players(chat_id=updated_game.chat_id)
+            await self.finish_game(chat_id=updated_game.chat_id, winner=game_winner)
             return
 
         await self.send_round_winner_message(chat_id=updated_game.chat_id, winner_photo_num=winner_photo_num)
 
+    async def choose_match_winners(self, game: Optional[Game]):
+        await self.accessor.change_current_bot_state(chat_id=game.chat_id, new_bot_state=FINISH_ROUND_STATE)
+        await self.accessor.increment_current_round(game=game)
+        self.cancel_round_timer(chat_id=game.chat_id)
+        _, losers_ids = self.accessor.choose_match_winners(game=game)
+        await self.accessor.remove_players(chat_id=game.chat_id, user_ids=losers_ids)
+
+        updated_game = await self.accessor.get_game_dataclass(chat_id=game.chat_id)  # Game
+        game_winner = self.accessor.get_whole_game_winner(game=updated_game)  # User
+
+        if game_winner:
+            await self.finish_game(chat_id=updated_game.chat_id, winner=game_winner)
+            return
+
+        winners = ", ".join(f"@{player.username}" for player in updated_game.players)  # with the bye player
+        await self.put_message(
+            SendMessageObj(
+                chat_id=updated_game.chat_id,
+                text=LEXICON_RU["bracket_results"].format(winners=winners),
+                keyboard=NEXT_ROUND_KEYBOARD,
+            )
+        )
+
+    async def start_round_timer(self, game: Game):
+        if self.round_timer is None or self.round_timeout <= 0:
+            return
+
+        round_deadline = datetime.now(tz=timezone.utc) + timedelta(seconds=self.round_timeout)
+        await self.accessor.set_round_deadline(chat_id=game.chat_id, round_deadline=round_deadline)
+        self.apply_after_commit(
+            partial(
+                self.round_timer.schedule,
+                chat_id=game.chat_id,
+                current_round=game.current_round,
+                deadline=round_deadline,
+            )
+        )
+
+    def cancel_round_timer(self, chat_id: int):
+        if self.round_timer:
+            self.apply_after_commit(partial(self.round_timer.cancel, chat_id=chat_id))
+
+    async def put_round_timeout(self, chat_id: int, current_round: int):
+        await self.shards.put(key=chat_id, item=RoundTimeout(chat_id=chat_id, current_round=current_round))
+
+    async def handle_round_timeout(self, update: RoundTimeout, game: Optional[Game]):
+        if game is None or game.current_round != update.current_round:
+            return  # the round has been closed before its deadline
+
+        if game.bot_state == START_ROUND_STATE:
+            await self.choose_winner(game=game)
+        elif game.bot_state == BRACKET_ROUND_STATE:
+            await self.choose_match_winners(game=game)
+
+    async def finish_game(self, chat_id: int, winner: User):
+        await self.accessor.change_current_bot_state(chat_id=chat_id, new_bot_state=BEGINNING_STATE)
+        await self.accessor.increment_user_wins(user=winner)
+        await self.send_game_winner_message(chat_id=chat_id, winner=winner)
+        await self.accessor.delete_all_current_players(chat_id=chat_id)
+
     async def send_round_winner_message(self, chat_id: int, winner_photo_num: str):
         await gather(
-            self.message_queue.put(SendMessageObj(chat_id=chat_id, text=LEXICON_RU[winner_photo_num])),
-            self.message_queue.put(
+            self.put_message(SendMessageObj(chat_id=chat_id, text=LEXICON_RU[winner_photo_num])),
+            self.put_message(
                 SendMessageObj(
                     chat_id=chat_id,
                     text=LEXICON_RU["next_round"],
@@ -364,7 +687,7 @@ class Worker:
         )
 
     async def send_game_winner_message(self, chat_id: int, winner: User):
-        await self.message_queue.put(
+        await self.put_message(
             SendMessageObj(
                 chat_id=chat_id,
                 text=LEXICON_RU["finish_game"].format(username=winner.username),
@@ -374,6 +697,7 @@ class Worker:
 
     async def stop(self):
         await self.update_queue.join()
+        await self.shards.join()
         self.is_running = False
 
         for task in self._tasks:
@@ -14,6 +14,11 @@ class DatabaseConfig:
     password: str = "postgres"
     database: str = "project"
     driver: str = "postgresql+asyncpg"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
 
 
 @dataclass
@@ -21,7 +26,22 @@ class TgBot:
     token: str
     id: int
     workers_qty: int
+    worker_batch_size: int = 1
+    worker_batch_wait: float = 0.005  # seconds
+    senders_qty: int = 1
+    global_rate_limit: float = 30.0  # messages per second
+    group_rate_limit: float = 20.0  # messages per minute in one group
+    coalesce_window: float = 0.5  # seconds to merge consecutive texts to one chat
     database: DatabaseConfig = None
+    cache_size: int = 10000
+    cache_ttl: float = 3600.0
+    processes_qty: int = 1
+    socket_path: str = "/tmp/photochallenge_bot.sock"
+    http_connections_limit: int = 100
+    http_keepalive_timeout: float = 60.0
+    http_dns_cache_ttl: int = 300
+    journal_dir: str = "journal"
+    round_timeout: float = 30.0  # seconds before a round is closed automatically, 0 disables the timer
 
 
 @dataclass
@@ -35,6 +55,21 @@ def setup_config() -> Config:
             token=os.getenv("BOT_TOKEN"),
             id=int(os.getenv("BOT_ID")),
             workers_qty=int(os.getenv("WORKERS")),
+            worker_batch_size=int(os.getenv("WORKER_BATCH_SIZE", 1)),
+            worker_batch_wait=float(os.getenv("WORKER_BATCH_WAIT", 0.005)),
+            senders_qty=int(os.getenv("SENDERS", 1)),
+            global_rate_limit=float(os.getenv("GLOBAL_RATE_LIMIT", 30.0)),
+            group_rate_limit=float(os.getenv("GROUP_RATE_LIMIT", 20.0)),
+            coalesce_window=float(os.getenv("COALESCE_WINDOW", 0.5)),
+            cache_size=int(os.getenv("GAME_CACHE_SIZE", 10000)),
+            cache_ttl=float(os.getenv("GAME_CACHE_TTL", 3600.0)),
+            processes_qty=int(os.getenv("PROCESSES", 1)),
+            socket_path=os.getenv("SOCKET_PATH", "/tmp/photochallenge_bot.sock"),
+            http_connections_limit=int(os.getenv("HTTP_CONNECTIONS_LIMIT", 100)),
+            http_keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60.0)),
+            http_dns_cache_ttl=int(os.getenv("HTTP_DNS_CACHE_TTL", 300)),
+            journal_dir=os.getenv("JOURNAL_DIR", "journal"),
+            round_timeout=float(os.getenv("ROUND_TIMEOUT", 30.0)),
             database=DatabaseConfig(
                 host=str(os.getenv("PG_HOST")),
                 port=str(os.getenv("PG_PORT")),
@@ -42,6 +77,11 @@ def setup_config() -> Config:
                 password=str(os.getenv("PG_PASSWORD")),
                 database=str(os.getenv("PG_DATABASE")),
                 driver=str(os.getenv("PG_DRIVER")),
+                pool_size=int(os.getenv("PG_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("PG_MAX_OVERFLOW", 10)),
+                pool_timeout=float(os.getenv("PG_POOL_TIMEOUT", 30.0)),
+                pool_recycle=int(os.getenv("PG_POOL_RECYCLE", 1800)),
+                pool_pre_ping=os.getenv("PG_POOL_PRE_PING", "true").lower() == "true",
             ),
         )
     )
@@ -53,6 +93,21 @@ def setup_config_tests() -> Config:
             token=os.getenv("BOT_TOKEN_TESTS"),
             id=int(os.getenv("BOT_ID_TESTS")),
             workers_qty=int(os.getenv("WORKERS")),
+            worker_batch_size=int(os.getenv("WORKER_BATCH_SIZE", 1)),
+            worker_batch_wait=float(os.getenv("WORKER_BATCH_WAIT", 0.005)),
+            senders_qty=int(os.getenv("SENDERS", 1)),
+            global_rate_limit=float(os.getenv("GLOBAL_RATE_LIMIT", 30.0)),
+            group_rate_limit=float(os.getenv("GROUP_RATE_LIMIT", 20.0)),
+            coalesce_window=float(os.getenv("COALESCE_WINDOW", 0.5)),
+            cache_size=int(os.getenv("GAME_CACHE_SIZE", 10000)),
+            cache_ttl=float(os.getenv("GAME_CACHE_TTL", 3600.0)),
+            processes_qty=int(os.getenv("PROCESSES", 1)),
+            socket_path=os.getenv("SOCKET_PATH", "/tmp/photochallenge_bot.sock"),
+            http_connections_limit=int(os.getenv("HTTP_CONNECTIONS_LIMIT", 100)),
+            http_keepalive_timeout=float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60.0)),
+            http_dns_cache_ttl=int(os.getenv("HTTP_DNS_CACHE_TTL", 300)),
+            journal_dir=os.getenv("JOURNAL_DIR", "journal"),
+            round_timeout=float(os.getenv("ROUND_TIMEOUT", 30.0)),
             database=DatabaseConfig(
                 host=str(os.getenv("PG_HOST_TESTS")),
                 port=str(os.getenv("PG_PORT_TESTS")),
@@ -60,6 +115,11 @@ def setup_config_tests() -> Config:
                 password=str(os.getenv("PG_PASSWORD_TESTS")),
                 database=str(os.getenv("PG_DATABASE_TESTS")),
                 driver=str(os.getenv("PG_DRIVER_TESTS")),
+                pool_size=int(os.getenv("PG_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("PG_MAX_OVERFLOW", 10)),
+                pool_timeout=float(os.getenv("PG_POOL_TIMEOUT", 30.0)),
+                pool_recycle=int(os.getenv("PG_POOL_RECYCLE", 1800)),
+                pool_pre_ping=os.getenv("PG_POOL_PRE_PING", "true").lower() == "true",
             ),
         )
     )
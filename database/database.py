@@ -1,11 +1,17 @@
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import AsyncIterator, List, Optional
 
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import Delete, Insert, Select, Update
 
 from config.config import DatabaseConfig
+from database.dataclasses import PoolStatistics
 from database.sqlalchemy_base import db
+from database.unit_of_work import UnitOfWork
 
 
 class Database:
@@ -15,10 +21,23 @@ class Database:
         self.engine: Optional[AsyncEngine] = None
         self.session: Optional[async_sessionmaker, AsyncSession] = None
         self.database_url = self.generate_pg_database_url()
+        self._waiting: int = 0
+        self._checkouts: int = 0
+        self._total_wait_time: float = 0.0
+        self._max_wait_time: float = 0.0
+        self._unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar("unit_of_work", default=None)
 
     async def connect(self, *_: list, **__: dict) -> None:
         self.db = db
-        self.engine = create_async_engine(self.database_url, future=True)
+        self.engine = create_async_engine(
+            self.database_url,
+            future=True,
+            pool_size=self.config.pool_size,
+            max_overflow=self.config.max_overflow,
+            pool_timeout=self.config.pool_timeout,
+            pool_recycle=self.config.pool_recycle,
+            pool_pre_ping=self.config.pool_pre_ping,
+        )
         self.session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
 
     async def disconnect(self, *_: list, **__: dict) -> None:
@@ -28,19 +47,89 @@ class Database:
             await self.engine.dispose()
             self.engine = None
 
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[UnitOfWork]:
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work:  # nested transaction joins the outer one
+            yield unit_of_work
+            return
+
+        async with self.session() as session:
+            await self.checkout_connection(session=session)
+            unit_of_work = UnitOfWork(session=session)
+            token = self._unit_of_work.set(unit_of_work)
+            try:
+                yield unit_of_work
+                await session.commit()
+            except BaseException:
+                await session.rollback()
+                raise
+            finally:
+                self._unit_of_work.reset(token)
+
     async def execute_statement(self, statement: Select | Insert | Update | Delete) -> None:
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work:
+            await unit_of_work.execute(statement)
+            return
+
         async with self.session() as session:
+            await self.checkout_connection(session=session)
             await session.execute(statement)
             await session.commit()
-        await self.engine.dispose()
 
     async def execute_statement_scalars(self, statement: Select | Insert | Update | Delete) -> List:
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work:
+            result = await unit_of_work.execute(statement)
+            return result.scalars().all()
+
         async with self.session() as session:
+            await self.checkout_connection(session=session)
             scalars = await session.scalars(statement)
             await session.commit()
-        await self.engine.dispose()
         return scalars.all()
 
+    async def execute_statement_rows(self, statement: Select | Insert | Update | Delete) -> List[Row]:
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work:
+            result = await unit_of_work.execute(statement)
+            return result.all()
+
+        async with self.session() as session:
+            await self.checkout_connection(session=session)
+            result = await session.execute(statement)
+            rows = result.all()
+            await session.commit()
+        return rows
+
+    async def checkout_connection(self, session: AsyncSession) -> None:
+        # the connection is taken from the pool explicitly to measure how long the statement has waited for it
+        self._waiting += 1
+        started_at = perf_counter()
+        try:
+            await session.connection()
+        finally:
+            wait_time = perf_counter() - started_at
+            self._waiting -= 1
+            self._checkouts += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+
+    @property
+    def pool_statistics(self) -> PoolStatistics:
+        pool = self.engine.pool if self.engine else None
+        return PoolStatistics(
+            size=pool.size() if pool else 0,
+            checked_in=pool.checkedin() if pool else 0,
+            checked_out=pool.checkedout() if pool else 0,
+            overflow=pool.overflow() if pool else 0,
+            waiting=self._waiting,
+            checkouts=self._checkouts,
+            total_wait_time=self._total_wait_time,
+            max_wait_time=self._max_wait_time,
+        )
+
     def generate_pg_database_url(self) -> str:
         return "{driver}://{user}:{password}@{host}/{db_name}".format(
             driver=self.config.driver,
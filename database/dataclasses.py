@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PoolStatistics:
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+    checkouts: int
+    total_wait_time: float
+    max_wait_time: float
+
+    @property
+    def average_wait_time(self) -> float:
+        return self.total_wait_time / self.checkouts if self.checkouts else 0.0
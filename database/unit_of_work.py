@@ -0,0 +1,19 @@
+from asyncio import Lock
+from typing import Any
+
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Delete, Insert, Select, Update
+
+
+class UnitOfWork:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.statements_qty: int = 0
+        # one session can't run statements concurrently, but handlers gather accessor calls
+        self._lock = Lock()
+
+    async def execute(self, statement: Select | Insert | Update | Delete) -> Result[Any]:
+        async with self._lock:
+            self.statements_qty += 1
+            return await self.session.execute(statement)
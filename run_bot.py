@@ -1,5 +1,6 @@
 from asyncio import get_event_loop
 
+from bot.cluster.cluster import TgBotCluster
 from bot.general import TgBot
 from config.config import Config, setup_config
 
@@ -9,7 +10,7 @@ def run_bot():
 
     loop = get_event_loop()
 
-    tg_bot = TgBot(config=config)
+    tg_bot = TgBot(config=config) if config.tg_bot.processes_qty == 1 else TgBotCluster(config=config)
 
     try:
         loop.create_task(tg_bot.start_bot())
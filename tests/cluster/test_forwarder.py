@@ -0,0 +1,68 @@
+from asyncio import Queue, open_unix_connection, wait_for
+
+from aiohttp import ClientConnectionError
+
+from bot.cluster.forwarder import UpdateForwarder
+from bot.cluster.receiver import UpdateReceiver
+from bot.cluster.transport import write_frame
+from bot.http_session import TgBotApiSession
+from bot.poller.update_journal import UpdateJournal
+
+RAW_UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "from": {"id": 1, "first_name": "first_name", "username": "username"},
+        "chat": {"id": -123, "title": "Photo_Bot_Test", "type": "group"},
+        "text": "/start",
+    },
+}
+
+
+class TestUpdateForwarder:
+    async def test_updates_are_journaled_before_forward_returns(self, tmp_path):
+        socket_path = str(tmp_path / "bot.sock")
+        forwarder = UpdateForwarder(
+            token="token", http_session=TgBotApiSession(), socket_path=socket_path, shards_qty=1
+        )
+        update_journal = UpdateJournal(path=str(tmp_path / "updates_0.journal"))
+        receiver = UpdateReceiver(socket_path=socket_path, shard_index=0, queue=Queue(), update_journal=update_journal)
+        await forwarder.listen()
+        await update_journal.open()
+        receiver.start()
+        await wait_for(forwarder.shards_connected.wait(), timeout=1)
+        await wait_for(forwarder.forward(raw_updates=[RAW_UPDATE]), timeout=1)
+        assert list(update_journal.journal.pending) == ["1"]
+
+        await wait_for(forwarder.forward(raw_updates=[RAW_UPDATE]), timeout=1)  # forwarded again after a restart
+        assert receiver.queue.qsize() == 1
+
+        await forwarder.stop()
+        await wait_for(receiver.closed.wait(), timeout=1)
+        await update_journal.close()
+
+    async def test_lost_shard_stops_polling(self, tmp_path):
+        socket_path = str(tmp_path / "bot.sock")
+        forwarder = UpdateForwarder(
+            token="token", http_session=TgBotApiSession(), socket_path=socket_path, shards_qty=1, backoff_base=0.01
+        )
+        offsets = []
+
+        async def get_raw_updates(offset: int, **kwargs) -> list:
+            offsets.append(offset)
+            if len(offsets) == 1:
+                raise ClientConnectionError("connection reset")
+            return [RAW_UPDATE]
+
+        forwarder.tg_client.get_raw_updates = get_raw_updates
+        await forwarder.listen()
+        forwarder.start()
+        _, writer = await open_unix_connection(path=socket_path)
+        await write_frame(writer=writer, payload={"shard_index": 0})
+        await wait_for(forwarder.shards_connected.wait(), timeout=1)
+        writer.close()  # the shard process has died
+
+        await wait_for(forwarder.shard_lost.wait(), timeout=1)
+        assert offsets == [0, 0]  # retried after the error, the lost batch is not confirmed
+
+        await forwarder.stop()
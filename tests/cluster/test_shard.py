@@ -0,0 +1,15 @@
+from dataclasses import replace
+
+from bot.cluster.cluster import TgBotShard
+from config.config import setup_config_tests
+
+
+class TestTgBotShard:
+    async def test_global_rate_is_split_between_shards(self):
+        config = setup_config_tests()
+        config.tg_bot = replace(config.tg_bot, global_rate_limit=30.0, processes_qty=3)
+        tg_bot_shard = TgBotShard(config=config, shard_index=1)
+
+        assert tg_bot_shard.sender.scheduler.global_bucket.rate == 10.0
+        assert tg_bot_shard.sender.scheduler.global_bucket.capacity == 10.0
+        await tg_bot_shard.http_session.close()
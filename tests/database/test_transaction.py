@@ -0,0 +1,33 @@
+import pytest
+
+from bot.general import TgBot
+from bot.models import Game
+from bot.worker.fsm import GAMEPLAY_STATE, REGISTRATION_STATE
+
+
+class TestTransaction:
+    async def test_transaction_commit(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+
+        async with accessor.transaction():
+            await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=REGISTRATION_STATE)
+            await accessor.delete_all_current_players(chat_id=game_two_players.chat_id)
+
+        updated_game = await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert updated_game.bot_state == REGISTRATION_STATE
+        assert updated_game.accounts == []
+
+    async def test_transaction_rollback(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+
+        with pytest.raises(RuntimeError):
+            async with accessor.transaction():
+                await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=GAMEPLAY_STATE)
+                await accessor.delete_all_current_players(chat_id=game_two_players.chat_id)
+                raise RuntimeError("handler failed halfway")
+
+        updated_game = await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert updated_game.bot_state == game_two_players.bot_state
+        assert len(updated_game.accounts) == 2
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from bot.models import AccountModel, Game, GameModel, User, UserModel
@@ -97,6 +98,11 @@ async def game_two_players_round(
     new_account_2 = AccountModel(
         user_id=user_2.id, game_id=game_no_players.chat_id, vote=True, scores=1, photo_num=SECOND_PHOTO
     )
+    async with db_session.begin() as session:
+        await session.execute(
+            update(GameModel).where(GameModel.chat_id == game_no_players.chat_id).values(votes_num=1)
+        )  # user_2 has already voted
+
     return await get_game_two_players(
         db_session=db_session,
         game=game_no_players,
@@ -31,6 +31,7 @@ async def tg_bot() -> TgBot:
     await tg_bot.database.connect()
     yield tg_bot
     await tg_bot.database.disconnect()
+    await tg_bot.http_session.close()
 
 
 @pytest.fixture
@@ -1,9 +1,17 @@
 from typing import Optional
 
 from bot.general import TgBot
+from bot.keyboard.keyboards import build_bracket_vote_keyboard
 from bot.models import Game
 from bot.poller.dataclasses import UpdateObjCallback
-from bot.worker.fsm import BEGINNING_STATE, GAMEPLAY_STATE, REGISTRATION_STATE, START_ROUND_STATE
+from bot.worker.fsm import (
+    BEGINNING_STATE,
+    BRACKET_ROUND_STATE,
+    FINISH_ROUND_STATE,
+    GAMEPLAY_STATE,
+    REGISTRATION_STATE,
+    START_ROUND_STATE,
+)
 from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
 
 
@@ -25,6 +33,9 @@ class TestCallbacksHandlers:
         self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_no_players: Game
     ):
         game_no_players.bot_state = REGISTRATION_STATE
+        await tg_bot.worker.accessor.change_current_bot_state(
+            chat_id=game_no_players.chat_id, new_bot_state=REGISTRATION_STATE
+        )  # the profile photos are loaded for a game in registration only
         updated_game = await self._get_updated_game(
             bot=tg_bot,
             handler=tg_bot.worker.handle_user_register_callback,
@@ -67,6 +78,47 @@ class TestCallbacksHandlers:
         assert updated_game.bot_state == START_ROUND_STATE
         assert all(map(lambda account: account.photo_num in (FIRST_PHOTO, SECOND_PHOTO), updated_game.accounts))
 
+    async def test_first_photo_callback(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players_round: Game
+    ):
+        game_two_players_round.bot_state = START_ROUND_STATE
+        updated_game = await self._get_updated_game(
+            bot=tg_bot,
+            handler=tg_bot.worker.handle_first_photo_callback,
+            update=update_callback,
+            game=game_two_players_round,
+        )
+
+        assert updated_game is not None
+        assert updated_game.bot_state == FINISH_ROUND_STATE  # draw
+        assert all(map(lambda account: account.vote and account.scores == 1, updated_game.accounts))
+
+    async def test_repeated_vote_is_rejected(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players_round: Game
+    ):
+        remaining_voters = await tg_bot.worker.accessor.vote_for_photo(
+            chat_id=game_two_players_round.chat_id, user_id=2, photo_num=FIRST_PHOTO
+        )
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players_round.chat_id)
+
+        assert remaining_voters is None
+        assert all(map(lambda account: account.scores == int(account.vote), updated_game.accounts))
+
+    async def test_vote_for_other_photo(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players_round: Game
+    ):
+        voter_id = update_callback.callback_query.from_.id  # owns the first photo
+        remaining_voters = await tg_bot.worker.accessor.vote_for_photo(
+            chat_id=game_two_players_round.chat_id, user_id=voter_id, photo_num=SECOND_PHOTO
+        )
+        tg_bot.worker.accessor.cache.invalidate()
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players_round.chat_id)
+        accounts = {account.user_id: account for account in updated_game.accounts}
+
+        assert remaining_voters == 0
+        assert accounts[voter_id].vote and accounts[voter_id].scores == 0
+        assert accounts[2].vote and accounts[2].scores == 2
+
     async def test_second_photo_callback(
         self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players_round: Game
     ):
@@ -104,6 +156,60 @@ class TestCallbacksHandlers:
             )
         )
 
+    async def test_play_bracket_callback(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players: Game
+    ):
+        game_two_players.bot_state = GAMEPLAY_STATE
+        updated_game = await self._get_updated_game(
+            bot=tg_bot,
+            handler=tg_bot.worker.handle_play_bracket_callback,
+            update=update_callback,
+            game=game_two_players,
+        )
+
+        assert updated_game is not None
+        assert updated_game.bot_state == BRACKET_ROUND_STATE
+        assert all(map(lambda account: account.match_num == 1, updated_game.accounts))
+
+    async def test_bracket_vote_callback(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players: Game
+    ):
+        game_two_players.bot_state = GAMEPLAY_STATE
+        await tg_bot.worker.handle_play_bracket_callback(update=update_callback, game=game_two_players)
+        game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        update_callback.callback_query.data = build_bracket_vote_keyboard(user_id=2).inline_keyboard[0][0].callback_data
+
+        for voter_id in (update_callback.callback_query.from_.id, update_callback.callback_query.from_.id, 2):
+            update_callback.callback_query.from_.id = voter_id
+            await tg_bot.worker.handle_bracket_vote_callback(update=update_callback, game=game)
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        winner = tuple(filter(lambda user: user.id == 2, await tg_bot.worker.accessor.get_all_users()))[0]
+
+        assert updated_game.bot_state == BEGINNING_STATE  # the repeated vote is not counted, both votes end the game
+        assert winner.wins == 1
+        assert updated_game.accounts == []
+
+    async def test_bracket_round_waits_for_quorum(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players: Game
+    ):
+        game_two_players.bot_state = GAMEPLAY_STATE
+        await tg_bot.worker.handle_play_bracket_callback(update=update_callback, game=game_two_players)
+        game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        update_callback.callback_query.data = build_bracket_vote_keyboard(user_id=2).inline_keyboard[0][0].callback_data
+
+        await tg_bot.worker.handle_bracket_vote_callback(update=update_callback, game=game)
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert updated_game.bot_state == BRACKET_ROUND_STATE  # a game of two needs both votes
+        assert await tg_bot.worker.accessor.count_decided_matches(chat_id=game.chat_id, quorum=2) == 0
+        assert await tg_bot.worker.accessor.count_decided_matches(chat_id=game.chat_id, quorum=1) == 1
+
+    async def test_bracket_without_matches(self, tg_bot: TgBot, game_two_players: Game):
+        await tg_bot.worker.accessor.start_bracket_matches(chat_id=game_two_players.chat_id, matches=[])
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert all(map(lambda account: account.match_num == 0, updated_game.accounts))
+
     async def test_exit_callback(self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players: Game):
         updated_game = await self._get_updated_game(
             bot=tg_bot,
@@ -125,5 +231,7 @@ class TestCallbacksHandlers:
         game: Optional[Game] = None,
     ) -> Optional[Game]:
         chat_id = update.callback_query.message.chat.id
-        await handler(update=update, game=game)
+        preload = bot.worker.filter.get_handler_preload(handler=handler)
+        preloaded = await preload(update=update) if preload else dict()
+        await handler(update=update, game=game, **preloaded)
         return await bot.worker.accessor.get_game_dataclass(chat_id=chat_id)
@@ -0,0 +1,20 @@
+from bot.poller.dataclasses import UpdateObjMessage
+from bot.poller.decoder import decode_update
+
+
+class TestDecodeUpdate:
+    def test_decoded_as_schema(self, update_message_start: UpdateObjMessage):
+        raw_update = {
+            "message": {
+                "text": "/start@kts_photochallenge_bot",
+                "chat": {"id": -123, "title": "Photo_Bot_Test", "type": "group"},
+                "from": {"id": 1, "first_name": "first_name", "last_name": "last_name", "username": "username"},
+                "message_id": 1234,
+            },
+            "update_id": 12345,  # keys in another order
+        }
+
+        assert decode_update(raw_update=raw_update) == update_message_start
+
+    def test_unknown_update(self):
+        assert decode_update(raw_update={"update_id": 1, "edited_message": {"message_id": 1}}) is None
@@ -0,0 +1,23 @@
+from bot.keyboard.keyboards import FIRST_PHOTO_CALLBACK
+from bot.poller.prefilter import RawUpdateFilter
+
+
+class TestRawUpdateFilter:
+    def test_chatter_dropped(self):
+        prefilter = RawUpdateFilter()
+        raw_updates = [
+            {"update_id": 1, "message": {"message_id": 1, "chat": {"id": -123}, "text": "hello"}},
+            {
+                "update_id": 2,
+                "message": {"message_id": 2, "chat": {"id": -123}, "text": "/start@kts_photochallenge_bot"},
+            },
+            {"update_id": 3, "message": {"message_id": 3, "chat": {"id": -123}}},
+            {"update_id": 4, "callback_query": {"id": "1", "data": FIRST_PHOTO_CALLBACK}},
+            {"update_id": 5, "callback_query": {"id": "2", "data": "unknown_button"}},
+            {"update_id": 6, "my_chat_member": {"new_chat_member": {"status": "administrator"}}},
+        ]
+
+        relevant_updates = [raw_update for raw_update in raw_updates if prefilter.is_relevant(raw_update)]
+
+        assert [raw_update["update_id"] for raw_update in relevant_updates] == [2, 4]
+        assert prefilter.statistics.dropped == 4
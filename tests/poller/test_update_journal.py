@@ -0,0 +1,22 @@
+from bot.poller.update_journal import UpdateJournal
+
+
+class TestUpdateJournal:
+    async def test_replay_not_handled(self, tmp_path):
+        path = str(tmp_path / "updates.journal")
+        update_journal = UpdateJournal(path=path)
+        await update_journal.open()
+        raw_updates = [
+            {"update_id": update_id, "message": {"message_id": update_id, "chat": {"id": -123}, "text": "text"}}
+            for update_id in (1, 2)
+        ]
+        await update_journal.append(raw_updates=raw_updates, offset=3)
+        update_journal.ack(update_id=1)
+        await update_journal.journal.flush()
+
+        restarted_update_journal = UpdateJournal(path=path)  # as after a crash, the first journal is not closed
+        replayed_raw_updates = await restarted_update_journal.open()
+        await restarted_update_journal.close()
+
+        assert replayed_raw_updates == [raw_updates[1]]
+        assert restarted_update_journal.offset == 3
@@ -0,0 +1,23 @@
+from bot.keyboard.keyboards import GAMEPLAY_KEYBOARD
+from bot.sender.dataclasses import SendMessageObj
+from bot.sender.outbox import Outbox
+
+
+class TestOutbox:
+    async def test_replay_not_acknowledged(self, tmp_path):
+        path = str(tmp_path / "outbox.journal")
+        outbox = Outbox(path=path)
+        await outbox.open()
+        sent_message = SendMessageObj(chat_id=1, text="sent")
+        pending_message = SendMessageObj(chat_id=1, text="pending", keyboard=GAMEPLAY_KEYBOARD)
+        await outbox.append(message=sent_message)
+        await outbox.append(message=pending_message)
+        outbox.ack(message=sent_message)
+        await outbox.journal.flush()
+
+        restarted_outbox = Outbox(path=path)  # as after a crash, the first outbox is not closed
+        replayed_messages = await restarted_outbox.open()
+        await restarted_outbox.close()
+
+        assert replayed_messages == [pending_message]
+        assert replayed_messages[0].outbox_keys == pending_message.outbox_keys
@@ -0,0 +1,57 @@
+from asyncio import sleep
+
+from bot.sender.coalescer import MERGED_TEXT_SEPARATOR, MESSAGE_TEXT_LIMIT, MessageCoalescer
+from bot.sender.dataclasses import AnswerCallbackQueryObj, EditMessageTextObj, SendMessageObj
+from bot.sender.outbox import Outbox
+from bot.sender.queue import PriorityMessageQueue
+
+
+class TestPriorityMessageQueue:
+    async def test_priority_order(self):
+        queue = PriorityMessageQueue()
+        await queue.put(SendMessageObj(chat_id=1, text="message"))
+        await queue.put(EditMessageTextObj(chat_id=1, text="edit"))
+        await queue.put(AnswerCallbackQueryObj(callback_query_id="1", text="answer"))
+
+        assert [(await queue.get()).text for _ in range(3)] == ["answer", "edit", "message"]
+        assert queue.statistics[0].processed == 1
+
+    async def test_low_priority_aging(self):
+        queue = PriorityMessageQueue(aging_interval=0.01)
+        await queue.put(SendMessageObj(chat_id=1, text="message"))
+        await sleep(0.05)
+        await queue.put(AnswerCallbackQueryObj(callback_query_id="1", text="answer"))
+
+        assert (await queue.get()).text == "message"
+
+    async def test_edits_collapse(self):
+        queue = PriorityMessageQueue(coalescer=MessageCoalescer())
+        for players_num in range(3):
+            await queue.put(EditMessageTextObj(chat_id=1, message_id=1, text=str(players_num)))
+
+        assert queue.qsize() == 1
+        assert (await queue.get()).text == "2"
+        assert queue.coalescer.statistics.collapsed_edits == 2
+
+    async def test_messages_merge(self):
+        queue = PriorityMessageQueue(coalescer=MessageCoalescer())
+        await queue.put(SendMessageObj(chat_id=1, text="winner"))
+        await queue.put(SendMessageObj(chat_id=1, text="statistics"))
+        await queue.put(SendMessageObj(chat_id=2, text="other chat"))
+        await queue.put(SendMessageObj(chat_id=1, text="x" * MESSAGE_TEXT_LIMIT))
+
+        assert queue.qsize() == 3
+        assert (await queue.get()).text == "winner" + MERGED_TEXT_SEPARATOR + "statistics"
+        assert queue.coalescer.statistics.merged_messages == 1
+
+    async def test_put_many_commits_once(self, tmp_path):
+        outbox = Outbox(path=str(tmp_path / "outbox.journal"))
+        await outbox.open()
+        queue = PriorityMessageQueue(outbox=outbox)
+        await queue.put_many([SendMessageObj(chat_id=chat_id, text="message") for chat_id in (1, 2, 3)])
+        statistics = outbox.journal.statistics
+        await outbox.close()
+
+        assert queue.qsize() == 3
+        assert statistics.commits == 1
+        assert statistics.pending == 3
@@ -0,0 +1,114 @@
+from asyncio import Queue, sleep, wait_for
+
+from bot.http_session import TgBotApiSession
+from bot.sender.coalescer import MERGED_TEXT_SEPARATOR
+from bot.sender.dataclasses import SendMessageObj
+from bot.sender.errors import ServerError, TgBotApiError, TooManyRequestsError
+from bot.sender.scheduler import SendScheduler, TokenBucket
+from bot.sender.sender import Sender
+
+
+class TestTokenBucket:
+    async def test_delay_after_capacity(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+
+        delay = bucket.try_acquire()
+        assert 0 < delay <= 0.1
+        await sleep(delay)
+        assert bucket.try_acquire() == 0
+
+    async def test_block(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        bucket.block(seconds=5)
+
+        assert 4 < bucket.get_delay() <= 5
+
+
+class TestSendScheduler:
+    async def test_group_rate(self):
+        scheduler = SendScheduler(group_rate_per_minute=2)
+        assert scheduler.reserve(chat_id=-1) == 0
+        assert scheduler.reserve(chat_id=-1) == 0
+
+        assert 29 < scheduler.reserve(chat_id=-1) <= 30
+        assert scheduler.reserve(chat_id=-2) == 0
+        assert scheduler.reserve(chat_id=1) == 0  # private chats share the global bucket only
+        assert scheduler.statistics.throttled == 1
+
+    async def test_too_many_requests(self):
+        scheduler = SendScheduler()
+
+        async def handler(message: SendMessageObj) -> None:
+            raise TooManyRequestsError(retry_after=3)
+
+        assert await scheduler.send(message=SendMessageObj(chat_id=-1, text="text"), handler=handler) == 3
+        assert 2 < scheduler.reserve(chat_id=-1) <= 3
+        assert scheduler.reserve(chat_id=-2) == 0
+        assert scheduler.statistics.rate_limited == 1
+
+    async def test_server_error_retries(self):
+        scheduler = SendScheduler(max_attempts=3, backoff_base=1)
+        message = SendMessageObj(chat_id=-1, text="text")
+
+        async def handler(message: SendMessageObj) -> None:
+            raise ServerError(error_code=502, description="Bad Gateway")
+
+        assert await scheduler.send(message=message, handler=handler) == 1
+        assert await scheduler.send(message=message, handler=handler) == 2
+        assert await scheduler.send(message=message, handler=handler) == 0
+        assert scheduler.statistics.retried == 2
+        assert scheduler.statistics.dropped == 1
+
+    async def test_bad_request_is_dropped(self):
+        scheduler = SendScheduler()
+
+        async def handler(message: SendMessageObj) -> None:
+            raise TgBotApiError(error_code=400, description="Bad Request")
+
+        assert await scheduler.send(message=SendMessageObj(chat_id=-1, text="text"), handler=handler) == 0
+        assert scheduler.statistics.retried == 0
+        assert scheduler.statistics.dropped == 1
+
+
+class TestParking:
+    async def test_throttled_chat_does_not_block_shard(self):
+        scheduler = SendScheduler(group_rate_per_minute=1)
+        sender = Sender(token="token", queue=Queue(), http_session=TgBotApiSession(), scheduler=scheduler)
+        sent = []
+
+        async def send_message(message: SendMessageObj) -> None:
+            sent.append(message.text)
+
+        sender.tg_client.send_message = send_message
+        sender.start()
+        await sender.queue.put(SendMessageObj(chat_id=-1, text="first"))
+        await sleep(0.01)
+        await sender.queue.put(SendMessageObj(chat_id=-1, text="throttled"))
+        await sender.queue.put(SendMessageObj(chat_id=-2, text="other chat"))
+        await wait_for(sender.stop(), timeout=1)
+
+        assert sent == ["first", "other chat"]
+        assert [message.text for _, message in sender.parked[-1]] == ["throttled"]
+
+    async def test_parked_message_is_retried(self):
+        sender = Sender(token="token", queue=Queue(), http_session=TgBotApiSession())
+        sent = []
+
+        async def send_message(message: SendMessageObj) -> None:
+            if message.text == "first" and not sent:
+                raise TooManyRequestsError(retry_after=0.05)
+            sent.append(message.text)
+
+        sender.tg_client.send_message = send_message
+        sender.start()
+        await sender.queue.put(SendMessageObj(chat_id=-1, text="first"))
+        await sender.queue.put(SendMessageObj(chat_id=-3, text="other chat"))
+        await sleep(0.01)
+        await sender.queue.put(SendMessageObj(chat_id=-1, text="second"))
+        await sleep(0.1)
+        await wait_for(sender.stop(), timeout=1)
+
+        assert sent == ["other chat", f"first{MERGED_TEXT_SEPARATOR}second"]  # merged while parked
+        assert not sender.parked
@@ -0,0 +1,46 @@
+from asyncio import Event, Queue
+from asyncio import TimeoutError as AsyncioTimeoutError
+from asyncio import wait_for
+
+from bot.http_session import TgBotApiSession
+from bot.sender.dataclasses import AnswerCallbackQueryObj, SendMessageObj
+from bot.sender.sender import Sender
+
+
+class TestSender:
+    async def test_failed_message_does_not_stop_shard(self):
+        sender = Sender(token="token", queue=Queue(), http_session=TgBotApiSession())
+        sent = []
+
+        async def send_message(message: SendMessageObj) -> None:
+            if message.text == "timeout":
+                raise AsyncioTimeoutError()
+            sent.append(message.text)
+
+        sender.tg_client.send_message = send_message
+        sender.start()
+        await sender.queue.put(SendMessageObj(chat_id=1, text="timeout"))
+        await sender.queue.put(SendMessageObj(chat_id=2, text="delivered"))  # the same (single) shard
+        await wait_for(sender.stop(), timeout=1)
+
+        assert sent == ["delivered"]
+
+    async def test_answer_does_not_wait_for_messages(self):
+        sender = Sender(token="token", queue=Queue(), http_session=TgBotApiSession())
+        answered = Event()
+
+        async def send_message(message: SendMessageObj) -> None:
+            await wait_for(answered.wait(), timeout=1)  # the shard is busy until the answer is sent
+
+        async def answer_callback_query(message: AnswerCallbackQueryObj) -> None:
+            answered.set()
+
+        sender.tg_client.send_message = send_message
+        sender.tg_client.answer_callback_query = answer_callback_query
+        sender.start()
+        await sender.queue.put(SendMessageObj(chat_id=1, text="slow"))
+        await sender.queue.put(AnswerCallbackQueryObj(callback_query_id="1", text="answer"))
+        await wait_for(sender.stop(), timeout=1)
+
+        assert answered.is_set()
+        assert sender.scheduler.statistics.dropped == 0
@@ -0,0 +1,65 @@
+from asyncio import wait_for
+
+from bot.general import TgBot
+from bot.keyboard.keyboards import STATISTICS_CALLBACK
+from bot.poller.dataclasses import UpdateObjCallback, UpdateObjMessage
+from bot.sharding import get_shard_index
+from bot.worker.dataclasses import RoundTimeout
+
+
+class TestUpdatesBatch:
+    async def test_partial_batch_after_wait(self, tg_bot: TgBot):
+        worker = tg_bot.worker
+        worker.batch_size, worker.batch_wait = 3, 0.01
+        for update_id in range(2):
+            await worker.shards.put(key=-123, item=update_id)
+        shard_index = get_shard_index(key=-123, shards_qty=worker.workers_qty)
+
+        batch = await worker.get_batch(shard_index=shard_index)
+
+        assert [update for _, update in batch] == [0, 1]  # the wait for the 3rd update has expired
+        assert worker.batch_statistics.max_batch_size == 2
+
+    async def test_full_batch(self, tg_bot: TgBot):
+        worker = tg_bot.worker
+        worker.batch_size, worker.batch_wait = 3, 0.01
+        for update_id in range(4):
+            await worker.shards.put(key=-123, item=update_id)
+        shard_index = get_shard_index(key=-123, shards_qty=worker.workers_qty)
+
+        batch = await worker.get_batch(shard_index=shard_index)
+
+        assert [update for _, update in batch] == [0, 1, 2]
+        assert worker.shards.get_nowait(shard_index=shard_index)[1] == 3
+
+    async def test_failed_update_does_not_stop_shard(self, tg_bot: TgBot, update_callback: UpdateObjCallback):
+        worker = tg_bot.worker
+        update_callback.callback_query.data = STATISTICS_CALLBACK
+        calls = []
+
+        async def get_all_users():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ConnectionError("database is gone")
+            return []
+
+        worker.accessor.get_all_users = get_all_users
+        worker.start()
+        for _ in range(2):
+            await worker.shards.put(key=-123, item=update_callback)
+        await wait_for(worker.stop(), timeout=1)
+
+        assert len(calls) == 2
+        assert tg_bot.message_queue.qsize() == 1  # "no statistics" of the second update
+
+    async def test_prefetch_first_update_of_chat(self, tg_bot: TgBot, update_message_start: UpdateObjMessage):
+        worker = tg_bot.worker
+        batch = [
+            (0.0, update_message_start),  # the state projection of chat -123 comes first
+            (0.0, RoundTimeout(chat_id=-123, current_round=1)),
+            (0.0, RoundTimeout(chat_id=-456, current_round=1)),
+            (0.0, RoundTimeout(chat_id=-456, current_round=1)),
+        ]
+        projections = [worker.filter.get_route_projection(update=update) for _, update in batch]
+
+        assert worker.get_prefetch_chat_ids(batch=batch, projections=projections) == [-456]
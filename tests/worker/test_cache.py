@@ -0,0 +1,48 @@
+from bot.general import TgBot
+from bot.models import Game
+from bot.worker.fsm import DELETED_STATE, GAMEPLAY_STATE
+
+
+class TestGameCache:
+    async def test_cache_hit(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        cached_game = await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert cached_game == game_two_players
+        assert accessor.cache.statistics.misses == 1
+        assert accessor.cache.statistics.hits == 1
+
+    async def test_cache_write_through(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=GAMEPLAY_STATE)
+        await accessor.increment_users_total_games(game=game_two_players)
+
+        cached_game = await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        accessor.cache.invalidate(chat_id=game_two_players.chat_id)
+        stored_game = await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+
+        assert cached_game == stored_game
+        assert stored_game.bot_state == GAMEPLAY_STATE
+
+    async def test_cache_warm_up(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=DELETED_STATE)
+        await accessor.warm_up_cache()
+
+        assert len(accessor.cache) == 0
+
+        await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=GAMEPLAY_STATE)
+        await accessor.warm_up_cache()
+
+        assert len(accessor.cache) == 1
+
+    async def test_bulk_load_primes_cache(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        unknown_chat_id = game_two_players.chat_id - 1
+        games = await accessor.get_games_dataclasses(chat_ids=[game_two_players.chat_id, unknown_chat_id])
+
+        assert games == {game_two_players.chat_id: game_two_players, unknown_chat_id: None}
+        assert accessor.prefetch_queries == 1
+        assert accessor.cache.peek(chat_id=game_two_players.chat_id) == game_two_players
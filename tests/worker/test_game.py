@@ -0,0 +1,52 @@
+from bot.models import Account, Game, User
+from bot.worker.accessor import BotAccessor
+from bot.worker.fsm import BRACKET_ROUND_STATE
+from bot.worker.status import FIRST_PHOTO, SECOND_PHOTO
+
+
+class TestGameIndexes:
+    async def test_indexes_follow_changes(self, game_two_players: Game, user_1: User, user_2: User):
+        game = game_two_players
+        game.set_photo_num(user_id=user_1.id, photo_num=FIRST_PHOTO)
+        game.set_photo_num(user_id=user_2.id, photo_num=SECOND_PHOTO)
+        game.set_vote(user_id=user_1.id)
+        game.set_vote(user_id=user_1.id)
+
+        assert game.photo_accounts[FIRST_PHOTO].user_id == user_1.id
+        assert game.voted_num == 1
+
+        game.remove_player(user_id=user_1.id)
+
+        assert set(game.players_by_id) == {user_2.id}
+        assert set(game.photo_accounts) == {SECOND_PHOTO}
+        assert game.voted_num == 0
+
+        game.reset_accounts()
+
+        assert game.photo_accounts == {}
+        assert game.accounts[0].photo_num == "no"
+
+    async def test_empty_matches_are_dropped(self):
+        users = [
+            User(id=user_id, username=str(user_id), profile_photo_id="", wins=0, total_games=0, efficiency=0)
+            for user_id in range(1, 7)
+        ]
+        accounts = [
+            Account(user_id=user.id, game_id=-123, vote=False, scores=0, photo_num="no", match_num=(user.id + 1) // 2)
+            for user in users
+        ]
+        game = Game(chat_id=-123, bot_state=BRACKET_ROUND_STATE, current_round=1, players=users, accounts=accounts)
+
+        for user_id in (2, 4, 6):  # the losers of the first round
+            game.remove_player(user_id=user_id)
+        for user_id, match_num in ((1, 1), (3, 1), (5, 0)):  # 1 vs 3, 5 has a bye
+            game.set_match_num(user_id=user_id, match_num=match_num)
+
+        assert {
+            match_num: [account.user_id for account in pair] for match_num, pair in game.match_accounts.items()
+        } == {1: [1, 3]}
+        assert len(BotAccessor.choose_match_winners(game=game)[0]) == 1
+
+        game.match_accounts[2] = []  # a stale entry is not a match
+        assert BotAccessor.get_matches_num(game=game) == 1
+        assert len(BotAccessor.choose_match_winners(game=game)[0]) == 1
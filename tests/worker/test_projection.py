@@ -0,0 +1,37 @@
+from bot.general import TgBot
+from bot.keyboard.keyboards import STATISTICS_CALLBACK, USER_REGISTER_CALLBACK
+from bot.models import Game, GameState
+from bot.poller.dataclasses import UpdateObjCallback, UpdateObjMessage
+from bot.worker.projection import PROJECTION_FULL, PROJECTION_NONE, PROJECTION_STATE
+
+
+class TestProjection:
+    async def test_route_projection(
+        self, tg_bot: TgBot, update_message_start: UpdateObjMessage, update_callback: UpdateObjCallback
+    ):
+        update_filter = tg_bot.worker.filter
+
+        assert update_filter.get_route_projection(update=update_message_start) == PROJECTION_STATE
+        assert update_filter.get_route_projection(update=update_callback) is None  # unknown callback data
+
+        update_callback.callback_query.data = STATISTICS_CALLBACK
+        assert update_filter.get_route_projection(update=update_callback) == PROJECTION_NONE
+
+        update_callback.callback_query.data = USER_REGISTER_CALLBACK
+        assert update_filter.get_route_projection(update=update_callback) == PROJECTION_FULL
+
+    async def test_game_state_skips_players(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        game_state = await accessor.get_game_state(chat_id=game_two_players.chat_id)
+
+        assert game_state == GameState(
+            chat_id=game_two_players.chat_id,
+            bot_state=game_two_players.bot_state,
+            current_round=game_two_players.current_round,
+        )
+        assert accessor.projection_queries == {PROJECTION_STATE: 1, PROJECTION_FULL: 0}
+        assert accessor.cache.peek(chat_id=game_two_players.chat_id) is None
+
+        await accessor.get_game_dataclass(chat_id=game_two_players.chat_id)
+        assert await accessor.get_game_state(chat_id=game_two_players.chat_id) == game_two_players  # cached full game
+        assert accessor.projection_queries == {PROJECTION_STATE: 1, PROJECTION_FULL: 1}
@@ -0,0 +1,77 @@
+from asyncio import sleep
+from datetime import datetime, timedelta, timezone
+
+from bot.general import TgBot
+from bot.models import Game
+from bot.timer import RoundTimer
+from bot.worker.dataclasses import RoundTimeout
+from bot.worker.fsm import BEGINNING_STATE, START_ROUND_STATE
+
+
+class TestRoundTimer:
+    async def test_stale_timers_are_dropped(self):
+        fired = []
+
+        async def on_expire(chat_id: int, current_round: int) -> None:
+            fired.append((chat_id, current_round))
+
+        timer = RoundTimer()
+        timer.start(on_expire=on_expire)
+        now = datetime.now(tz=timezone.utc)
+        timer.schedule(chat_id=1, current_round=1, deadline=now + timedelta(seconds=0.05))
+        timer.schedule(chat_id=1, current_round=2, deadline=now + timedelta(seconds=0.1))  # replaces the 1st round
+        timer.schedule(chat_id=2, current_round=1, deadline=now + timedelta(seconds=0.01))
+        timer.cancel(chat_id=2)
+        await sleep(0.2)
+        await timer.stop()
+
+        assert fired == [(1, 2)]
+        assert timer.statistics.cancelled == 2
+
+    async def test_timer_waits_for_later_deadline(self):
+        fired = []
+
+        async def on_expire(chat_id: int, current_round: int) -> None:
+            fired.append(chat_id)
+
+        timer = RoundTimer()
+        timer.start(on_expire=on_expire)
+        await sleep(0)  # the task sleeps on the empty heap
+        timer.schedule(chat_id=1, current_round=1, deadline=datetime.now(tz=timezone.utc) + timedelta(seconds=0.05))
+        await sleep(0.01)
+
+        assert fired == []  # the timed wait of the task has not expired yet
+
+        await sleep(0.1)
+        await timer.stop()
+
+        assert fired == [1]
+
+    async def test_round_timeout_closes_round(self, tg_bot: TgBot, game_two_players_round: Game):
+        game_two_players_round.bot_state = START_ROUND_STATE
+        chat_id, current_round = game_two_players_round.chat_id, game_two_players_round.current_round
+        stale_timeout = RoundTimeout(chat_id=chat_id, current_round=current_round - 1)
+        await tg_bot.worker.handle_round_timeout(update=stale_timeout, game=game_two_players_round)
+
+        assert game_two_players_round.accounts != []
+
+        timeout = RoundTimeout(chat_id=chat_id, current_round=current_round)
+        await tg_bot.worker.handle_round_timeout(update=timeout, game=game_two_players_round)
+        updated_game = await tg_bot.worker.accessor.get_game_dataclass(chat_id=chat_id)
+
+        assert updated_game.bot_state == BEGINNING_STATE  # the only player with a vote has won
+        assert updated_game.accounts == []
+
+    async def test_round_deadlines_recovery(self, tg_bot: TgBot, game_two_players: Game):
+        accessor = tg_bot.worker.accessor
+        round_deadline = datetime.now(tz=timezone.utc) + timedelta(seconds=30)
+        await accessor.change_current_bot_state(chat_id=game_two_players.chat_id, new_bot_state=START_ROUND_STATE)
+        await accessor.set_round_deadline(chat_id=game_two_players.chat_id, round_deadline=round_deadline)
+
+        assert await accessor.get_round_deadlines() == [
+            (game_two_players.chat_id, game_two_players.current_round, round_deadline)
+        ]
+
+        await tg_bot.recover_round_timers()
+
+        assert len(tg_bot.round_timer) == 1
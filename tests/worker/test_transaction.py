@@ -0,0 +1,104 @@
+import pytest
+
+from bot.general import TgBot
+from bot.keyboard.keyboards import USER_REGISTER_CALLBACK
+from bot.models import Game
+from bot.poller.dataclasses import UpdateObjCallback
+from bot.sender.dataclasses import SendMessageObj
+from bot.worker.dataclasses import RoundTimeout
+from bot.worker.fsm import REGISTRATION_STATE
+from bot.worker.projection import PROJECTION_FULL
+
+
+class TestHandlerTransaction:
+    async def test_messages_are_queued_after_commit(self, tg_bot: TgBot):
+        worker = tg_bot.worker
+
+        async def handle_round_timeout(update: RoundTimeout, game: Game) -> None:
+            await worker.put_message(SendMessageObj(chat_id=update.chat_id, text="committed"))
+            assert worker.message_queue.empty()  # the transaction is still open
+
+        worker.handle_round_timeout = handle_round_timeout
+        await worker.handle_update(
+            update=RoundTimeout(chat_id=-123, current_round=1), projection=PROJECTION_FULL, games={}
+        )
+
+        assert worker.message_queue.get_nowait().text == "committed"
+
+    async def test_rolled_back_messages_are_dropped(self, tg_bot: TgBot):
+        worker = tg_bot.worker
+
+        async def handle_round_timeout(update: RoundTimeout, game: Game) -> None:
+            await worker.put_message(SendMessageObj(chat_id=update.chat_id, text="rolled back"))
+            raise RuntimeError("handler failed")
+
+        worker.handle_round_timeout = handle_round_timeout
+        with pytest.raises(RuntimeError):
+            await worker.handle_update(
+                update=RoundTimeout(chat_id=-123, current_round=1), projection=PROJECTION_FULL, games={}
+            )
+
+        assert worker.message_queue.empty()
+
+    async def test_rolled_back_timer_is_not_scheduled(self, tg_bot: TgBot, game_two_players: Game):
+        worker = tg_bot.worker
+        worker.round_timeout = 60
+
+        async def handle_round_timeout(update: RoundTimeout, game: Game) -> None:
+            await worker.start_round_timer(game=game)
+            assert len(worker.round_timer) == 0  # the transaction is still open
+            if update.current_round == 2:
+                raise RuntimeError("handler failed")
+
+        worker.handle_round_timeout = handle_round_timeout
+        with pytest.raises(RuntimeError):
+            await worker.handle_update(
+                update=RoundTimeout(chat_id=game_two_players.chat_id, current_round=2),
+                projection=PROJECTION_FULL,
+                games={},
+            )
+        assert len(worker.round_timer) == 0
+
+        await worker.handle_update(
+            update=RoundTimeout(chat_id=game_two_players.chat_id, current_round=1), projection=PROJECTION_FULL, games={}
+        )
+        assert len(worker.round_timer) == 1
+
+    async def test_profile_photos_are_loaded_before_transaction(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_no_players: Game
+    ):
+        worker = tg_bot.worker
+        update_callback.callback_query.data = USER_REGISTER_CALLBACK
+        in_transaction = []
+
+        async def get_user_profile_photos(user_id: int, offset: int = 0) -> list:
+            in_transaction.append(worker.accessor.database._unit_of_work.get() is not None)
+            return []
+
+        worker.sender.tg_client.get_user_profile_photos = get_user_profile_photos
+        await worker.accessor.change_current_bot_state(
+            chat_id=game_no_players.chat_id, new_bot_state=REGISTRATION_STATE
+        )
+        await worker.handle_update(update=update_callback, projection=PROJECTION_FULL, games={})
+
+        assert in_transaction == [False]
+
+    async def test_profile_photos_are_not_loaded_for_ignored_click(
+        self, tg_bot: TgBot, update_callback: UpdateObjCallback, game_two_players: Game
+    ):
+        worker = tg_bot.worker
+        update_callback.callback_query.data = USER_REGISTER_CALLBACK
+        calls = []
+
+        async def get_user_profile_photos(user_id: int, offset: int = 0) -> list:
+            calls.append(user_id)
+            return []
+
+        worker.sender.tg_client.get_user_profile_photos = get_user_profile_photos
+        await worker.handle_update(update=update_callback, projection=PROJECTION_FULL, games={})  # not registration
+        await worker.accessor.change_current_bot_state(
+            chat_id=game_two_players.chat_id, new_bot_state=REGISTRATION_STATE
+        )
+        await worker.handle_update(update=update_callback, projection=PROJECTION_FULL, games={})  # already a player
+
+        assert calls == []